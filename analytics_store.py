@@ -0,0 +1,187 @@
+# analytics_store.py — indexed feedback/activity store behind the closed-test admin pages
+# -------------------------------------------------------------------------------------------
+# The JSONL event logs stay the record of what happened; this is the query side. Every
+# feedback write and every (batched) activity write also lands here:
+#   feedback(tester, message, rating, ts)   indexed on tester and ts
+#   activity(tester, route, status, ts)     indexed on tester and ts
+# Aggregates are maintained incrementally by AFTER INSERT triggers, so /admin/test_status
+# reads a handful of small rows instead of recounting the whole log:
+#   tester_stats(tester → feedback count, activity count, last_ts)
+#   rating_hist(rating → count)
+# and the latest entry is the max rowid. The dashboard reads one newest-first LIMIT/OFFSET page
+# (rowid order, or the (tester, id) index for a single tester).
+# A fresh DB is backfilled once from the existing logs (meta 'backfill:<name>').
+#
+# Env: ANALYTICS_DB_PATH (default data/analytics.db)
+# -------------------------------------------------------------------------------------------
+
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlite_pool import get_pool
+
+ANALYTICS_DB_PATH = os.getenv("ANALYTICS_DB_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "analytics.db"
+)
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS feedback (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tester TEXT NOT NULL,
+        message TEXT NOT NULL DEFAULT '',
+        rating TEXT NOT NULL DEFAULT 'N/A',
+        ts TEXT NOT NULL DEFAULT ''
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_feedback_tester ON feedback(tester, id)",
+    "CREATE INDEX IF NOT EXISTS idx_feedback_ts ON feedback(ts)",
+    """CREATE TABLE IF NOT EXISTS activity (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tester TEXT NOT NULL,
+        route TEXT NOT NULL DEFAULT '',
+        status TEXT NOT NULL DEFAULT '',
+        ts TEXT NOT NULL DEFAULT ''
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_activity_tester ON activity(tester, id)",
+    "CREATE INDEX IF NOT EXISTS idx_activity_ts ON activity(ts)",
+    """CREATE TABLE IF NOT EXISTS tester_stats (
+        tester TEXT PRIMARY KEY,
+        feedback INTEGER NOT NULL DEFAULT 0,
+        activity INTEGER NOT NULL DEFAULT 0,
+        last_ts TEXT NOT NULL DEFAULT ''
+    )""",
+    "CREATE TABLE IF NOT EXISTS rating_hist (rating TEXT PRIMARY KEY, n INTEGER NOT NULL DEFAULT 0)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    """CREATE TRIGGER IF NOT EXISTS feedback_agg AFTER INSERT ON feedback BEGIN
+        INSERT INTO tester_stats (tester, feedback, last_ts) VALUES (NEW.tester, 1, NEW.ts)
+            ON CONFLICT(tester) DO UPDATE SET feedback = feedback + 1, last_ts = MAX(last_ts, NEW.ts);
+        INSERT INTO rating_hist (rating, n) VALUES (NEW.rating, 1)
+            ON CONFLICT(rating) DO UPDATE SET n = n + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS activity_agg AFTER INSERT ON activity BEGIN
+        INSERT INTO tester_stats (tester, activity, last_ts) VALUES (NEW.tester, 1, NEW.ts)
+            ON CONFLICT(tester) DO UPDATE SET activity = activity + 1, last_ts = MAX(last_ts, NEW.ts);
+    END""",
+]
+
+
+def _feedback_row(e: Dict[str, Any]):
+    return (str(e.get("tester") or "unknown"), str(e.get("message") or ""),
+            str(e.get("rating") if e.get("rating") not in (None, "") else "N/A"), str(e.get("timestamp") or ""))
+
+
+def _activity_row(e: Dict[str, Any]):
+    return (str(e.get("tester") or "unknown"), str(e.get("route") or ""),
+            str(e.get("status") or ""), str(e.get("timestamp") or ""))
+
+
+_INSERTS = {
+    "feedback": ("INSERT INTO feedback (tester, message, rating, ts) VALUES (?, ?, ?, ?)", _feedback_row),
+    "activity": ("INSERT INTO activity (tester, route, status, ts) VALUES (?, ?, ?, ?)", _activity_row),
+}
+
+
+class AnalyticsStore:
+    def __init__(self, db_path: str = ANALYTICS_DB_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.path = db_path  # also a LogSink target: see append_many
+        self.pool = get_pool(db_path)
+        conn = self.pool.connection()
+        with conn:
+            for stmt in _SCHEMA:
+                conn.execute(stmt)
+
+    # ---- writes ---------------------------------------------------------------
+    def record_feedback(self, entry: Dict[str, Any]):
+        self.record_feedback_many([entry])
+
+    def record_feedback_many(self, entries: Iterable[Dict[str, Any]]) -> int:
+        return self._insert("feedback", entries)
+
+    def record_activity_many(self, entries: Iterable[Dict[str, Any]]) -> int:
+        return self._insert("activity", entries)
+
+    def _insert(self, table: str, entries: Iterable[Dict[str, Any]]) -> int:
+        sql, row = _INSERTS[table]
+        rows = [row(e) for e in entries if isinstance(e, dict)]
+        conn = self.pool.connection()
+        with conn:
+            conn.executemany(sql, rows)
+        return len(rows)
+
+    def append_many(self, entries: List[Dict[str, Any]]):
+        """LogSink target: activity entries arrive here in the same batches as the JSONL log."""
+        self.record_activity_many(entries)
+
+    def backfill(self, name: str, entries: Iterable[Dict[str, Any]]) -> int:
+        """One-time import of an existing log ("feedback" or "activity"); later calls are no-ops.
+        Check, insert and meta mark share one write transaction, so workers booting together
+        (or a crash mid-import) can't import the log twice."""
+        conn = self.pool.connection()
+        key = f"backfill:{name}"
+        if conn.execute("SELECT 1 FROM meta WHERE key=?", (key,)).fetchone():
+            return 0
+        sql, row = _INSERTS["feedback" if name == "feedback" else "activity"]
+        rows = [row(e) for e in entries if isinstance(e, dict)]  # read the log before taking the lock
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM meta WHERE key=?", (key,)).fetchone():
+                return 0  # another worker finished it while we were reading
+            conn.executemany(sql, rows)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(len(rows))))
+        if rows:
+            print(f"[Analytics] 📥 Backfilled {len(rows)} {name} entries")
+        return len(rows)
+
+    # ---- reads ----------------------------------------------------------------
+    def summary(self) -> Dict[str, Any]:
+        conn = self.pool.connection()
+        stats = conn.execute(
+            "SELECT tester, feedback, activity, last_ts FROM tester_stats ORDER BY feedback DESC, tester"
+        ).fetchall()
+        latest = conn.execute(
+            "SELECT tester, message, rating, ts FROM feedback ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        feedback_by_tester = {t: f for t, f, _, _ in stats if f}
+        return {
+            "total_testers": len(feedback_by_tester),
+            "total_feedback": sum(feedback_by_tester.values()),
+            "tester_activity": feedback_by_tester,
+            "tester_events": {t: a for t, _, a, _ in stats if a},
+            "last_seen": {t: ts for t, _, _, ts in stats},
+            "ratings": dict(conn.execute("SELECT rating, n FROM rating_hist ORDER BY rating").fetchall()),
+            "latest_entry": dict(zip(("tester", "message", "rating", "timestamp"), latest)) if latest else None,
+        }
+
+    def feedback_page(self, page: int = 1, per_page: int = 50, tester: Optional[str] = None) -> Dict[str, Any]:
+        """Newest-first page of feedback (optionally one tester's) + the total for the pager."""
+        page, per_page = max(1, int(page)), max(1, min(int(per_page), 500))
+        conn = self.pool.connection()
+        where, args = ("WHERE tester=?", (tester,)) if tester else ("", ())
+        if tester:
+            row = conn.execute("SELECT feedback FROM tester_stats WHERE tester=?", (tester,)).fetchone()
+            total = row[0] if row else 0
+        else:
+            total = conn.execute("SELECT COALESCE(SUM(feedback), 0) FROM tester_stats").fetchone()[0]
+        rows = conn.execute(
+            f"SELECT tester, message, rating, ts FROM feedback {where} ORDER BY id DESC LIMIT ? OFFSET ?",
+            (*args, per_page, (page - 1) * per_page),
+        ).fetchall()
+        return {
+            "page": page, "per_page": per_page, "total": total,
+            "pages": max(1, -(-total // per_page)),
+            "entries": [dict(zip(("tester", "message", "rating", "timestamp"), r)) for r in rows],
+        }
+
+
+# simple module-level singleton
+_STORE: Optional[AnalyticsStore] = None
+_STORE_LOCK = threading.Lock()
+
+def get_analytics() -> AnalyticsStore:
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = AnalyticsStore()
+    return _STORE
@@ -0,0 +1,238 @@
+# ann_index.py — pluggable nearest-neighbour indexes for fact + Pam-chunk recall (numpy only)
+# -------------------------------------------------------------------------------------------
+# Two interchangeable backends with the same surface (load / upsert / remove / top_k / len):
+#   - "exact": vector_matrix.EmbeddingMatrix (one mat-vec product over everything)
+#   - "ivf":   IVFIndex — spherical k-means coarse quantizer + inverted lists; a query scores
+#              the nlist centroids, then only the rows in the `nprobe` closest lists.
+# "auto" (default) stays exact below ANN_MIN_ROWS and switches to IVF above it.
+#
+# Tuning (env):
+#   ANN_INDEX=auto|exact|ivf   ANN_MIN_ROWS=20000
+#   ANN_NLIST=0 (0 = ~sqrt(n))  ANN_NPROBE=8  ANN_KMEANS_ITERS=12
+# Higher nprobe → better recall, slower queries. See benchmarks/bench_ann.py.
+# -------------------------------------------------------------------------------------------
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from vector_matrix import EmbeddingMatrix, normalize_rows
+
+ANN_INDEX = os.getenv("ANN_INDEX", "auto").strip().lower()
+ANN_MIN_ROWS = int(os.getenv("ANN_MIN_ROWS", "20000"))
+ANN_NLIST = int(os.getenv("ANN_NLIST", "0"))
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "8"))
+ANN_KMEANS_ITERS = int(os.getenv("ANN_KMEANS_ITERS", "12"))
+
+
+def _spherical_kmeans(x: np.ndarray, k: int, iters: int, seed: int = 0,
+                      sample_per_list: int = 64) -> np.ndarray:
+    """Cosine k-means on already-normalized rows; returns normalized centroids (k x d)."""
+    rng = np.random.default_rng(seed)
+    if len(x) > k * sample_per_list:  # train on a sample; assignment of the rest is cheap
+        x = x[rng.choice(len(x), size=k * sample_per_list, replace=False)]
+    c = x[rng.choice(len(x), size=k, replace=False)].copy()
+    for _ in range(iters):
+        assign = _assign(x, c)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(k + 1))
+        sums = np.zeros_like(c)
+        nonempty = bounds[1:] > bounds[:-1]
+        sums[nonempty] = np.add.reduceat(x[order], bounds[:-1][nonempty], axis=0)
+        empty = np.flatnonzero(~nonempty)
+        if len(empty):  # re-seed empty clusters with random points
+            sums[empty] = x[rng.integers(len(x), size=len(empty))]
+        c = normalize_rows(sums)
+    return c
+
+
+def _assign(x: np.ndarray, c: np.ndarray, batch: int = 8192) -> np.ndarray:
+    out = np.empty(len(x), dtype=np.int32)
+    for i in range(0, len(x), batch):
+        out[i:i + batch] = np.argmax(x[i:i + batch] @ c.T, axis=1)
+    return out
+
+
+class IVFIndex:
+    kind = "ivf"
+
+    def __init__(self, nlist: int = ANN_NLIST, nprobe: int = ANN_NPROBE,
+                 iters: int = ANN_KMEANS_ITERS, min_train: Optional[int] = None, seed: int = 0):
+        self.nlist = nlist            # 0 → chosen at training time (~sqrt(n))
+        self.nprobe = nprobe
+        self.iters = iters
+        self.min_train = min_train
+        self.seed = seed
+        self.dim: Optional[int] = None
+        self.centroids: Optional[np.ndarray] = None
+        self._ids: List[np.ndarray] = []
+        self._vecs: List[np.ndarray] = []
+        self._pending: List[list] = []
+        self._where: Dict[int, int] = {}
+        self._lock = threading.RLock()
+
+    # ---- internals ------------------------------------------------------------
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def _reset_lists(self, nlists: int):
+        self._ids = [np.empty(0, dtype=np.int64) for _ in range(nlists)]
+        self._vecs = [np.empty((0, self.dim or 0), dtype=np.float32) for _ in range(nlists)]
+        self._pending = [[] for _ in range(nlists)]
+        self._where = {}
+
+    def _flush(self, j: int):
+        # incremental inserts are buffered per list and concatenated on first read
+        if self._pending[j]:
+            ids, vecs = zip(*self._pending[j])
+            self._ids[j] = np.concatenate([self._ids[j], np.asarray(ids, dtype=np.int64)])
+            self._vecs[j] = np.vstack([self._vecs[j], np.stack(vecs)])
+            self._pending[j] = []
+
+    def _all(self) -> Tuple[np.ndarray, np.ndarray]:
+        for j in range(len(self._ids)):
+            self._flush(j)
+        if not self._ids:
+            return np.empty(0, dtype=np.int64), np.empty((0, self.dim or 0), dtype=np.float32)
+        return np.concatenate(self._ids), np.vstack(self._vecs)
+
+    def _train_threshold(self) -> int:
+        if self.min_train:
+            return self.min_train
+        return max(ANN_MIN_ROWS // 4, 1024)
+
+    def _build(self, ids: np.ndarray, vecs: np.ndarray):
+        n = len(ids)
+        if self.centroids is None and n >= self._train_threshold():
+            k = self.nlist or max(16, int(np.sqrt(n)))
+            k = min(k, n)
+            self.centroids = _spherical_kmeans(vecs, k, self.iters, self.seed)
+        nlists = len(self.centroids) if self.trained else 1
+        self._reset_lists(nlists)
+        assign = _assign(vecs, self.centroids) if self.trained else np.zeros(n, dtype=np.int32)
+        order = np.argsort(assign, kind="stable")
+        bounds = np.searchsorted(assign[order], np.arange(nlists + 1))
+        for j in range(nlists):
+            sel = order[bounds[j]:bounds[j + 1]]
+            self._ids[j] = ids[sel]
+            self._vecs[j] = vecs[sel]
+        self._where = {int(i): int(a) for i, a in zip(ids, assign)}
+
+    # ---- public API (same surface as EmbeddingMatrix) -------------------------
+    def load(self, ids: Iterable[int], vecs) -> "IVFIndex":
+        ids = np.asarray(list(ids), dtype=np.int64)
+        with self._lock:
+            if len(ids) == 0:
+                self._reset_lists(len(self.centroids) if self.trained else 1)
+                return self
+            vecs = normalize_rows(np.asarray(vecs, dtype=np.float32))
+            if self.dim is not None and vecs.shape[1] != self.dim:
+                self.centroids = None
+            self.dim = vecs.shape[1]
+            self._build(ids, vecs)
+        return self
+
+    def upsert(self, row_id: int, vec) -> bool:
+        vec = np.asarray(vec, dtype=np.float32).reshape(-1)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vec.shape[0]
+                self._reset_lists(1)
+            if vec.shape[0] != self.dim:
+                return False
+            self.remove([row_id])
+            vec = normalize_rows(vec)
+            j = int(np.argmax(self.centroids @ vec)) if self.trained else 0
+            self._pending[j].append((int(row_id), vec))
+            self._where[int(row_id)] = j
+            if not self.trained and len(self._where) >= self._train_threshold():
+                self._build(*self._all())
+        return True
+
+    def remove(self, row_ids: Iterable[int]) -> int:
+        removed = 0
+        with self._lock:
+            for rid in row_ids:
+                j = self._where.pop(int(rid), None)
+                if j is None:
+                    continue
+                self._flush(j)
+                keep = self._ids[j] != int(rid)
+                self._ids[j], self._vecs[j] = self._ids[j][keep], self._vecs[j][keep]
+                removed += 1
+        return removed
+
+    def top_k(self, query, k: int = 1, nprobe: Optional[int] = None) -> List[Tuple[int, float]]:
+        q = normalize_rows(np.asarray(query, dtype=np.float32).reshape(-1))
+        with self._lock:
+            if not self._where or q.shape[0] != self.dim:
+                return []
+            if self.trained:
+                p = min(nprobe or self.nprobe, len(self.centroids))
+                cs = self.centroids @ q
+                probe = np.argpartition(-cs, p - 1)[:p]
+            else:
+                probe = [0]
+            for j in probe:
+                self._flush(j)
+            ids = np.concatenate([self._ids[j] for j in probe])
+            if not len(ids):
+                return []
+            sims = np.concatenate([self._vecs[j] @ q for j in probe])
+        k = min(k, len(sims))
+        idx = np.argpartition(-sims, k - 1)[:k]
+        idx = idx[np.argsort(-sims[idx])]
+        return [(int(ids[i]), float(sims[i])) for i in idx]
+
+    def __len__(self):
+        return len(self._where)
+
+    def stats(self) -> Dict:
+        sizes = [len(self._ids[j]) + len(self._pending[j]) for j in range(len(self._ids))]
+        return {"kind": self.kind, "rows": len(self), "trained": self.trained, "lists": len(sizes),
+                "nprobe": self.nprobe, "largest_list": max(sizes) if sizes else 0}
+
+    # ---- persistence ----------------------------------------------------------
+    def save(self, path, **meta):
+        with self._lock:
+            ids, vecs = self._all()
+            lists = np.asarray([self._where[int(i)] for i in ids], dtype=np.int32)
+            tmp = Path(str(path) + ".tmp.npz")
+            np.savez(tmp, ids=ids, vecs=vecs, lists=lists,
+                     centroids=self.centroids if self.trained else np.empty((0, 0), dtype=np.float32),
+                     params=json.dumps({"nlist": self.nlist, "nprobe": self.nprobe, "iters": self.iters,
+                                        "min_train": self.min_train, "meta": meta}))
+            os.replace(tmp, path)
+
+    @classmethod
+    def load_file(cls, path) -> Tuple["IVFIndex", Dict]:
+        z = np.load(path, allow_pickle=False)
+        params = json.loads(str(z["params"]))
+        meta = params.pop("meta", {})
+        idx = cls(**params)
+        ids, vecs, lists = z["ids"], z["vecs"], z["lists"]
+        idx.dim = vecs.shape[1] if vecs.ndim == 2 and vecs.shape[1] else None
+        if z["centroids"].size:
+            idx.centroids = z["centroids"]
+        nlists = len(idx.centroids) if idx.trained else 1
+        idx._reset_lists(nlists)
+        for j in range(nlists):
+            sel = lists == j
+            idx._ids[j], idx._vecs[j] = ids[sel], vecs[sel]
+        idx._where = {int(i): int(j) for i, j in zip(ids, lists)}
+        return idx, meta
+
+
+def make_index(n_rows: int = 0, kind: Optional[str] = None):
+    """Pick a backend: explicit kind, else ANN_INDEX, where 'auto' switches on ANN_MIN_ROWS."""
+    kind = (kind or ANN_INDEX).lower()
+    if kind == "auto":
+        kind = "ivf" if n_rows >= ANN_MIN_ROWS else "exact"
+    if kind == "ivf":
+        return IVFIndex()
+    return EmbeddingMatrix()
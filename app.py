@@ -12,10 +12,10 @@
 
 from __future__ import annotations
 
-import os, re, json, time, sys
+import os, re, json, time, sys, html
 from pathlib import Path
+from urllib.parse import quote
 from typing import Optional, Dict, Any, Tuple, List
-from difflib import SequenceMatcher
 from collections import deque, Counter
 from datetime import datetime
 from flask import Flask
@@ -29,10 +29,13 @@ if BASE_DIR not in sys.path:
 
 # ✅ Core memory module
 from sqlite_memory import SQLiteMemory as MemoryStore
+# ✅ Lifecycle: singletons are lazy, startup work is registered as boot steps (create_app runs them)
+from lifecycle import Boot, lazy
+BOOT = Boot()
 
 
 # ✅ Flask + environment setup
-from flask import Flask, request, jsonify, send_file, render_template, make_response, Response
+from flask import Flask, request, jsonify, send_file, render_template, make_response, Response, stream_with_context
 from dotenv import load_dotenv
 
 # ✅ Load environment variables
@@ -43,40 +46,43 @@ load_dotenv()
 # ------------------------------
 # Render Disk Debug Check
 # ------------------------------
-print("DEBUG: Files in /data ->", os.listdir("/data") if os.path.exists("/data") else "NO /data DIRECTORY FOUND")
+@BOOT.step("data_dir")
+def _boot_data_dir():
+    print("DEBUG: Files in /data ->", os.listdir("/data") if os.path.exists("/data") else "NO /data DIRECTORY FOUND")
 
 
-memory = MemoryStore()
+memory = lazy(MemoryStore, "memory")
 MODE = "closed_test"
 
+# ✅ Background embedder: /mem/remember + teach store facts now, vectors land a moment later
+from embed_worker import EMBED_WORKER, start_embed_worker, embed_worker_status
+
+@BOOT.step("embed_worker", per_process=True)  # a thread: started in each serving process
+def _boot_embed_worker():
+    if EMBED_WORKER:
+        start_embed_worker(memory)
+
 
 
 # --------------------------------------------------------
 # Closed Test Operations Logger + Decorator
 # (must appear before any @track_activity(...) usage)
 # --------------------------------------------------------
-import threading
 from datetime import datetime
+# ✅ Append-only JSONL logs: one line per event instead of rewriting a JSON array
+from event_log import append_event, get_log, get_sink, read_events, submit_event
 
 ACTIVITY_LOG_FILE = "test_activity_log.json"
-_activity_lock = threading.Lock()
+FEEDBACK_LOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "feedback_log.json")
 
-def _append_json_list(path: str, entry: dict):
-    """Append an entry to a JSON list file (thread-safe)."""
-    try:
-        with _activity_lock:
-            data = []
-            if os.path.exists(path):
-                with open(path, "r", encoding="utf-8") as f:
-                    try:
-                        data = json.load(f) or []
-                    except Exception:
-                        data = []
-            data.append(entry)
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-    except Exception as e:
-        print(f"[ActivityLogError] {e}")
+# ✅ Indexed analytics (per-tester counts, rating histogram, paged feedback) for the admin pages
+from analytics_store import get_analytics
+ANALYTICS = lazy(get_analytics, "analytics")
+
+@BOOT.step("analytics")
+def _boot_analytics():
+    ANALYTICS.backfill("feedback", get_log(FEEDBACK_LOG_FILE).iter())
+    ANALYTICS.backfill("activity", get_log(ACTIVITY_LOG_FILE).iter())
 
 def log_activity(tester: str, route: str, status: str = "success", note: str = ""):
     """Log a single activity event."""
@@ -87,7 +93,11 @@ def log_activity(tester: str, route: str, status: str = "success", note: str = "
         "note": note,
         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
     }
-    _append_json_list(ACTIVITY_LOG_FILE, entry)
+    try:
+        submit_event(ACTIVITY_LOG_FILE, entry)  # queued; the log-sink thread writes it in a batch
+        submit_event(ANALYTICS, entry)
+    except Exception as e:
+        print(f"[ActivityLogError] {e}")
 
 def track_activity(route_name: str):
     """Decorator to log activity for a route."""
@@ -119,75 +129,42 @@ def track_activity(route_name: str):
 # --------------------------------------------------------
 # Auto Memory Sanitization on Startup
 # --------------------------------------------------------
-try:
-    print("[Startup] Running automatic memory sweep...")
-    memory.sanitize_all()
-    print("[Startup] ✅ Memory successfully sanitized at launch.")
-except Exception as e:
-    print(f"[Startup] ⚠️ Auto-sweep failed: {e}")
-
-
-
-# ------------------ AUTO-INTENT + TONE DETECTION ------------------
-import re
-
-def detect_emotion_and_tone(text: str) -> str:
-    """
-    Lightweight tone + intent detector for SoulNode.
-    Analyzes user phrasing and keywords to classify the emotional tone or intent.
-    Returns one of: 'cheeky', 'motivational', 'reflective', 'legacy', 'focus', or None.
-    """
-    if not text:
-        return None
-
-    t = text.lower().strip()
-
-    # Cheeky / playful language
-    if any(x in t for x in ["haha", "lol", "you thought", "funny", "😂", "🤣"]):
-        return "cheeky"
-
-    # Motivational intent
-    if any(x in t for x in ["let's go", "we got this", "i can do this", "stay focused", "rise", "push through"]):
-        return "motivational"
-
-    # Reflective / introspective phrasing
-    if any(x in t for x in ["i feel", "sometimes", "i've been thinking", "why does", "it hurts", "reflecting"]):
-        return "reflective"
+@BOOT.step("sanitize")
+def _boot_sanitize():
+    try:
+        print("[Startup] Running automatic memory sweep...")
+        memory.sanitize_all()
+        print("[Startup] ✅ Memory successfully sanitized at launch.")
+    except Exception as e:
+        print(f"[Startup] ⚠️ Auto-sweep failed: {e}")
 
-    # Legacy / family / purpose tone
-    if any(x in t for x in ["my kids", "my legacy", "for my mom", "for my family", "future", "generation", "purpose"]):
-        return "legacy"
 
-    # Focus / discipline tone
-    if any(x in t for x in ["stay sharp", "focus", "locked in", "no distractions", "grind mode", "beast mode"]):
-        return "focus"
 
-    # If none matched, return None
-    return None
-# ------------------------------------------------------------------
 
 
 
 # ---------------- SoulNode Identity Preload ----------------
-try:
-    preload_data = {
-        "name": "SoulNode",
-        "creator": "Ty Butler",
-        "mission": "To learn, heal, and help build New Chapter Media’s legacy.",
-        "origin": "New Chapter Media Group",
-        "type": "AI co-pilot"
-    }
+@BOOT.step("identity")
+def _boot_identity():
+    try:
+        preload_data = {
+            "name": "SoulNode",
+            "creator": "Ty Butler",
+            "mission": "To learn, heal, and help build New Chapter Media’s legacy.",
+            "origin": "New Chapter Media Group",
+            "type": "AI co-pilot"
+        }
 
-    # Prevent redundant inserts during preload
-    for key, val in preload_data.items():
-        existing = memory.recall("soulnode", key)
-        if not existing:
-            memory.remember("soulnode", key, val)
+        # Prevent redundant inserts during preload
+        for key, val in preload_data.items():
+            existing = memory.recall("soulnode", key)
+            if not existing:
+                memory.remember("soulnode", key, val)
 
-    print("[Identity] ✅ SoulNode identity preloaded into SQLite memory")
+        print("[Identity] ✅ SoulNode identity preloaded into SQLite memory")
 
-except Exception as e:
-    print(f"[Identity] ⚠️ Failed to preload SoulNode identity: {e}")
+    except Exception as e:
+        print(f"[Identity] ⚠️ Failed to preload SoulNode identity: {e}")
 
 
 
@@ -295,14 +272,18 @@ if not OPENAI_API_KEY:
     print("⚠️  Warning: No OPENAI_API_KEY detected — running in local safe mode.")
     OPENAI_API_KEY = "dummy_key_for_local_dev"  # fallback for local dev
 
-# ✅ Initialize OpenAI client (non-blocking)
-try:
-    from openai import OpenAI
-    _openai_client = OpenAI(api_key=OPENAI_API_KEY)
-    print("✅ OpenAI client initialized.")
-except Exception as e:
-    print("⚠️  OpenAI init error:", e)
-    _openai_client = None
+# ✅ Initialize OpenAI client (non-blocking; built — and openai imported — on first use)
+def _make_openai_client():
+    try:
+        from openai import OpenAI
+        c = OpenAI(api_key=OPENAI_API_KEY)
+        print("✅ OpenAI client initialized.")
+        return c
+    except Exception as e:
+        print("⚠️  OpenAI init error:", e)
+        return None
+
+_openai_client = lazy(_make_openai_client, "openai")
 
 
 # ---- Local modules (with safe fallbacks for utils) ----
@@ -333,6 +314,14 @@ _active_tester.name = None
 
 # ✅ Embeddings config
 EMBED_MODEL = "text-embedding-3-small"
+from embed_cache import get_embedding as _cached_embedding, cache_stats as _embed_cache_stats
+from hybrid_retriever import HybridRetriever
+from question_router import Query, Router
+from keyword_matcher import TRIGGERS, scan
+from relation_resolver import RelationResolver
+from context_builder import ContextBuilder
+from gpt_cache import GPT_CACHE, get_response_cache
+from retrieve_pam import PAM_WARMUP, get_pam_retriever, retrieve_pam_answer, warm_pam_retriever
 
 def _norm(s: str) -> str:
     s = s.lower().strip()
@@ -340,15 +329,6 @@ def _norm(s: str) -> str:
     s = re.sub(r"\s+", " ", s)
     return s.strip()
 
-def _cosine(u, v):
-    if not u or not v: return -1.0
-    import math
-    dot = sum(a*b for a, b in zip(u, v))
-    nu = sum(a*a for a in u)
-    nv = sum(b*b for b in v)
-    if nu == 0 or nv == 0: return -1.0
-    return dot / (math.sqrt(nu) * math.sqrt(nv))
-
 def _embed(text: str):
     """Generate embedding vector from OpenAI API with diagnostics."""
     from openai import OpenAI
@@ -361,8 +341,8 @@ def _embed(text: str):
         if not client:
             client = OpenAI(api_key=api_key)
             globals()["_openai_client"] = client
-        resp = client.embeddings.create(model=EMBED_MODEL, input=text)
-        emb = resp.data[0].embedding
+        vec = _cached_embedding(text, EMBED_MODEL, client)
+        emb = vec.tolist() if vec is not None else None
         if emb and len(emb) > 100:
             print(f"[Embed OK] Text='{text}' Vector size={len(emb)}")
             return emb
@@ -374,7 +354,8 @@ def _embed(text: str):
         return None
 
 
-# ✅ Memory file per tester
+# ✅ Sandbox memory per tester: SQLite namespaces (sandbox_store.py), cached between requests.
+# These were the old whole-file JSON stores; each is imported once when its namespace is created.
 TESTER_PROFILES = {
     "tester1": "/data/memory_tester_1.json",
     "tester2": "/data/memory_tester_2.json",
@@ -382,27 +363,13 @@ TESTER_PROFILES = {
     "tester4": "/data/memory_tester_4.json",
 }
 
-def _get_sandbox_path(tester_id: str):
-    tester_id = tester_id.lower().strip()
-    path = TESTER_PROFILES.get(tester_id)
-    if not path:
-        raise ValueError(f"Unknown tester ID: {tester_id}")
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    return path
-
-def _load_sandbox_memory(path: str):
-    if os.path.exists(path):
-        with open(path, "r", encoding="utf-8") as f:
-            raw = json.load(f)
-    else:
-        raw = {}
-    data = raw.get("data", {})
-    index = raw.get("_index", {})
-    return {"data": data, "_index": index}
+from sandbox_store import get_sandbox_store
+
+def _known_sandbox_tester(tester: str) -> bool:
+    # X-Tester-ID / ?tester= are unauthenticated: only registered testers get a namespace
+    return tester in TESTER_PROFILES or TESTERS.get(tester) is not None or TESTER_REGISTRY.get(tester) is not None
 
-def _save_sandbox_memory(path: str, data: dict):
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+SANDBOX = lazy(lambda: get_sandbox_store(legacy_path=TESTER_PROFILES.get, known=_known_sandbox_tester), "sandbox")
 
 @app.before_request
 def _set_active_tester():
@@ -419,11 +386,6 @@ def sandbox_ask():
     """Handles fully isolated sandbox memory per tester with true semantic recall."""
     try:
         tester = _active_tester.name or "tester1"
-        path = _get_sandbox_path(tester)
-        memory_data = _load_sandbox_memory(path)
-        store = memory_data.get("data", {})
-        index = memory_data.get("_index", {})
-
         data = request.get_json(silent=True) or {}
         text = data.get("text", "").strip().lower()
         answer = None
@@ -434,13 +396,7 @@ def sandbox_ask():
             if match:
                 key, value = match.groups()
                 key_norm = _norm(key)
-                store[key_norm] = value
-                emb = _embed(key_norm)
-                if emb:
-                    index[key_norm] = {"embedding": emb}
-                memory_data["data"] = store
-                memory_data["_index"] = index
-                _save_sandbox_memory(path, memory_data)
+                SANDBOX.remember(tester, key_norm, value, _embed(key_norm))  # one-row upsert
                 answer = f"Got it. I’ll remember your {key_norm} is {value}."
             else:
                 answer = "Try saying: 'Remember my car is Tesla.'"
@@ -454,21 +410,12 @@ def sandbox_ask():
             ).replace("my ", "").replace("the ", ""))
 
             # Direct hit
-            if key_guess in store:
-                answer = store[key_guess]
-            else:
-                # Semantic check
-                q_emb = _embed(key_guess)
-                if q_emb and index:
-                    best_key, best_score = None, -1.0
-                    for k, meta in index.items():
-                        emb = meta.get("embedding")
-                        if emb:
-                            score = _cosine(q_emb, emb)
-                            if score > best_score:
-                                best_key, best_score = k, score
-                    if best_key and best_score >= 0.78:
-                        answer = store[best_key]
+            answer = SANDBOX.recall(tester, key_guess)
+            if answer is None and SANDBOX.vectors(tester):
+                # Semantic check: one mat-vec product over the tester's cached matrix
+                hit = SANDBOX.nearest(tester, _embed(key_guess), min_score=0.78)
+                if hit:
+                    answer = hit[1]
 
             if not answer:
                 answer = f"I don’t know your {key_guess} yet."
@@ -569,26 +516,33 @@ _CREATOR_WORDS = {"created","built","made","developed","invented","creator","fou
 _CREATOR_NAMES = {"ty","ty butler","ncmg","butler","openai"}
 _ID_PURPOSE = {"purpose","role","job","mission","why are you here","why do you exist","what do you do"}
 
+TRIGGERS.register("identity", {
+    "who": ["who are you","what are you","tell me about yourself","your name","what is your name","what's your name"],
+    "name": ["name"],
+    "purpose": sorted(_ID_PURPOSE),
+    "creator": ["who created you","who made you","who developed you","you were created by","if ty built you",
+                "if ty created you"] + sorted(_CREATOR_WORDS) + sorted(_CREATOR_NAMES),
+    "hometown": ["your hometown"],
+})
+
 def identity_answer(text: str) -> Optional[str]:
-    t = (text or "").lower().replace("’","'").strip()
-    if any(p in t for p in ("who are you","what are you","tell me about yourself","your name","what is your name","what's your name")):
-        if "name" in t:
+    hits = scan((text or "").replace("’","'").strip())
+    if hits.has("identity", "who"):
+        if hits.has("identity", "name"):
             return f"My name is {IDENTITY['name']}."
         return f"I’m {IDENTITY['name']}, created by {IDENTITY['creators']}. My mission is {IDENTITY['mission']}"
-    if any(p in t for p in _ID_PURPOSE):
+    if hits.has("identity", "purpose"):
         return f"My mission is {IDENTITY['mission']}"
-    if "who created you" in t or "who made you" in t or "who developed you" in t \
-       or any(w in t for w in _CREATOR_WORDS) or any(n in t for n in _CREATOR_NAMES) \
-       or "you were created by" in t or "if ty built you" in t or "if ty created you" in t:
+    if hits.has("identity", "creator"):
         return f"I was created by {IDENTITY['creators']}."
-    if "your hometown" in t:
+    if hits.has("identity", "hometown"):
         return "I don’t have a hometown — I’m software. My mission is steady, helpful memory for Pam."
     return None
 
 # -------------------------------------------------------------------------------------------
 # Memory store + helpers (no dependency on store.search)
 # -------------------------------------------------------------------------------------------
-store = MemoryStore()
+store = lazy(MemoryStore, "store")
 
 REL_ALIASES: Dict[str, str] = {
     # names
@@ -612,15 +566,15 @@ _CANON_REL = {
     "pets","schools","meds","allergies","doctor","emergency contact","phone","church","middle name",
 }
 
+# alias map + trigram index + memo; also learns every relation already in the facts table
+RELATIONS = RelationResolver(_CANON_REL, REL_ALIASES)
+
+@BOOT.step("relations")
+def _boot_relations():
+    RELATIONS.learn_from(store)
+
 def _best_rel_match(r: str) -> str:
-    r = (r or "").strip().lower().replace("_"," ")
-    r = REL_ALIASES.get(r, r)
-    if r in _CANON_REL: return r
-    best, score = r, 0.0
-    for cand in _CANON_REL.union(set(REL_ALIASES.values())):
-        s = SequenceMatcher(None, r, cand).ratio()
-        if s > score: best, score = cand, s
-    return best if score >= 0.68 else r
+    return RELATIONS.resolve(r)
 
 def _norm_sub(s: str) -> str:
     s = (s or "").strip().lower()
@@ -633,6 +587,26 @@ def mem_recall(sub: str, rel: str) -> Optional[str]:
     except Exception:
         return None
 
+def mem_remember(sub: str, rel: str, val: str) -> None:
+    rel = _best_rel_match(rel)
+    store.remember(_norm_sub(sub), rel, str(val))
+    RELATIONS.observe(rel)
+
+def _norm_triples(triples) -> List[Tuple[str, str, str]]:
+    rows = [(_norm_sub(s), _best_rel_match(r), str(v)) for s, r, v in triples]
+    for _, r, _ in rows:
+        RELATIONS.observe(r)
+    return rows
+
+def mem_remember_many(triples: List[Tuple[str, str, str]]) -> Dict[str, Any]:
+    """Bulk teach/import/preload: one batched embedding pass + one transaction."""
+    rows = _norm_triples(triples)
+    if hasattr(store, "remember_many"):
+        return store.remember_many(rows)
+    for s, r, v in rows:
+        store.remember(s, r, v)
+    return {"facts": len(rows)}
+
 def mem_forget(sub: str, rel: str) -> bool:
     try:
         ok = bool(store.forget(_norm_sub(sub), _best_rel_match(rel)))
@@ -645,44 +619,47 @@ def mem_forget(sub: str, rel: str) -> bool:
 
 # -------------------------------------------------------------------------------------------
 # Preload: memory_store.json (any shape), pam_facts_flat.json, pam_facts_flat.json
+# Loaders only parse; store.sync_file fingerprints each file and imports only what changed.
 # -------------------------------------------------------------------------------------------
-def _load_memory_store_json(p: Path) -> int:
-    if not p.exists(): return 0
+Triple = Tuple[str, str, str]
+
+def _load_memory_store_json(p: Path) -> List[Triple]:
+    if not p.exists(): return []
     try:
         raw = json.loads(p.read_text(encoding="utf-8"))
     except Exception as e:
         print("[MemoryStore] Failed to load", p.name, ":", e)
-        return 0
+        return []
 
-    added = 0
+    out: List[Triple] = []
     try:
         if isinstance(raw, dict):
             # dict-of-dicts {sub: {rel: val}}
             for sub, rels in raw.items():
                 if not isinstance(rels, dict): continue
                 for rel, val in rels.items():
-                    mem_remember(str(sub), str(rel), str(val)); added += 1
+                    out.append((str(sub), str(rel), str(val)))
         elif isinstance(raw, list):
             # list of triples/objs
             for item in raw:
                 if isinstance(item, dict) and all(k in item for k in ("sub","rel","val")):
-                    mem_remember(item["sub"], item["rel"], item["val"]); added += 1
+                    out.append((str(item["sub"]), str(item["rel"]), str(item["val"])))
                 elif isinstance(item, (list, tuple)) and len(item) >= 3:
                     sub, rel, val = item[0], item[1], item[2]
-                    mem_remember(str(sub), str(rel), str(val)); added += 1
+                    out.append((str(sub), str(rel), str(val)))
         else:
             print("[MemoryStore] Unsupported JSON shape in", p.name)
     except Exception as e:
         print("[MemoryStore] Ingest error:", e)
 
-    return added
+    return out
 
-def _load_pam_flat(p: Path) -> int:
-    if not p.exists(): return 0
+def _load_pam_flat(p: Path) -> List[Triple]:
+    if not p.exists(): return []
     try:
         doc = json.loads(p.read_text(encoding="utf-8"))
     except Exception as e:
-        print("[pam_facts_flat] load error:", e); return 0
+        print("[pam_facts_flat] load error:", e); return []
 
     facts = []
     if isinstance(doc, dict) and isinstance(doc.get("facts"), list):
@@ -690,33 +667,33 @@ def _load_pam_flat(p: Path) -> int:
     elif isinstance(doc, list):
         facts = doc
     else:
-        print("[pam_facts_flat] unexpected shape; expected list or {'facts': [...]}"); return 0
+        print("[pam_facts_flat] unexpected shape; expected list or {'facts': [...]}"); return []
 
-    added = 0
+    out: List[Triple] = []
     for item in facts:
         if not isinstance(item, dict): continue
         sub = str(item.get("sub","pam")).strip() or "pam"
         rel = str(item.get("rel","")).strip()
         val = str(item.get("val","")).strip()
         if rel and val:
-            mem_remember(sub, rel, val); added += 1
-    return added
+            out.append((sub, rel, val))
+    return out
 
 # rename this function:
-def _load_pam_txt_file(p: Path) -> int:
+def _load_pam_txt_file(p: Path) -> List[Triple]:
     if not (p and p.exists() and _load_pam_txt): 
-        return 0
+        return []
     try:
         facts = _load_pam_txt(p) # this now refers to the imported loader
     except Exception as e:
-        print("pam_facts_flat.json parse error:", e); return 0
-    added = 0
+        print("pam_facts_flat.json parse error:", e); return []
+    out: List[Triple] = []
     if isinstance(facts, dict):
         for rel, val in facts.items():
             if not str(val).strip(): 
                 continue
-            mem_remember("pam", str(rel), str(val)); added += 1
-    return added
+            out.append(("pam", str(rel), str(val)))
+    return out
 # ✅ Define the memory store file paths before using them
 from pathlib import Path
 
@@ -725,16 +702,37 @@ SESSION_FILE = Path("/data/session_store.json")
 PAM_JSON = Path("/data/pam_facts_flat.json")
 PAM_TXT = Path("/data/pam.txt")
 
+PRELOAD_SOURCES = [
+    (MEM_FILE, _load_memory_store_json),
+    (SESSION_FILE, _load_memory_store_json),
+    (PAM_JSON, _load_pam_flat),
+    (PAM_TXT, _load_pam_txt_file),
+]
+PRELOAD_STATUS: List[Dict[str, Any]] = []
+
+def preload_sources() -> List[Dict[str, Any]]:
+    """Idempotent preload: a file whose fingerprint (size, mtime, sha256) matches the last boot is
+    skipped; a changed one is row-diffed, so only new facts are embedded."""
+    results = []
+    for path, loader in PRELOAD_SOURCES:
+        try:
+            if hasattr(store, "sync_file"):
+                res = store.sync_file(str(path), lambda p, load=loader: _norm_triples(load(Path(p))))
+            else:
+                res = {"source": path.name, "status": "synced", **mem_remember_many(loader(path))}
+        except Exception as e:
+            print(f"[Startup Error] Preload of {path.name} failed: {e}")
+            res = {"source": path.name, "status": "error", "error": str(e)}
+        results.append(res)
+    PRELOAD_STATUS[:] = results
+    return results
+
 # ✅ Preload memory safely
-try:
-    pre_added = 0
-    pre_added += _load_memory_store_json(MEM_FILE)
-    pre_added += _load_memory_store_json(SESSION_FILE)
-    pre_added += _load_pam_flat(PAM_JSON)
-    pre_added += _load_pam_txt_file(PAM_TXT)
-    print(f"[app] ✅ Preloaded facts into memory: {pre_added}")
-except Exception as e:
-    print(f"[Startup Error] Memory preload failed: {e}")
+@BOOT.step("preload")
+def _boot_preload():
+    res = preload_sources()
+    summary = ", ".join(f"{r['source']}={r['status']}" for r in res)
+    print(f"[app] ✅ Preload: {summary} (+{sum(r.get('added', 0) for r in res)} facts)")
 
 
 # -------------------------------------------------------------------------------------------
@@ -851,6 +849,8 @@ _REL_KEYWORDS: Tuple[Tuple[set, str], ...] = (
     ({"doctor","doc","physician"}, "doctor"),
 )
 
+TRIGGERS.register("relation", {rel: kws for kws, rel in _REL_KEYWORDS})
+
 def _format_memory_sentence(sub: str, rel: str, val: str) -> str:
     s = _norm_sub(sub).title(); r = _best_rel_match(rel); v = str(val)
     if r == "mom": return f"{v} is {s}'s mom."
@@ -872,54 +872,40 @@ def _summary_about(sub: str) -> Optional[str]:
             else: parts.append(f"{f.title()}: {v}")
     return ("; ".join(parts) + ".") if parts else None
 
-def loose_recall(text: str, profile: str) -> Optional[Dict[str, str]]:
-    global _last_q_rel
-    t = (text or "").lower().replace("’","'").strip()
-    if not t: return None
+def _recall_keys(t: str, profile: str) -> List[Tuple[str, str]]:
+    """(subject, relation) keys a question names, most specific first."""
+    keys: List[Tuple[str, str]] = []
 
     # Possessive: "pam's hometown?" / "her hometown?"
     m = re.search(r"\b([a-z]+)(?:'s|’s)\s+(.+?)\??$", t)
     if m:
-        subj_tok = resolve_subject_token(m.group(1), profile)
-        rel = _best_rel_match(m.group(2))
-        v = mem_recall(subj_tok, rel)
-        if v:
-            _last_q_rel = (subj_tok, rel)
-            return {"ok": True, "source": "memory", "response": _format_memory_sentence(subj_tok, rel, v)}
+        keys.append((resolve_subject_token(m.group(1), profile), _best_rel_match(m.group(2))))
 
     # "my hometown?" / "my doctor?" etc
     m2 = re.search(r"^my\s+(.+?)\??$", t)
     if m2:
-        subj = resolve_profile_subject(profile)
-        rel = _best_rel_match(m2.group(1))
-        v = mem_recall(subj, rel)
-        if v:
-            _last_q_rel = (subj, rel)
-            return {"ok": True, "source": "memory", "response": _format_memory_sentence(subj, rel, v)}
+        keys.append((resolve_profile_subject(profile), _best_rel_match(m2.group(1))))
 
     # “what’s her hometown” / “where was she born”
     m3 = re.search(r"^(?:what(?:'s| is)|where(?:'s| is)?|where)\s+(?:her|she)\s+(.+?)\??$", t)
     if m3:
-        subj = "pam"
-        rel = _best_rel_match(m3.group(1))
-        v = mem_recall(subj, rel)
-        if v:
-            _last_q_rel = (subj, rel)
-            return {"ok": True, "source": "memory", "response": _format_memory_sentence(subj, rel, v)}
+        keys.append(("pam", _best_rel_match(m3.group(1))))
 
     # “where was pam born” / “what’s pam’s hometown”
     if "pam" in t:
-        for keys, rel in _REL_KEYWORDS:
-            if any(k in t for k in keys):
-                v = mem_recall("pam", rel)
-                if v:
-                    _last_q_rel = ("pam", rel)
-                    return {"ok": True, "source": "memory", "response": _format_memory_sentence("pam", rel, v)}
-        if any(p in t for p in ["tell me something about pam","something about pam","about pam","who is pam"]):
-            s = _summary_about("pam")
-            if s:
-                _last_q_rel = ("pam","summary")
-                return {"ok": True, "source": "memory", "response": s}
+        hits = scan(t)
+        for _, rel in _REL_KEYWORDS:
+            if hits.has("relation", rel):
+                keys.append(("pam", rel))
+    return keys
+
+def _summary_recall(t: str, profile: str) -> Optional[Dict[str, str]]:
+    global _last_q_rel
+    if "pam" in t and any(p in t for p in ["tell me something about pam","something about pam","about pam","who is pam"]):
+        s = _summary_about("pam")
+        if s:
+            _last_q_rel = ("pam","summary")
+            return {"ok": True, "source": "memory", "response": s}
 
     # Generic: “tell me something about X”
     m4 = re.search(r"(?:tell me.*about|something about)\s+([a-z]+)$", t)
@@ -929,12 +915,71 @@ def loose_recall(text: str, profile: str) -> Optional[Dict[str, str]]:
         if s:
             _last_q_rel = (subj,"summary")
             return {"ok": True, "source": "memory", "response": s}
+    return None
 
+def loose_recall(text: str, profile: str) -> Optional[Dict[str, str]]:
+    global _last_q_rel
+    t = (text or "").lower().replace("’","'").strip()
+    if not t: return None
+    for subj, rel in _recall_keys(t, profile):
+        v = mem_recall(subj, rel)
+        if v:
+            _last_q_rel = (subj, rel)
+            return {"ok": True, "source": "memory", "response": _format_memory_sentence(subj, rel, v)}
+    return _summary_recall(t, profile)
+
+# -------------------------------------------------------------------------------------------
+# Hybrid recall: exact keys + FTS5 + vectors in one call (see hybrid_retriever.py)
+# -------------------------------------------------------------------------------------------
+def _exact_fact_source(q: str, k: int, ctx: Dict[str, Any]) -> List[Tuple[int, str, str, str, float]]:
+    t = (q or "").lower().replace("’","'").strip()
+    rows: List[Tuple[int, str, str, str, float]] = []
+    for subj, rel in _recall_keys(t, ctx.get("profile", "ty")):
+        rows += [(*r, 1.0) for r in store.recall_rows(subj, rel)]
+    return rows[:k]
+
+RECALL = HybridRetriever(store)
+RECALL.add_source("exact", _exact_fact_source, weight=2.0, confident=lambda q, row: True, decisive=True)
+CONTEXT = ContextBuilder(store, RECALL, model=OPENAI_MODEL)
+
+def _subject_in_query(sub: str, t: str, profile: str) -> bool:
+    # a lexical/vector hit about someone the question never mentions is not an answer
+    words = re.findall(r"[a-z]+", t)
+    return sub in words or any(resolve_subject_token(w, profile) == sub for w in words if w in PRONOUNS)
+
+def memory_answer(text: str, profile: str) -> Optional[Dict[str, Any]]:
+    global _last_q_rel
+    t = (text or "").lower().replace("’","'").strip()
+    if not t: return None
+    res = RECALL.retrieve(t, k=3, profile=profile)
+    for hit in res["hits"]:
+        if not hit["confident"]:
+            break
+        sub, rel = hit["subject"], hit["relation"]
+        if "exact" not in hit["provenance"] and not _subject_in_query(sub, t, profile):
+            continue
+        _last_q_rel = (sub, rel)
+        return {"ok": True, "source": "memory", "response": _format_memory_sentence(sub, rel, hit["value"]),
+                "score": hit["score"], "provenance": hit["provenance"], "retrieval_ms": res["ms"]}
     return None
 
 # -------------------------------------------------------------------------------------------
 # Pam retrieval/summary (AFTER memory, BEFORE GPT)
 # -------------------------------------------------------------------------------------------
+def pam_story(q: str) -> Optional[str]:
+    """Semantic snippet from data/pam.txt via the process-wide PamRetriever (built on first use)."""
+    t = (q or "").lower()
+    if not any(w in t for w in ("pam", "mom", "mother")): return None
+    try:
+        return retrieve_pam_answer(get_pam_retriever(), q)
+    except Exception as e:
+        print("pam story error:", e); return None
+
+@BOOT.step("pam_warmup", per_process=True)
+def _boot_pam_warmup():
+    if PAM_WARMUP:
+        warm_pam_retriever()
+
 def pam_retrieve(q: str) -> Optional[str]:
     try:
         if "pam" not in (q or "").lower(): return None
@@ -947,29 +992,38 @@ def pam_retrieve(q: str) -> Optional[str]:
 # -------------------------------------------------------------------------------------------
 # GPT fallback (guarded)
 # -------------------------------------------------------------------------------------------
-def gpt_answer(prompt: str) -> Optional[str]:
+GPT_SYSTEM = (
+    "You are SoNo. Be concise, steady, kind. "
+    "Never contradict explicit identity or memory facts. "
+    "If unsure, say you’re not sure."
+)
+# repeat questions (same model / system prompt / memory generation / profile) skip the API
+GPT_RESPONSES = lazy(lambda: get_response_cache(embedder=lambda t: _cached_embedding(t, EMBED_MODEL, _openai_client)),
+                     "gpt_responses")
+
+def _gpt_scope(system: str, profile: str) -> Optional[str]:
+    if not GPT_CACHE: return None
+    return GPT_RESPONSES.scope_key(OPENAI_MODEL, system, store.generation(), profile)
+
+def gpt_answer(prompt: str, profile: str = "ty") -> Optional[str]:
     if not _openai_client: return None
-    try:
-        # memory guard: add known facts as “context” (light)
-        context = []
-        for sub in ("pam","ty"):
-            facts = store.export().get(sub, {}) if hasattr(store, "export") else {}
-            if isinstance(facts, dict):
-                context.append(f"{sub}: " + "; ".join(f"{k}={v}" for k,v in facts.items()))
-        sys = (
-            "You are SoNo. Be concise, steady, kind. "
-            "Never contradict explicit identity or memory facts. "
-            "If unsure, say you’re not sure."
-        )
-        msgs = [{"role":"system","content":sys}]
-        if context:
-            msgs.append({"role":"system","content":"Known facts:\n" + "\n".join(context)})
+    def _ask() -> Optional[str]:
+        # memory guard: relevant facts + cached subject digests, capped at CONTEXT_TOKENS
+        context = CONTEXT.build(prompt, profile=profile)
+        msgs = [{"role":"system","content":GPT_SYSTEM}]
+        if context["text"]:
+            msgs.append({"role":"system","content":"Known facts:\n" + context["text"]})
         msgs.append({"role":"user","content":prompt})
 
         resp = _openai_client.chat.completions.create(
             model=OPENAI_MODEL, temperature=0.2, max_tokens=350, messages=msgs
         )
         return (resp.choices[0].message.content or "").strip()
+    try:
+        scope = _gpt_scope(GPT_SYSTEM, profile)
+        if scope is None:
+            return _ask()
+        return GPT_RESPONSES.cached(prompt, scope, _ask)[0]
     except Exception as e:
         print("GPT error:", e); return None
 
@@ -985,6 +1039,58 @@ def record_event(q: str, response: str, source: str, ms: float):
 # -------------------------------------------------------------------------------------------
 # Main handler
 # -------------------------------------------------------------------------------------------
+# -------------------------------------------------------------------------------------------
+# Routing stages (question_router.py): the text is normalized once into a Query; gates read
+# the one cached keyword_matcher scan of it, so misses skip straight to GPT.
+# -------------------------------------------------------------------------------------------
+TRIGGERS.register("route", {"summary": ["about", "who is pam"], "pam": ["pam"], "family": ["pam", "mom", "mother"]})
+# TEACH_CMD verbs, or the " is / = / to " / "born in" shapes every DECL_RXES pattern needs
+_TEACH_GATE = re.compile(r"^(?:\S+[,:\- ]+)?(?:remember|set|save|update|teach|learn)\s|\s(?:is|=|to)\s|born\s+in|birth\s*place")
+
+def _identity_gate(q: Query) -> bool:
+    # a bare "name" only matters next to a "who are you" phrase
+    return any(tag != "name" for tag in scan(q.lower).tags("identity"))
+
+def _stage_identity(q: Query) -> Optional[Dict[str, Any]]:
+    ident = identity_answer(q.lower)
+    if ident:
+        _save_memory(store, "query", "identity", q.text)
+        return {"ok": True, "source": "identity", "response": ident}
+    return None
+
+def _stage_teach(q: Query) -> Optional[Dict[str, Any]]:
+    profile = q.ctx.get("profile", "ty")
+    taught = try_teach_command(q.text, profile) or try_teach_natural(q.text, profile)
+    return {"ok": True, "source": "teach", "response": taught} if taught else None
+
+def _stage_memory(q: Query) -> Optional[Dict[str, Any]]:
+    # one hybrid lookup (exact keys + FTS5 + vectors, fused)
+    return memory_answer(q.lower, q.ctx.get("profile", "ty"))
+
+def _stage_summary(q: Query) -> Optional[Dict[str, Any]]:
+    return _summary_recall(q.lower, q.ctx.get("profile", "ty"))
+
+def _stage_pam_story(q: Query) -> Optional[Dict[str, Any]]:
+    story = pam_story(q.text)
+    return {"ok": True, "source": "pam.txt", "response": story} if story else None
+
+def _stage_pam_summary(q: Query) -> Optional[Dict[str, Any]]:
+    pr = pam_retrieve(q.lower)
+    return {"ok": True, "source": "pam_facts_flat.json", "response": pr} if pr else None
+
+def _stage_gpt(q: Query) -> Optional[Dict[str, Any]]:
+    g = gpt_answer(q.text, q.ctx.get("profile", "ty"))
+    return {"ok": True, "source": "gpt", "response": g} if g else None
+
+ROUTER = Router()
+ROUTER.register("identity", _stage_identity, gate=_identity_gate)
+ROUTER.register("teach", _stage_teach, gate=_TEACH_GATE)
+ROUTER.register("memory", _stage_memory)
+ROUTER.register("summary", _stage_summary, gate=lambda q: scan(q.lower).has("route", "summary"))
+ROUTER.register("pam_story", _stage_pam_story, gate=lambda q: scan(q.lower).has("route", "family"))
+ROUTER.register("pam_summary", _stage_pam_summary, gate=lambda q: scan(q.lower).has("route", "pam"))
+ROUTER.register("gpt", _stage_gpt)
+
 def handle_question(text: str, profile: str="ty") -> Dict[str, Any]:
     try:
         q = (text or "").strip()
@@ -992,33 +1098,10 @@ def handle_question(text: str, profile: str="ty") -> Dict[str, Any]:
             return {"ok": False, "source": "guard", "response": "Type something first."}
         if len(q) > 4000:
             return {"ok": False, "source": "guard", "response": "Too long. Keep it under 4000 chars."}
-                
-
-        # 1) Identity
-        ident = identity_answer(q)
-        if ident:
-            _save_memory(store, "query", "identity", q)
-            return {"ok": True, "source": "identity", "response": ident}
-
-        # 2) Teach
-        taught = try_teach_command(q, profile) or try_teach_natural(q, profile)
-        if taught:
-            return {"ok": True, "source": "teach", "response": taught}
-
-        # 3) Memory-first recall
-        mem = loose_recall(q, profile)
-        if mem:
-            return mem
-
-        # 4) Pam retrieval/summary
-        pr = pam_retrieve(q)
-        if pr:
-            return {"ok": True, "source": "pam_facts_flat.json", "response": pr}
-
-        # 5) GPT fallback (optional)
-        g = gpt_answer(q)
-        if g:
-            return {"ok": True, "source": "gpt", "response": g}
+
+        res = ROUTER.route(q, profile=profile)
+        if res:
+            return res
 
         # Unknown
         _log_unknown_input(q)
@@ -1028,24 +1111,29 @@ def handle_question(text: str, profile: str="ty") -> Dict[str, Any]:
         }
     except Exception as e:
         return {"ok": False, "source": "error", "response": f"Handler error: {e.__class__.__name__}"}
-    
+
+@app.route("/route/stats", methods=["GET"])
+def route_stats():
+    """Per-stage routing stats (calls, hits, gate skips, average latency) + GPT response cache."""
+    return jsonify({"ok": True, "stages": ROUTER.stats(), "gpt_cache": GPT_RESPONSES.stats()})
+
     # ----------------- Emotion & Tone Engine (SoulNode Personality) -----------------
 import random
 
+_TONE_TRIGGERS = {
+    "reflective": ["sad", "tired", "drained", "alone", "hurt", "lost", "down"],
+    "motivational": ["happy", "excited", "great", "love", "thank", "joy", "peace"],
+    "legacy": ["legacy", "dad", "kids", "escalade", "mission", "family"],
+    "focus": ["build", "code", "fix", "test", "focus", "deploy"],
+    "cheeky": ["bro", "fam", "man", "lol", "haha", "wild", "crazy"],
+}
+TRIGGERS.register("tone", _TONE_TRIGGERS)
+
 def detect_emotion_and_tone(text: str) -> str:
     """Lightweight mood detector + SoulNode personality routing."""
-    t = text.lower()
-
-    if any(word in t for word in ["sad", "tired", "drained", "alone", "hurt", "lost", "down"]):
-        return "reflective"
-    elif any(word in t for word in ["happy", "excited", "great", "love", "thank", "joy", "peace"]):
-        return "motivational"
-    elif any(word in t for word in ["legacy", "dad", "kids", "escalade", "mission", "family"]):
-        return "legacy"
-    elif any(word in t for word in ["build", "code", "fix", "test", "focus", "deploy"]):
-        return "focus"
-    elif any(word in t for word in ["bro", "fam", "man", "lol", "haha", "wild", "crazy"]):
-        return "cheeky"
+    tone = scan(text).first_tag("tone", list(_TONE_TRIGGERS))
+    if tone:
+        return tone
 
     # 10–15% chance to go cheeky for style
     if random.random() < 0.15:
@@ -1090,11 +1178,13 @@ def mem_import():
     if not isinstance(mem, dict):
         return jsonify({"ok": False, "error": "Provide JSON {\"memory\": {...}}"}), 400
     try:
-        for sub, rels in mem.items():
-            if not isinstance(rels, dict): continue
-            for rel, val in rels.items():
-                mem_remember(sub, rel, str(val))
-        return jsonify({"ok": True, "imported": sum(len(v) for v in mem.values())})
+        triples = [
+            (sub, rel, str(val))
+            for sub, rels in mem.items() if isinstance(rels, dict)
+            for rel, val in rels.items()
+        ]
+        stats = mem_remember_many(triples)
+        return jsonify({"ok": True, "imported": len(triples), "stats": stats})
     except Exception as e:
         return jsonify({"ok": False, "error": f"Import failed: {e}"}), 500
 
@@ -1123,8 +1213,8 @@ def tests_smoke():
     passed = sum(1 for r in results if r["ok"])
     return jsonify({"ok": True, "passed": passed, "total": len(results), "results": results})
 
-@app.route("/mem/remember", methods=["POST"])
-def mem_remember():
+@app.route("/mem/remember", methods=["POST"], endpoint="mem_remember")
+def mem_remember_route():
     """Add or update a memory fact in SQLite."""
     try:
         data = request.get_json(force=True)
@@ -1165,120 +1255,184 @@ EMOTION_RESPONSES = {
 
 # --------------------------------------------------------
 # ---------- AUTO INTENT + PERSONALITY + PERSISTENCE ----------
-@app.route("/ask", methods=["POST"])
-def ask():
-    try:
-        data = request.get_json(silent=True)
-        text = data.get("text", "").strip()
-        answer = None  # ✅ initialize early to avoid 'unbound variable'
-
-        if not text:
-            return jsonify({"ok": False, "error": "Missing text"}), 400
-
-        # ----- INTENT DETECTION -----
-        lower = text.lower()
-        intent = None
-        subj, rel, val = None, None, None
-
-        # --- INTENT PARSING ---
-        intent = None
-
-        # 🔹 REMEMBER intent
-        if lower.startswith("remember"):
-            intent = "remember"
-            # Handle flexible grammar: is / are / was / were
-            body = lower.replace("remember", "", 1).strip()
-            parts = re.split(r"\b(is|are|was|were)\b", body, maxsplit=1)
-            if len(parts) >= 3:
-                left = parts[0].replace("that", "").replace("my", "").strip()
-                val = parts[2].strip()
-                subj = "ty"
-                rel = left
-                print(f"[ASK ROUTE] Entered remember branch: subj={subj}, rel={rel}, val={val}")
-
-        # 🔹 RECALL intent (handles natural variants)
-        elif any(lower.startswith(p) for p in [
-            "what is", "whats", "what’s", "what was",
-            "who is", "who are", "who’s", "who was",
-            "tell me", "do you know", "what are"
-        ]):
-            intent = "recall"
-            body = re.sub(r"^(what( is|’s|s)?|who( is|’s|s| are)?|tell me|do you know|what are)", "", lower).strip()
-            rel = body.replace("my", "").replace("the", "").strip()
+ASK_SYSTEM = "You are SoulNode, Ty Butler’s AI co-pilot. Respond briefly and conversationally."
+
+def _ask_messages(text: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": ASK_SYSTEM},
+        {"role": "user", "content": text},
+    ]
+
+def _ask_local(text: str) -> Optional[Any]:
+    """Remember / recall / fuzzy-recall part of /ask; None means "go to GPT"."""
+    answer = None
+
+    # ----- INTENT DETECTION -----
+    lower = text.lower()
+    intent = None
+    subj, rel, val = None, None, None
+
+    # 🔹 REMEMBER intent
+    if lower.startswith("remember"):
+        intent = "remember"
+        # Handle flexible grammar: is / are / was / were
+        body = lower.replace("remember", "", 1).strip()
+        parts = re.split(r"\b(is|are|was|were)\b", body, maxsplit=1)
+        if len(parts) >= 3:
+            left = parts[0].replace("that", "").replace("my", "").strip()
+            val = parts[2].strip()
             subj = "ty"
+            rel = left
+            print(f"[ASK ROUTE] Entered remember branch: subj={subj}, rel={rel}, val={val}")
+
+    # 🔹 RECALL intent (handles natural variants)
+    elif any(lower.startswith(p) for p in [
+        "what is", "whats", "what’s", "what was",
+        "who is", "who are", "who’s", "who was",
+        "tell me", "do you know", "what are"
+    ]):
+        intent = "recall"
+        body = re.sub(r"^(what( is|’s|s)?|who( is|’s|s| are)?|tell me|do you know|what are)", "", lower).strip()
+        rel = body.replace("my", "").replace("the", "").strip()
+        subj = "ty"
+
+        # Map common words like "kids" to consistent relations
+        if rel in ["kids", "children", "sons", "daughters"]:
+            rel = "kids"
+        print(f"[ASK ROUTE] Entered recall branch: subj={subj}, rel={rel}")
+
+    # 🔹 Fallback
+    else:
+        intent = "general"
 
-            # Map common words like "kids" to consistent relations
-            if rel in ["kids", "children", "sons", "daughters"]:
-                rel = "kids"
-            print(f"[ASK ROUTE] Entered recall branch: subj={subj}, rel={rel}")
-
+        # 🧠 Fuzzy recall logic: closest relation this subject actually has
+        subj = "ty"
+        rel = re.sub(r"[^a-z0-9' ]+", " ", lower).strip()
+        RELATIONS.learn_from(memory)
+        best_match, best_ratio = RELATIONS.match(rel, memory.relations(subj), min_ratio=0.5)
 
-        # 🔹 Fallback
+        if best_match:
+            answer = memory.recall(subj, best_match)
+            print(f"[ASK ROUTE] ✅ Recall matched: {best_match} (ratio {best_ratio:.2f})")
         else:
-            intent = "general"
-            
-                        # 🧠 Fuzzy recall logic
-            from difflib import SequenceMatcher
-
-            possible = list(memory.facts.keys())
-            rels = [r for (s, r) in possible if s == subj]
-
-            best_match = None
-            best_ratio = 0.0
-            for r in rels:
-                ratio = SequenceMatcher(None, rel, r).ratio()
-                if ratio > best_ratio:
-                    best_match = r
-                    best_ratio = ratio
-
-            if best_match and best_ratio > 0.5:
-                answer = memory.get(subj, best_match)
-                print(f"[ASK ROUTE] ✅ Recall matched: {best_match} (ratio {best_ratio:.2f})")
-            else:
-                answer = None
-                print(f"[ASK ROUTE] ⚠️ No strong match for '{rel}' (best={best_match}, ratio={best_ratio:.2f})")
+            print(f"[ASK ROUTE] ⚠️ No strong match for '{rel}' (ratio {best_ratio:.2f})")
 
+    # ----- REMEMBER -----
+    if intent == "remember" and subj and rel and val:
+        memory.remember(subj, rel, val)
+        return f"Got it. I’ll remember your {rel} is {val}."
 
+    # ----- RECALL -----
+    if intent == "recall":
+        answer = memory.search(text)
 
+    return answer or None
 
-        # ----- REMEMBER -----
-        if intent == "remember" and subj and rel and val:
-            memory.remember(subj, rel, val)
+ASK_HINT = "Try saying: 'Remember my dream car is ___' or 'What is my dream car?'"
+
+@app.route("/ask", methods=["POST"])
+def ask():
+    try:
+        data = request.get_json(silent=True)
+        text = data.get("text", "").strip()
 
-            return jsonify({"ok": True, "answer": f"Got it. I’ll remember your {rel} is {val}."})
+        if not text:
+            return jsonify({"ok": False, "error": "Missing text"}), 400
 
-        # ----- RECALL -----
-        if intent == "recall":
-            answer = memory.search(text)
-            if answer:
-                return jsonify({"ok": True, "answer": answer})
+        answer = _ask_local(text)
+        if answer:
+            return jsonify({"ok": True, "answer": answer})
 
         # ----- GPT FALLBACK -----
-        if not answer and _openai_client:
+        if _openai_client:
             print("[Memory] No local recall found — escalating to GPT.")
-            completion = _openai_client.chat.completions.create(
-                model=OPENAI_MODEL,
-                messages=[
-                    {"role": "system", "content": "You are SoulNode, Ty Butler’s AI co-pilot. Respond briefly and conversationally."},
-                    {"role": "user", "content": text},
-                ],
-            )
-            gpt_answer = completion.choices[0].message.content.strip()
-            return jsonify({"ok": True, "answer": gpt_answer})
+            def _ask() -> str:
+                completion = _openai_client.chat.completions.create(
+                    model=OPENAI_MODEL, messages=_ask_messages(text),
+                )
+                return completion.choices[0].message.content.strip()
+            scope = _gpt_scope(ASK_SYSTEM, "ask")
+            gpt_reply, cached = GPT_RESPONSES.cached(text, scope, _ask) if scope else (_ask(), False)
+            return jsonify({"ok": True, "answer": gpt_reply, "cached": cached})
 
         # ----- FINAL FALLBACK -----
-        return jsonify({
-            "ok": False,
-            "answer": "Try saying: 'Remember my dream car is ___' or 'What is my dream car?'"
-        })
+        return jsonify({"ok": False, "answer": ASK_HINT})
 
     except Exception as e:
         print(f"[app] /ask error: {e}")
         return jsonify({"ok": False, "error": str(e)}), 500
 
 
+# ---------- STREAMING /ask (Server-Sent Events) ----------
+# Same answers as /ask, but GPT tokens are flushed as the model produces them:
+#   event: answer  {"answer", "source", "ms"}     local memory / cached GPT answer, one event
+#   event: token   {"t"}                          one GPT delta
+#   event: done    {"ok", "answer", "source", "cached", "ms", "ttft_ms"}
+#   event: error   {"error"}
+def _sse(event: str, payload: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+@app.route("/ask/stream", methods=["POST"])  # POST only: "remember ..." text writes memory
+def ask_stream():
+    # JSON body only: a cross-site <form> can POST urlencoded/text bodies (and a query
+    # string) without a preflight, but it can't send application/json
+    if not request.is_json:
+        return jsonify({"ok": False, "error": "Expected a JSON body"}), 415
+    data = request.get_json(silent=True) or {}
+    text = (data.get("text") or "").strip()
+    if not text:
+        return jsonify({"ok": False, "error": "Missing text"}), 400
+
+    def events():
+        t0 = time.perf_counter()
+        ms = lambda: round((time.perf_counter() - t0) * 1000, 1)
+        try:
+            answer = _ask_local(text)
+            if answer:
+                yield _sse("answer", {"answer": answer, "source": "memory", "ms": ms()})
+                yield _sse("done", {"ok": True, "answer": answer, "source": "memory", "cached": False,
+                                    "ms": ms(), "ttft_ms": ms()})
+                return
+            if not _openai_client:
+                yield _sse("done", {"ok": False, "answer": ASK_HINT, "source": "hint", "cached": False,
+                                    "ms": ms(), "ttft_ms": None})
+                return
+
+            scope = _gpt_scope(ASK_SYSTEM, "ask")
+            hit = GPT_RESPONSES.get(text, scope) if scope else None
+            if hit:
+                yield _sse("answer", {"answer": hit, "source": "gpt", "ms": ms()})
+                yield _sse("done", {"ok": True, "answer": hit, "source": "gpt", "cached": True,
+                                    "ms": ms(), "ttft_ms": ms()})
+                return
+
+            print("[Memory] No local recall found — streaming from GPT.")
+            stream = _openai_client.chat.completions.create(
+                model=OPENAI_MODEL, messages=_ask_messages(text), stream=True,
+            )
+            parts: List[str] = []
+            ttft = None
+            for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                if ttft is None:
+                    ttft = ms()
+                parts.append(delta)
+                yield _sse("token", {"t": delta})
+            full = "".join(parts).strip()
+            if scope and full:
+                GPT_RESPONSES.put(text, full, scope, cost_ms=ms())
+            yield _sse("done", {"ok": bool(full), "answer": full, "source": "gpt", "cached": False,
+                                "ms": ms(), "ttft_ms": ttft})
+        except Exception as e:
+            print(f"[app] /ask/stream error: {e}")
+            yield _sse("error", {"error": str(e)})
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 
-    
 # -------------------------------
 #  Voice / TTS (11Labs)
 # -------------------------------
@@ -1341,6 +1495,8 @@ def mem_status():
 
         last_sweep = getattr(memory, "last_sweep", "N/A")
         write_count = getattr(memory, "write_count", "N/A")
+        pool = memory.pool_stats() if hasattr(memory, "pool_stats") else None
+        embed_cache = _embed_cache_stats()
 
         return jsonify({
             "ok": True,
@@ -1349,7 +1505,11 @@ def mem_status():
                 "facts": total_facts,
                 "write_count": write_count,
                 "last_sweep": last_sweep
-            }
+            },
+            "pool": pool,
+            "embed_cache": embed_cache,
+            "embed_queue": embed_worker_status(),
+            "gpt_context": CONTEXT.stats()
         })
     except Exception as e:
         print(f"[MEM STATUS ERROR] {e}")
@@ -1357,6 +1517,20 @@ def mem_status():
 
 
 
+@app.route("/mem/embed_status", methods=["GET"])
+def mem_embed_status():
+    """Embedding queue depth (facts without a vector yet) and how far behind the worker is."""
+    try:
+        status = embed_worker_status()
+        if not status.get("running"):
+            status["pending"] = memory.pending_embeddings()
+        return jsonify({"ok": True, **status})
+    except Exception as e:
+        print(f"[MEM EMBED STATUS ERROR] {e}")
+        return jsonify({"ok": False, "error": str(e)}), 500
+
+
+
 @app.route("/mem/export", methods=["GET"])
 def mem_export():
     """Export all memory data from SQLite."""
@@ -1396,17 +1570,8 @@ def feedback():
         entry = {"tester": tester, "message": message, "rating": rating, "timestamp": ts}
 
         # --- WRITE TO DISK ---
-        log_path = os.path.join(os.path.dirname(__file__), "feedback_log.json")
-
-        if os.path.exists(log_path):
-            with open(log_path, "r", encoding="utf-8") as f:
-                logs = json.load(f)
-        else:
-            logs = []
-
-        logs.append(entry)
-        with open(log_path, "w", encoding="utf-8") as f:
-            json.dump(logs, f, indent=2)
+        append_event(FEEDBACK_LOG_FILE, entry)
+        ANALYTICS.record_feedback(entry)
 
         print(f"[Feedback] ✅ Logged from {tester} at {ts}")
         return jsonify({"ok": True, "message": "Feedback recorded."})
@@ -1425,34 +1590,11 @@ def tester_feedback():
         message = data.get("message", "")
         rating = data.get("rating", "N/A")
 
-        # --- LOAD REGISTRY ---
-        reg_path = "tester_registry.json"
-        if not os.path.exists(reg_path):
-            return jsonify({"ok": False, "error": "Tester registry not found"}), 404
-        
-        # --- LOAD REGISTRY ---
-        reg_path = "tester_registry.json"
-        if not os.path.exists(reg_path):
+        # --- REGISTRY LOOKUP (cached; reloaded only when the file changes) ---
+        if not TESTER_REGISTRY.exists():
             return jsonify({"ok": False, "error": "Tester registry not found"}), 404
 
-        with open(reg_path, "r", encoding="utf-8") as f:
-            testers = json.load(f)
-
-        # Handle both dict and list formats
-        tester_name = None
-        if isinstance(testers, dict):
-            tester_name = testers.get(key)
-        elif isinstance(testers, list):
-            for t in testers:
-                if t.get("key", "").upper() == key.upper():
-                    tester_name = t.get("name")
-                    break
-
-
-        with open(reg_path, "r", encoding="utf-8") as f:
-            testers = json.load(f)
-
-        tester_name = testers.get(key, None)
+        tester_name = TESTER_REGISTRY.name(key)
         if not tester_name:
             return jsonify({"ok": False, "error": "Invalid tester key"}), 401
 
@@ -1460,16 +1602,8 @@ def tester_feedback():
         entry = {"tester": tester_name, "message": message, "rating": rating, "timestamp": ts}
 
         # --- WRITE TO LOG ---
-        log_path = "feedback_log.json"
-        if os.path.exists(log_path):
-            with open(log_path, "r", encoding="utf-8") as f:
-                logs = json.load(f)
-        else:
-            logs = []
-
-        logs.append(entry)
-        with open(log_path, "w", encoding="utf-8") as f:
-            json.dump(logs, f, indent=2)
+        append_event(FEEDBACK_LOG_FILE, entry)
+        ANALYTICS.record_feedback(entry)
 
         print(f"[Tester Feedback] ✅ Logged from {tester_name} at {ts}")
         return jsonify({"ok": True, "message": f"Feedback recorded from {tester_name}."})
@@ -1483,23 +1617,22 @@ def tester_feedback():
 # --------------------------------------------------------
 import json, os
 from datetime import datetime
+from tester_registry import TesterRegistry
 
 TESTER_LOG_PATH = os.path.join("data", "tester_logs.json")
 MAX_TESTERS = 5
 ADMIN_KEY = "TYADMIN"
+# submissions live in data/tester_logs.jsonl; tester_logs.json only holds the registry
+TESTER_EVENTS = get_log(TESTER_LOG_PATH)
+# key → tester maps, loaded once and reloaded on mtime change; writes are atomic (tmp + os.replace)
+TESTERS = TesterRegistry(TESTER_LOG_PATH, logs_to=TESTER_EVENTS)
+TESTER_REGISTRY = TesterRegistry("tester_registry.json", shape="flat")
 
-# Utility: load tester data
-def load_testers():
-    if os.path.exists(TESTER_LOG_PATH):
-        with open(TESTER_LOG_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"testers": {}, "logs": []}
 
-# Utility: save tester data
-def save_testers(data):
-    os.makedirs(os.path.dirname(TESTER_LOG_PATH), exist_ok=True)
-    with open(TESTER_LOG_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+@BOOT.step("testers")
+def _boot_testers():
+    for registry in (TESTERS, TESTER_REGISTRY):
+        registry.exists()  # first load; also moves "logs" still embedded in tester_logs.json into TESTER_EVENTS
 
 # --------------------------------------------------------
 # Admin Command: Register Tester
@@ -1515,12 +1648,9 @@ def register_tester():
         if admin_key != ADMIN_KEY:
             return jsonify({"ok": False, "error": "Unauthorized"}), 403
 
-        testers = load_testers()
-        if len(testers["testers"]) >= MAX_TESTERS:
+        if not TESTERS.register(key, name, limit=MAX_TESTERS, joined=datetime.now().isoformat()):
             return jsonify({"ok": False, "error": "Tester limit reached"}), 400
 
-        testers["testers"][key] = {"name": name, "joined": datetime.now().isoformat()}
-        save_testers(testers)
         return jsonify({"ok": True, "message": f"Tester '{name}' registered with key {key}."})
     except Exception as e:
         print(f"[TESTER REGISTER ERROR] {e}")
@@ -1537,8 +1667,7 @@ def tester_submit():
         message = data.get("message")
         rating = data.get("rating")
 
-        testers = load_testers()
-        tester_info = testers["testers"].get(key)
+        tester_info = TESTERS.get(key)
         if not tester_info:
             return jsonify({"ok": False, "error": "Invalid tester key"}), 403
 
@@ -1549,8 +1678,7 @@ def tester_submit():
             "rating": rating,
             "timestamp": datetime.now().isoformat()
         }
-        testers["logs"].append(log_entry)
-        save_testers(testers)
+        TESTER_EVENTS.append(log_entry)
 
         return jsonify({"ok": True, "message": "Tester feedback logged successfully."})
     except Exception as e:
@@ -1567,8 +1695,8 @@ def tester_logs():
         if admin_key != ADMIN_KEY:
             return jsonify({"ok": False, "error": "Unauthorized"}), 403
 
-        testers = load_testers()
-        return jsonify({"ok": True, "logs": testers["logs"], "testers": testers["testers"]})
+        testers = TESTERS.all()
+        return jsonify({"ok": True, "logs": TESTER_EVENTS.read(), "testers": testers})
     except Exception as e:
         print(f"[TESTER LOGS ERROR] {e}")
         return jsonify({"ok": False, "error": str(e)}), 500
@@ -1586,27 +1714,7 @@ def tester_logs():
 def admin_test_status():
     """Return summary of all feedback entries and tester activity (clean JSON)."""
     try:
-        feedback_log = []
-        if os.path.exists("feedback_log.json"):
-            with open("feedback_log.json", "r", encoding="utf-8") as f:
-                feedback_log = json.load(f)
-
-        total_feedback = len(feedback_log)
-        testers = {}
-        latest_entry = None
-
-        if feedback_log:
-            latest_entry = feedback_log[-1]
-            for entry in feedback_log:
-                name = entry.get("tester", "Unknown")
-                testers[name] = testers.get(name, 0) + 1
-
-        summary_data = {
-            "total_testers": len(testers),
-            "total_feedback": total_feedback,
-            "tester_activity": testers,
-            "latest_entry": latest_entry
-        }
+        summary_data = ANALYTICS.summary()  # incrementally maintained aggregates, no log scan
 
         response = jsonify({
             "ok": True,
@@ -1624,28 +1732,44 @@ def admin_test_status():
 # --------------------------------------------------------
 @app.route("/admin/dashboard", methods=["GET"])
 def admin_dashboard():
-    """Simple HTML dashboard to view feedback logs and tester stats."""
-    feedback_path = Path("feedback_log.json")
-    if not feedback_path.exists():
+    """Paginated HTML dashboard: tester stats + one page of feedback (newest first).
+    Query: ?page=1&per_page=50&tester=<name>"""
+    tester = request.args.get("tester") or None
+    try:
+        page = int(request.args.get("page", 1))
+        per_page = int(request.args.get("per_page", 50))
+    except ValueError:
+        page, per_page = 1, 50
+    summary = ANALYTICS.summary()
+    if not summary["total_feedback"]:
         return "<h2>No feedback data yet.</h2>"
-
-    # Load feedback log
-    with open(feedback_path, "r", encoding="utf-8") as f:
-        logs = json.load(f)
-
-    # Build table
-    rows = ""
-    for entry in reversed(logs):  # newest first
-        rows += f"""
-        <tr>
-            <td>{entry.get('tester')}</td>
-            <td>{entry.get('message')}</td>
-            <td>{entry.get('rating')}</td>
-            <td>{entry.get('timestamp')}</td>
-        </tr>
-        """
-
-    html = f"""
+    data = ANALYTICS.feedback_page(page, per_page, tester)
+
+    esc = html.escape
+    rows = "".join(
+        f"<tr><td>{esc(str(e['tester']))}</td><td>{esc(str(e['message']))}</td>"
+        f"<td>{esc(str(e['rating']))}</td><td>{esc(str(e['timestamp']))}</td></tr>"
+        for e in data["entries"]
+    )
+    stats = "".join(
+        f"<tr><td><a href='?tester={quote(t)}&per_page={data['per_page']}'>{esc(t)}</a></td><td>{n}</td>"
+        f"<td>{summary['tester_events'].get(t, 0)}</td><td>{esc(summary['last_seen'].get(t, ''))}</td></tr>"
+        for t, n in summary["tester_activity"].items()
+    )
+    ratings = ", ".join(f"{esc(r)}: {n}" for r, n in summary["ratings"].items())
+
+    def link(p: int, label: str) -> str:
+        who = f"&tester={quote(tester)}" if tester else ""
+        return f"<a href='?page={p}&per_page={data['per_page']}{who}'>{label}</a>"
+
+    pager = " ".join(filter(None, [
+        link(data["page"] - 1, "&larr; newer") if data["page"] > 1 else "",
+        f"page {data['page']} of {data['pages']} ({data['total']} entries)",
+        link(data["page"] + 1, "older &rarr;") if data["page"] < data["pages"] else "",
+    ]))
+    title = f" — {esc(tester)} (<a href='?per_page={data['per_page']}'>all</a>)" if tester else ""
+
+    return f"""
     <html>
     <head>
         <title>SoulNode Closed Test Dashboard</title>
@@ -1664,6 +1788,7 @@ def admin_dashboard():
                 background: white;
                 border-radius: 8px;
                 box-shadow: 0 0 8px rgba(0,0,0,0.1);
+                margin-bottom: 24px;
             }}
             th, td {{
                 padding: 10px;
@@ -1681,6 +1806,13 @@ def admin_dashboard():
     </head>
     <body>
         <h1>🧠 SoulNode Closed Test Dashboard</h1>
+        <p>{summary['total_feedback']} feedback entries from {summary['total_testers']} testers · ratings: {ratings}</p>
+        <table>
+            <tr><th>Tester</th><th>Feedback</th><th>Events</th><th>Last seen</th></tr>
+            {stats}
+        </table>
+        <h2>Feedback{title}</h2>
+        <p>{pager}</p>
         <table>
             <tr>
                 <th>Tester</th>
@@ -1690,10 +1822,10 @@ def admin_dashboard():
             </tr>
             {rows}
         </table>
+        <p>{pager}</p>
     </body>
     </html>
     """
-    return html
 
 
 # --------------------------------------------------------
@@ -1724,11 +1856,42 @@ def speech_to_text():
 
     
 
+# --------------------------------------------------------
+# Application factory + lifecycle
+# --------------------------------------------------------
+# Importing this module only defines routes and lazy singletons. create_app() runs the boot
+# steps (data dir check, sweep, identity + file preload, relation vocabulary) once — under
+# gunicorn.conf.py's preload_app that is once in the master, and forked workers start already
+# booted. The thread-starting steps (embed worker, pam warmup) are per-process: the preloading
+# master defers them and each worker runs them from post_fork (or its first request). A
+# process that serves requests without calling create_app() (tests, `flask run`) boots on
+# its first request instead.
+def create_app() -> Flask:
+    BOOT.run()
+    return app
+
+@app.before_request
+def _ensure_booted():
+    if not BOOT.booted:
+        BOOT.run()
+    BOOT.run_process()  # no-op after the first call in this pid
+
+@app.get("/logs/status")
+def logs_status():
+    """Activity log sink (queue depth, batches, drops) and per-log append counters."""
+    return jsonify({"ok": True, "sink": get_sink().stats(),
+                    "activity": get_log(ACTIVITY_LOG_FILE).stats(), "feedback": get_log(FEEDBACK_LOG_FILE).stats()})
+
+@app.get("/boot/status")
+def boot_status():
+    """Which boot steps ran in which process, and how long each took."""
+    return jsonify({"ok": True, **BOOT.status(), "preload": PRELOAD_STATUS})
+
 # --------------------------------------------------------
 # Flask Entry Point
 # --------------------------------------------------------
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8080))
-    app.run(host="0.0.0.0", port=port, debug=False)
+    create_app().run(host="0.0.0.0", port=port, debug=False)
 
 
@@ -0,0 +1,221 @@
+# asgi_app.py — async serving mode: the Flask app under an ASGI server, hot I/O routes native async
+# -------------------------------------------------------------------------------------------
+# Under `gunicorn app:app` (sync workers) every /ask GPT call and every /tts call parks a whole
+# worker on the network, so in-flight requests == worker count. Here:
+#   - /ask, /ask/stream and /tts are Starlette routes that await AsyncOpenAI / httpx, so one
+#     worker holds hundreds of in-flight LLM/TTS requests; the local parts (memory recall,
+#     response cache — short SQLite calls) run in the threadpool
+#   - every other route is the unchanged Flask app, mounted through WSGIMiddleware
+# Answers, cache keys and SSE events are the ones app.py produces (same _ask_local,
+# ASK_SYSTEM, GPT_RESPONSES scope), so both modes can run side by side on the same DB.
+#
+#   uvicorn asgi_app:app --host 0.0.0.0 --port 8000 --workers 4
+#   gunicorn asgi_app:app -k uvicorn.workers.UvicornWorker -w 4
+#
+# Env: ASGI_MAX_CONNECTIONS=512 (outbound HTTP pool per worker), ELEVENLABS_API_KEY,
+#      ELEVENLABS_VOICE_ID (default: Rachel), ELEVENLABS_MODEL=eleven_multilingual_v2
+# -------------------------------------------------------------------------------------------
+
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+from openai import AsyncOpenAI
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+
+import app as core
+
+ASGI_MAX_CONNECTIONS = int(os.getenv("ASGI_MAX_CONNECTIONS", "512"))
+ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
+ELEVENLABS_VOICE_ID = os.getenv("ELEVENLABS_VOICE_ID", "21m00Tcm4TlvDq8ikWAM")  # "Rachel"
+ELEVENLABS_MODEL = os.getenv("ELEVENLABS_MODEL", "eleven_multilingual_v2")
+
+# per-worker async clients, opened/closed with the event loop (see lifespan)
+_CLIENTS: Dict[str, Any] = {}
+
+
+@asynccontextmanager
+async def lifespan(_app: Starlette):
+    await run_in_threadpool(core.create_app)  # boot steps, once per worker process
+    limits = httpx.Limits(max_connections=ASGI_MAX_CONNECTIONS, max_keepalive_connections=64)
+    http = httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(60.0, connect=10.0))
+    _CLIENTS["http"] = http
+    _CLIENTS["openai"] = AsyncOpenAI(api_key=core.OPENAI_API_KEY, http_client=http) if core._openai_client else None
+    print(f"[ASGI] 🚀 Async clients ready (max_connections={ASGI_MAX_CONNECTIONS})")
+    try:
+        yield
+    finally:
+        await http.aclose()
+        _CLIENTS.clear()
+
+
+def _openai() -> Optional[AsyncOpenAI]:
+    return _CLIENTS.get("openai")
+
+
+def _is_json(request: Request) -> bool:
+    mime = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    return mime == "application/json" or (mime.startswith("application/") and mime.endswith("+json"))
+
+
+async def _text(request: Request) -> str:
+    # JSON body only (never the query string): cross-site forms can't send application/json
+    if not _is_json(request):
+        return ""
+    try:
+        data = await request.json()
+    except Exception:
+        data = {}
+    return (((data or {}) if isinstance(data, dict) else {}).get("text") or "").strip()
+
+
+# ---- /ask ---------------------------------------------------------------------
+async def ask(request: Request) -> JSONResponse:
+    text = await _text(request)
+    if not text:
+        return JSONResponse({"ok": False, "error": "Missing text"}, status_code=400)
+    try:
+        answer = await run_in_threadpool(core._ask_local, text)
+        if answer:
+            return JSONResponse({"ok": True, "answer": answer})
+
+        client = _openai()
+        if client is None:
+            return JSONResponse({"ok": False, "answer": core.ASK_HINT})
+
+        scope = await run_in_threadpool(core._gpt_scope, core.ASK_SYSTEM, "ask")
+        hit = await run_in_threadpool(core.GPT_RESPONSES.get, text, scope) if scope else None
+        if hit:
+            return JSONResponse({"ok": True, "answer": hit, "cached": True})
+
+        t0 = time.perf_counter()
+        completion = await client.chat.completions.create(model=core.OPENAI_MODEL, messages=core._ask_messages(text))
+        reply = (completion.choices[0].message.content or "").strip()
+        if scope and reply:
+            await run_in_threadpool(core.GPT_RESPONSES.put, text, reply, scope, (time.perf_counter() - t0) * 1000)
+        return JSONResponse({"ok": True, "answer": reply, "cached": False})
+    except Exception as e:
+        print(f"[ASGI] /ask error: {e}")
+        return JSONResponse({"ok": False, "error": str(e)}, status_code=500)
+
+
+# ---- /ask/stream (same events as app.py's SSE route) --------------------------
+async def ask_stream(request: Request) -> Response:
+    if not _is_json(request):  # same rule as app.py: it can write memory
+        return JSONResponse({"ok": False, "error": "Expected a JSON body"}, status_code=415)
+    text = await _text(request)
+    if not text:
+        return JSONResponse({"ok": False, "error": "Missing text"}, status_code=400)
+
+    async def events() -> AsyncIterator[str]:
+        t0 = time.perf_counter()
+        ms = lambda: round((time.perf_counter() - t0) * 1000, 1)
+        try:
+            answer = await run_in_threadpool(core._ask_local, text)
+            if answer:
+                yield core._sse("answer", {"answer": answer, "source": "memory", "ms": ms()})
+                yield core._sse("done", {"ok": True, "answer": answer, "source": "memory", "cached": False,
+                                         "ms": ms(), "ttft_ms": ms()})
+                return
+            client = _openai()
+            if client is None:
+                yield core._sse("done", {"ok": False, "answer": core.ASK_HINT, "source": "hint", "cached": False,
+                                         "ms": ms(), "ttft_ms": None})
+                return
+
+            scope = await run_in_threadpool(core._gpt_scope, core.ASK_SYSTEM, "ask")
+            hit = await run_in_threadpool(core.GPT_RESPONSES.get, text, scope) if scope else None
+            if hit:
+                yield core._sse("answer", {"answer": hit, "source": "gpt", "ms": ms()})
+                yield core._sse("done", {"ok": True, "answer": hit, "source": "gpt", "cached": True,
+                                         "ms": ms(), "ttft_ms": ms()})
+                return
+
+            stream = await client.chat.completions.create(
+                model=core.OPENAI_MODEL, messages=core._ask_messages(text), stream=True,
+            )
+            parts, ttft = [], None
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                if ttft is None:
+                    ttft = ms()
+                parts.append(delta)
+                yield core._sse("token", {"t": delta})
+            full = "".join(parts).strip()
+            if scope and full:
+                await run_in_threadpool(core.GPT_RESPONSES.put, text, full, scope, ms())
+            yield core._sse("done", {"ok": bool(full), "answer": full, "source": "gpt", "cached": False,
+                                     "ms": ms(), "ttft_ms": ttft})
+        except Exception as e:
+            print(f"[ASGI] /ask/stream error: {e}")
+            yield core._sse("error", {"error": str(e)})
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# ---- /tts (ElevenLabs REST, audio streamed through as it is synthesized) -------
+async def tts(request: Request) -> Response:
+    try:
+        data = await request.json()
+    except Exception:
+        data = {}
+    text = ((data or {}).get("text") or (data or {}).get("prompt") or "").strip()
+    if not text:
+        return JSONResponse({"ok": False, "error": "Missing text"}, status_code=400)
+    print(f"[TTS] Detected emotion: {core.detect_emotion_and_tone(text)}")
+    if not ELEVENLABS_API_KEY:
+        return JSONResponse({"ok": False, "error": "ELEVENLABS_API_KEY not set"}, status_code=500)
+
+    http: httpx.AsyncClient = _CLIENTS["http"]
+    req = http.build_request(
+        "POST", f"https://api.elevenlabs.io/v1/text-to-speech/{ELEVENLABS_VOICE_ID}/stream",
+        headers={"xi-api-key": ELEVENLABS_API_KEY, "accept": "audio/mpeg"},
+        json={"text": text, "model_id": ELEVENLABS_MODEL},
+    )
+    try:
+        upstream = await http.send(req, stream=True)
+    except httpx.HTTPError as e:
+        print(f"[TTS ERROR] {e}")
+        return JSONResponse({"ok": False, "error": str(e)}, status_code=502)
+    if upstream.status_code >= 400:
+        body = (await upstream.aread()).decode("utf-8", "replace")
+        await upstream.aclose()
+        print(f"[TTS ERROR] ElevenLabs {upstream.status_code}: {body[:200]}")
+        return JSONResponse({"ok": False, "error": body[:500]}, status_code=502)
+
+    async def audio() -> AsyncIterator[bytes]:
+        try:
+            async for chunk in upstream.aiter_bytes():
+                yield chunk
+        finally:
+            await upstream.aclose()
+
+    return StreamingResponse(audio(), media_type="audio/mpeg")
+
+
+async def asgi_status(_request: Request) -> JSONResponse:
+    return JSONResponse({"ok": True, "mode": "asgi", "pid": os.getpid(),
+                         "openai": _openai() is not None, "max_connections": ASGI_MAX_CONNECTIONS,
+                         "gpt_cache": core.GPT_RESPONSES.stats()})
+
+
+app = Starlette(
+    routes=[
+        Route("/ask", ask, methods=["POST"]),
+        Route("/ask/stream", ask_stream, methods=["POST"]),  # POST only, like app.py: it can write memory
+        Route("/tts", tts, methods=["POST"]),
+        Route("/asgi/status", asgi_status, methods=["GET"]),
+        Mount("/", app=WSGIMiddleware(core.app)),  # everything else: the Flask routes as-is
+    ],
+    lifespan=lifespan,
+)
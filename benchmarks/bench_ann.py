@@ -0,0 +1,65 @@
+# benchmarks/bench_ann.py
+# IVF index vs the exact matrix: recall@k and per-query latency across nprobe settings.
+#
+#   python benchmarks/bench_ann.py                       # 100k rows @ 1536 dims
+#   python benchmarks/bench_ann.py --rows 20000 --dim 3072 --nprobe 4 8 16 32
+#
+# Data is a clustered gaussian mixture (real sentence embeddings are far from uniform);
+# queries are perturbed copies of stored rows, the way paraphrased questions behave.
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ann_index import IVFIndex  # noqa: E402
+from vector_matrix import EmbeddingMatrix  # noqa: E402
+
+
+def clustered(rng, n, dim, topics):
+    centers = rng.standard_normal((topics, dim), dtype=np.float32)
+    labels = rng.integers(topics, size=n)
+    return centers[labels] + 1.5 * rng.standard_normal((n, dim), dtype=np.float32)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--dim", type=int, default=1536)
+    ap.add_argument("--topics", type=int, default=500)
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--nlist", type=int, default=0)
+    ap.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(11)
+    vecs = clustered(rng, args.rows, args.dim, args.topics)
+    picks = rng.integers(args.rows, size=args.queries)
+    queries = vecs[picks] + 0.8 * rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+    exact = EmbeddingMatrix().load(range(args.rows), vecs)
+    t0 = time.perf_counter()
+    truth = [set(i for i, _ in exact.top_k(q, args.k)) for q in queries]
+    exact_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+
+    t0 = time.perf_counter()
+    ivf = IVFIndex(nlist=args.nlist, min_train=1).load(range(args.rows), vecs)
+    build_s = time.perf_counter() - t0
+
+    print(f"rows={args.rows} dim={args.dim} k={args.k} lists={len(ivf.centroids)} build={build_s:.1f}s")
+    print(f"{'backend':>12} | {'recall@k':>8} | {'ms/query':>8} | speedup")
+    print(f"{'exact':>12} | {1.0:>8.3f} | {exact_ms:>8.3f} | {1.0:>6.1f}x")
+    for p in args.nprobe:
+        t0 = time.perf_counter()
+        got = [set(i for i, _ in ivf.top_k(q, args.k, nprobe=p)) for q in queries]
+        ms = (time.perf_counter() - t0) * 1000 / len(queries)
+        recall = np.mean([len(g & t) / len(t) for g, t in zip(got, truth)])
+        print(f"{'ivf np=' + str(p):>12} | {recall:>8.3f} | {ms:>8.3f} | {exact_ms / ms:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
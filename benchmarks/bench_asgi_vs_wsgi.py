@@ -0,0 +1,150 @@
+# benchmarks/bench_asgi_vs_wsgi.py
+# Load test: `gunicorn app:app` (sync workers) vs `uvicorn asgi_app:app`, same worker count,
+# against a local fake OpenAI endpoint that takes --llm-ms per completion (no API key / cost).
+# Every request is a unique question so it goes all the way to "GPT" (response cache off).
+#
+#   python benchmarks/bench_asgi_vs_wsgi.py                      # 4 workers, 200 requests, 100 in flight
+#   python benchmarks/bench_asgi_vs_wsgi.py --workers 2 --requests 500 --concurrency 250 --llm-ms 1500
+#
+# Needs the pinned serving deps: gunicorn, uvicorn, starlette, httpx.
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def fake_openai(port: int, llm_ms: float) -> ThreadingHTTPServer:
+    """Minimal /v1/chat/completions that answers after llm_ms (threaded, so it is never the bottleneck)."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            time.sleep(llm_ms / 1000)
+            body = json.dumps({
+                "id": "bench", "object": "chat.completion", "created": int(time.time()), "model": "bench",
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "Benchmark answer."}}],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 2, "total_tokens": 3},
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer.daemon_threads = True
+    ThreadingHTTPServer.request_queue_size = 1024
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_server(mode: str, port: int, workers: int, env: dict) -> subprocess.Popen:
+    if mode == "wsgi":
+        cmd = ["gunicorn", "app:app", "-w", str(workers), "-b", f"127.0.0.1:{port}", "--timeout", "120",
+               "--backlog", "2048"]
+    else:
+        cmd = ["uvicorn", "asgi_app:app", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port),
+               "--backlog", "2048", "--log-level", "warning"]
+    return subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_ready(url: str, timeout: float = 90.0):
+    deadline = time.time() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.time() < deadline:
+            try:
+                if (await client.get(url + "/")).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.5)
+    raise RuntimeError(f"server at {url} did not come up")
+
+
+async def load(url: str, n: int, concurrency: int, tag: str):
+    sem = asyncio.Semaphore(concurrency)
+    latencies, errors = [], 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=300) as client:
+        async def one(i):
+            nonlocal errors
+            async with sem:
+                t0 = time.perf_counter()
+                try:
+                    r = await client.post(url + "/ask", json={"text": f"sing a song about {tag} number {i}"})
+                    ok = r.status_code == 200 and r.json().get("ok")
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append(time.perf_counter() - t0)
+                errors += 0 if ok else 1
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(n)))
+        wall = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "rps": n / wall,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "errors": errors,
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--requests", type=int, default=200)
+    ap.add_argument("--concurrency", type=int, default=100)
+    ap.add_argument("--llm-ms", type=float, default=1000)
+    ap.add_argument("--modes", nargs="+", default=["wsgi", "asgi"])
+    args = ap.parse_args()
+
+    llm_port = free_port()
+    fake_openai(llm_port, args.llm_ms)
+    tmp = tempfile.mkdtemp(prefix="bench_asgi_")
+    env = dict(os.environ,
+               OPENAI_API_KEY="bench", OPENAI_BASE_URL=f"http://127.0.0.1:{llm_port}/v1",
+               MEMORY_DB_PATH=os.path.join(tmp, "memory_store.db"),
+               EMBED_CACHE_PATH=os.path.join(tmp, "embed_cache.db"),
+               GPT_CACHE="0", EMBED_WORKER="0", PYTHONUNBUFFERED="1")
+
+    print(f"workers={args.workers} requests={args.requests} concurrency={args.concurrency} llm={args.llm_ms:.0f}ms")
+    print(f"{'mode':>5} | {'req/s':>7} | {'p50 ms':>8} | {'p95 ms':>8} | errors")
+    for mode in args.modes:
+        port = free_port()
+        proc = start_server(mode, port, args.workers, env)
+        try:
+            url = f"http://127.0.0.1:{port}"
+            asyncio.run(wait_ready(url))
+            res = asyncio.run(load(url, args.requests, args.concurrency, mode))
+            print(f"{mode:>5} | {res['rps']:>7.1f} | {res['p50_ms']:>8.0f} | {res['p95_ms']:>8.0f} | {res['errors']}")
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+    # sync workers: throughput ≈ workers / llm latency; async: ≈ concurrency / llm latency
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+# benchmarks/bench_boot.py
+# Startup cost of app.py, measured in fresh interpreters against a throwaway copy of the DB:
+#   1) `python -X importtime -c "import app"` — the slowest imports (cumulative µs)
+#   2) import wall time vs create_app() (boot steps) wall time, per step
+#   3) time to first request for a worker: cold (import + boot + request) vs forked from a
+#      booted master (what gunicorn.conf.py's preload_app gives every worker)
+#
+#   python benchmarks/bench_boot.py            # top 15 imports, 5 runs each
+#   python benchmarks/bench_boot.py --top 30 --runs 10 --db data/memory_store.db
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PHASES = r"""
+import json, os, sys, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.create_app()
+t2 = time.perf_counter()
+app.app.test_client().get("/boot/status")
+t3 = time.perf_counter()
+out = {"import_ms": (t1 - t0) * 1000, "boot_ms": (t2 - t1) * 1000, "first_request_ms": (t3 - t2) * 1000,
+       "steps": {k: v["ms"] for k, v in app.BOOT.results.items()}}
+if hasattr(os, "fork"):
+    r, w = os.pipe()
+    t4 = time.perf_counter()
+    if os.fork() == 0:  # a preloaded worker: booted state inherited, nothing left to do but serve
+        app.app.test_client().get("/boot/status")
+        os.write(w, str((time.perf_counter() - t4) * 1000).encode())
+        os._exit(0)
+    os.close(w)
+    out["forked_first_request_ms"] = float(os.read(r, 64).decode())
+    os.wait()
+print("RESULT " + json.dumps(out))
+"""
+
+
+def env_for(tmp: str, db: str) -> dict:
+    env = dict(os.environ)
+    path = os.path.join(tmp, "memory_store.db")
+    if db and os.path.exists(db):
+        shutil.copy(db, path)
+    env.update(MEMORY_DB_PATH=path, EMBED_CACHE_PATH=os.path.join(tmp, "embed_cache.db"),
+               GPT_CACHE_PATH=os.path.join(tmp, "gpt_cache.db"), EMBED_WORKER="0", OPENAI_API_KEY="")
+    return env
+
+
+def importtime(env: dict, top: int):
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                          cwd=ROOT, env=env, capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, self_us, cum_us, name = [p.strip() for p in line.replace("import time:", "|").split("|")]
+        rows.append((int(cum_us), int(self_us), name))
+    rows.sort(reverse=True)
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for cum, self_us, name in rows[:top]:
+        print(f"{cum / 1000:>14.1f} {self_us / 1000:>8.1f}  {name}")
+    print()
+
+
+def run_phases(env: dict) -> dict:
+    proc = subprocess.run([sys.executable, "-c", PHASES], cwd=ROOT, env=env, capture_output=True, text=True)
+    line = next((l for l in proc.stdout.splitlines() if l.startswith("RESULT ")), None)
+    if line is None:
+        sys.exit(proc.stderr[-2000:])
+    return json.loads(line[len("RESULT "):])
+
+
+def phases(env: dict, runs: int):
+    results = [run_phases(env) for _ in range(runs)]
+    med = lambda key: statistics.median(r[key] for r in results)
+    cold = med("import_ms") + med("boot_ms") + med("first_request_ms")
+    print(f"import app          {med('import_ms'):8.1f} ms")
+    print(f"create_app() boot   {med('boot_ms'):8.1f} ms")
+    for name in results[0]["steps"]:
+        print(f"  - {name:<16} {statistics.median(r['steps'][name] for r in results):8.1f} ms")
+    print(f"first request       {med('first_request_ms'):8.1f} ms")
+    print(f"\nworker → first response, cold start        {cold:8.1f} ms")
+    if "forked_first_request_ms" in results[0]:
+        print(f"worker → first response, preloaded + fork  {med('forked_first_request_ms'):8.1f} ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--db", default=os.path.join(ROOT, "data", "memory_store.db"))
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="bench_boot_")
+    try:
+        env = env_for(tmp, args.db)
+        run_phases(env)  # warm-up: schema migration / FTS build on the fresh copy
+        print(f"== -X importtime (top {args.top}) ==")
+        importtime(env, args.top)
+        print(f"== phases (median of {args.runs}) ==")
+        phases(env, args.runs)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
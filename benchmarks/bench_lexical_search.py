@@ -0,0 +1,61 @@
+# benchmarks/bench_lexical_search.py
+# Leading-wildcard LIKE scan + SequenceMatcher (old search) vs the FTS5 / bm25 index.
+#
+#   python benchmarks/bench_lexical_search.py              # 10k / 100k / 300k facts
+#   python benchmarks/bench_lexical_search.py --rows 50000
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from difflib import SequenceMatcher
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["MEMORY_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="bench_fts_"), "warmup.db")
+os.environ.setdefault("OPENAI_API_KEY", "")
+import sqlite_memory  # noqa: E402
+
+WORDS = ("dream car favorite food color song movie hometown school job team pet city book game "
+         "drink sport brother sister birthday goal vacation hobby shoe artist").split()
+
+
+def like_search(conn, query):
+    q = f"%{query.lower()}%"
+    rows = conn.execute("SELECT subject, relation, value FROM facts WHERE relation LIKE ? OR value LIKE ?",
+                        (q, q)).fetchall()
+    return max(rows, key=lambda x: SequenceMatcher(None, query, x[1]).ratio()) if rows else None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 300_000])
+    ap.add_argument("--queries", type=int, default=200)
+    args = ap.parse_args()
+    sqlite_memory.client = None
+    rng = random.Random(5)
+
+    print(f"{'rows':>8} | {'LIKE ms':>8} | {'FTS5 ms':>8} | speedup")
+    for n in args.rows:
+        mem = sqlite_memory.SQLiteMemory(db_path=os.path.join(tempfile.mkdtemp(), f"facts_{n}.db"))
+        triples = [(f"person{i % 997}", f"{rng.choice(WORDS)} {rng.choice(WORDS)} {i}", f"value {i} {rng.choice(WORDS)}")
+                   for i in range(n)]
+        conn = mem._connect()
+        with conn:
+            conn.executemany("INSERT INTO facts (subject, relation, value) VALUES (?, ?, ?)", triples)
+        queries = [f"{rng.choice(WORDS)} {rng.choice(WORDS)} {rng.randrange(n)}" for _ in range(args.queries)]
+
+        t0 = time.perf_counter()
+        for q in queries:
+            like_search(conn, q)
+        like_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+        t0 = time.perf_counter()
+        for q in queries:
+            mem.lexical_search(q, k=1)
+        fts_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+        print(f"{n:>8} | {like_ms:>8.3f} | {fts_ms:>8.3f} | {like_ms / fts_ms:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
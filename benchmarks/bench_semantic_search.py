@@ -0,0 +1,77 @@
+# benchmarks/bench_semantic_search.py
+# Resident EmbeddingMatrix vs the old per-row semantic_search loop.
+#
+#   python benchmarks/bench_semantic_search.py                  # 1k, 10k, 100k @ 3072 dims
+#   python benchmarks/bench_semantic_search.py --sizes 1000 --dim 1536
+#
+# The old loop json.loads + pure-Python cosine per row; at 100k x 3072 that is minutes per
+# query, so it is timed on --loop-sample rows and scaled linearly (marked "~").
+# Note: 100k x 3072 float32 is ~1.2 GB of RAM for the matrix alone.
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vector_matrix import EmbeddingMatrix  # noqa: E402
+
+
+def legacy_cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    return dot / (na * nb) if na and nb else -1.0
+
+
+def legacy_search(q, rows):
+    best, best_id = 0.0, None
+    for row_id, emb_json in rows:
+        s = legacy_cosine(q, json.loads(emb_json))
+        if s > best:
+            best, best_id = s, row_id
+    return best_id, best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    ap.add_argument("--dim", type=int, default=3072)
+    ap.add_argument("--queries", type=int, default=20)
+    ap.add_argument("--loop-sample", type=int, default=200)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(7)
+    print(f"dim={args.dim} queries={args.queries}")
+    print(f"{'facts':>8} | {'load ms':>9} | {'matrix ms/q':>11} | {'loop ms/q':>11} | speedup")
+    for n in args.sizes:
+        vecs = rng.standard_normal((n, args.dim), dtype=np.float32)
+        queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+        t0 = time.perf_counter()
+        m = EmbeddingMatrix().load(range(n), vecs)
+        load_ms = (time.perf_counter() - t0) * 1000
+
+        t0 = time.perf_counter()
+        for q in queries:
+            m.top_k(q, k=1)
+        mat_ms = (time.perf_counter() - t0) * 1000 / len(queries)
+
+        sample = min(n, args.loop_sample)
+        rows = [(i, json.dumps(vecs[i].tolist())) for i in range(sample)]
+        q = queries[0].tolist()
+        t0 = time.perf_counter()
+        legacy_search(q, rows)
+        loop_ms = (time.perf_counter() - t0) * 1000 * (n / sample)
+        approx = "~" if sample < n else " "
+
+        print(f"{n:>8} | {load_ms:>9.1f} | {mat_ms:>11.3f} | {approx}{loop_ms:>10.1f} | {loop_ms / mat_ms:>7.0f}x")
+        del m, vecs
+
+
+if __name__ == "__main__":
+    main()
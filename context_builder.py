@@ -0,0 +1,146 @@
+# context_builder.py — request-scoped "Known facts" block for GPT fallbacks, under a token budget
+# -------------------------------------------------------------------------------------------
+# Replaces "export the whole facts table on every GPT call". Per request:
+#   1) relevant facts: the retrieval index (HybridRetriever) is asked for the top-k facts for
+#      the question, bounded by its own latency budget; only confident hits are kept
+#   2) subject digests: a short, cached "rel=value; ..." line per pinned subject (pam, ty),
+#      built from that subject's newest facts and rebuilt only when the memory generation
+#      changes (i.e. after a write) — not on every call
+# Lines are added relevant-first until CONTEXT_TOKENS is spent, so prompt size (and GPT cost)
+# stays flat as the facts table grows. Tokens are counted with tiktoken when its encoding is
+# available, else estimated at ~4 chars/token.
+#
+# Env: CONTEXT_TOKENS=600  CONTEXT_K=8  CONTEXT_DIGEST_TOKENS=150  CONTEXT_DIGEST_ROWS=200
+#      CONTEXT_RETRIEVE_MS=300
+# -------------------------------------------------------------------------------------------
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+CONTEXT_TOKENS = int(os.getenv("CONTEXT_TOKENS", "600"))
+CONTEXT_K = int(os.getenv("CONTEXT_K", "8"))
+CONTEXT_DIGEST_TOKENS = int(os.getenv("CONTEXT_DIGEST_TOKENS", "150"))
+CONTEXT_DIGEST_ROWS = int(os.getenv("CONTEXT_DIGEST_ROWS", "200"))
+CONTEXT_RETRIEVE_MS = float(os.getenv("CONTEXT_RETRIEVE_MS", "300"))
+
+_ENCODERS: Dict[str, Any] = {}
+_ENCODERS_LOCK = threading.Lock()
+
+
+def _encoder(model: str):
+    """tiktoken encoding for `model` (None when tiktoken or its BPE files are unavailable)."""
+    if model not in _ENCODERS:
+        with _ENCODERS_LOCK:
+            if model not in _ENCODERS:
+                try:
+                    import tiktoken
+                    try:
+                        enc = tiktoken.encoding_for_model(model)
+                    except KeyError:
+                        enc = tiktoken.get_encoding("cl100k_base")
+                except Exception as e:
+                    print(f"[Context ⚠️] tiktoken unavailable for {model} ({type(e).__name__}); estimating tokens")
+                    enc = None
+                _ENCODERS[model] = enc
+    return _ENCODERS[model]
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    enc = _encoder(model)
+    if enc is None:
+        return len(text) // 4 + 1
+    return len(enc.encode(text))
+
+
+class ContextBuilder:
+    def __init__(self, memory, retriever=None, subjects: Sequence[str] = ("pam", "ty"),
+                 budget_tokens: int = CONTEXT_TOKENS, k: int = CONTEXT_K,
+                 digest_tokens: int = CONTEXT_DIGEST_TOKENS, digest_rows: int = CONTEXT_DIGEST_ROWS,
+                 retrieve_ms: float = CONTEXT_RETRIEVE_MS, model: str = "gpt-4o-mini"):
+        self.memory = memory
+        self.retriever = retriever
+        self.subjects = tuple(subjects)
+        self.budget_tokens = budget_tokens
+        self.k = k
+        self.digest_tokens = digest_tokens
+        self.digest_rows = digest_rows
+        self.retrieve_ms = retrieve_ms
+        self.model = model
+        self._digests: Dict[str, Tuple[int, str, int]] = {}  # subject -> (generation, line, tokens)
+        self._lock = threading.Lock()
+        self.counters = {"builds": 0, "digest_hits": 0, "digest_builds": 0, "truncated": 0}
+
+    # ---- digests --------------------------------------------------------------
+    def _build_digest(self, subject: str) -> Tuple[str, int]:
+        rows = self.memory._connect().execute(
+            "SELECT relation, value FROM facts WHERE subject=? ORDER BY id DESC LIMIT ?",
+            (subject, self.digest_rows),
+        ).fetchall()
+        grouped: Dict[str, List[str]] = {}
+        for rel, val in rows:  # newest first, so the budget keeps the latest facts
+            grouped.setdefault(rel, []).append(val)
+        line, tokens = f"{subject}:", count_tokens(f"{subject}:", self.model)
+        for rel, vals in grouped.items():
+            part = f" {rel}={', '.join(vals)};"
+            n = count_tokens(part, self.model)
+            if tokens + n > self.digest_tokens:
+                break
+            line, tokens = line + part, tokens + n
+        return (line if line != f"{subject}:" else ""), tokens
+
+    def digest(self, subject: str, generation: Optional[int] = None) -> Tuple[str, int]:
+        """Cached digest line for `subject` → (text, tokens); rebuilt when the generation moves."""
+        gen = self.memory.generation() if generation is None else generation
+        cached = self._digests.get(subject)
+        if cached is not None and cached[0] == gen:
+            self.counters["digest_hits"] += 1
+            return cached[1], cached[2]
+        line, tokens = self._build_digest(subject)
+        with self._lock:
+            self._digests[subject] = (gen, line, tokens)
+        self.counters["digest_builds"] += 1
+        return line, tokens
+
+    # ---- per request ----------------------------------------------------------
+    def _relevant(self, question: str, **ctx) -> List[str]:
+        if self.retriever is None or not question.strip():
+            return []
+        try:
+            res = self.retriever.retrieve(question, k=self.k, budget_ms=self.retrieve_ms, **ctx)
+        except Exception as e:
+            print(f"[Context ⚠️] retrieval failed: {e}")
+            return []
+        # only hits a source vouches for; a bare subject-name match is not relevance
+        return [f"{h['subject']}: {h['relation']}={h['value']}" for h in res["hits"] if h["confident"]]
+
+    def build(self, question: str, **ctx) -> Dict[str, Any]:
+        """{"text": "...facts block...", "tokens": n, "facts": [...lines], "ms": ...} for one question."""
+        t0 = time.perf_counter()
+        gen = self.memory.generation()
+        lines: List[str] = []
+        used = 0
+        truncated = False
+
+        candidates = [(line, count_tokens(line, self.model)) for line in self._relevant(question, **ctx)]
+        candidates += [d for d in (self.digest(s, gen) for s in self.subjects) if d[0]]
+        seen = set()
+        for line, n in candidates:
+            if line in seen:
+                continue
+            seen.add(line)
+            if used + n + 1 > self.budget_tokens:
+                truncated = True
+                continue
+            lines.append(line)
+            used += n + 1  # +1 for the joining newline
+
+        self.counters["builds"] += 1
+        self.counters["truncated"] += int(truncated)
+        return {"text": "\n".join(lines), "tokens": used, "facts": lines,
+                "ms": round((time.perf_counter() - t0) * 1000, 3)}
+
+    def stats(self) -> Dict:
+        return {"budget_tokens": self.budget_tokens, "subjects": list(self.subjects),
+                "tiktoken": _encoder(self.model) is not None, **self.counters}
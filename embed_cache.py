@@ -0,0 +1,227 @@
+# embed_cache.py — content-addressed embedding cache shared by every OpenAI embedding call
+# -------------------------------------------------------------------------------------------
+# Key = sha256(model + normalized text). Two tiers:
+#   1) in-process LRU (OrderedDict) — repeat questions inside a worker cost a dict hit
+#   2) SQLite table (data/embed_cache.db, WAL via sqlite_pool) — survives restarts and is
+#      shared by every gunicorn worker; evicted oldest-last_used-first past EMBED_CACHE_MAX_ROWS.
+#      A disk hit refreshes last_used only when it is older than EMBED_CACHE_TOUCH_SECS, so
+#      hot lookups stay read-only instead of taking the write lock on every hit
+# Only misses go to the API, batched (EMBED_BATCH per request).
+#
+# Env: EMBED_CACHE_PATH, EMBED_CACHE_MAX_ROWS=200000, EMBED_CACHE_MEM_ITEMS=4096, EMBED_BATCH=64,
+#      EMBED_CACHE_TOUCH_SECS=3600
+# -------------------------------------------------------------------------------------------
+
+import hashlib
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from sqlite_pool import get_pool
+
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "embed_cache.db"
+)
+EMBED_CACHE_MAX_ROWS = int(os.getenv("EMBED_CACHE_MAX_ROWS", "200000"))
+EMBED_CACHE_MEM_ITEMS = int(os.getenv("EMBED_CACHE_MEM_ITEMS", "4096"))
+EMBED_BATCH = int(os.getenv("EMBED_BATCH", "64"))
+EMBED_CACHE_TOUCH_SECS = float(os.getenv("EMBED_CACHE_TOUCH_SECS", "3600"))
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return _WS.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    def __init__(self, db_path: str = EMBED_CACHE_PATH, max_rows: int = EMBED_CACHE_MAX_ROWS,
+                 mem_items: int = EMBED_CACHE_MEM_ITEMS, touch_secs: float = EMBED_CACHE_TOUCH_SECS):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.pool = get_pool(db_path)
+        self.max_rows = max_rows
+        self.mem_items = mem_items
+        self.touch_secs = touch_secs  # LRU granularity for last_used on disk
+        self._mem: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self.counters = {"mem_hits": 0, "disk_hits": 0, "misses": 0, "api_calls": 0, "errors": 0,
+                         "evicted": 0, "touches": 0}
+        conn = self.pool.connection()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    dim INTEGER NOT NULL,
+                    vec BLOB NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+
+    # ---- tiers ----------------------------------------------------------------
+    def _mem_get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            v = self._mem.get(key)
+            if v is not None:
+                self._mem.move_to_end(key)
+            return v
+
+    def _mem_put(self, key: str, vec: np.ndarray):
+        with self._lock:
+            self._mem[key] = vec
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.mem_items:
+                self._mem.popitem(last=False)
+
+    def _disk_get(self, keys: Sequence[str]) -> Dict[str, np.ndarray]:
+        if not keys:
+            return {}
+        conn = self.pool.connection()
+        found: Dict[str, np.ndarray] = {}
+        stale: List[str] = []
+        now = time.time()
+        for i in range(0, len(keys), 500):  # stay under SQLite's host-parameter limit
+            part = keys[i:i + 500]
+            marks = ",".join("?" * len(part))
+            for key, blob, last_used in conn.execute(
+                f"SELECT key, vec, last_used FROM embeddings WHERE key IN ({marks})", part
+            ):
+                found[key] = np.frombuffer(blob, dtype="<f4")
+                if now - last_used >= self.touch_secs:
+                    stale.append(key)
+        if stale:
+            with conn:
+                conn.executemany("UPDATE embeddings SET last_used=? WHERE key=?", [(now, k) for k in stale])
+            self.counters["touches"] += len(stale)
+        return found
+
+    def _disk_put(self, rows: List[tuple]):
+        conn = self.pool.connection()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, model, dim, vec, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        self._writes_since_evict += len(rows)
+        if self._writes_since_evict >= 256:
+            self._writes_since_evict = 0
+            self.evict()
+
+    def evict(self) -> int:
+        conn = self.pool.connection()
+        n = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        extra = n - self.max_rows
+        if extra <= 0:
+            return 0
+        with conn:
+            conn.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (extra,),
+            )
+        self.counters["evicted"] += extra
+        return extra
+
+    # ---- public API -----------------------------------------------------------
+    def get_many(self, texts: Sequence[str], model: str, client, batch_size: int = EMBED_BATCH
+                 ) -> List[Optional[np.ndarray]]:
+        """Embeddings for `texts` (float32 arrays, None for blank text). Misses are batched."""
+        out: List[Optional[np.ndarray]] = [None] * len(texts)
+        keys = [cache_key(model, t) if normalize_text(t) else None for t in texts]
+
+        disk_wanted = []
+        for i, key in enumerate(keys):
+            if key is None:
+                continue
+            v = self._mem_get(key)
+            if v is not None:
+                out[i] = v
+                self.counters["mem_hits"] += 1
+            else:
+                disk_wanted.append(key)
+
+        from_disk = self._disk_get(list(dict.fromkeys(disk_wanted)))
+        todo: "OrderedDict[str, str]" = OrderedDict()
+        for i, key in enumerate(keys):
+            if key is None or out[i] is not None:
+                continue
+            v = from_disk.get(key)
+            if v is not None:
+                out[i] = v
+                self._mem_put(key, v)
+                self.counters["disk_hits"] += 1
+            else:
+                todo.setdefault(key, normalize_text(texts[i]))
+
+        if todo:
+            if client is None:
+                raise RuntimeError("embedding cache miss and no OpenAI client configured")
+            fresh: Dict[str, np.ndarray] = {}
+            items = list(todo.items())
+            for b in range(0, len(items), batch_size):
+                batch = items[b:b + batch_size]
+                try:
+                    resp = client.embeddings.create(model=model, input=[t for _, t in batch])
+                except Exception:
+                    self.counters["errors"] += 1
+                    raise
+                self.counters["api_calls"] += 1
+                now = time.time()
+                rows = []
+                for (key, _), d in zip(batch, resp.data):
+                    v = np.asarray(d.embedding, dtype="<f4")
+                    v.setflags(write=False)  # shared between callers via the LRU
+                    fresh[key] = v
+                    self._mem_put(key, v)
+                    rows.append((key, model, len(v), v.tobytes(), now))
+                self._disk_put(rows)
+            for i, key in enumerate(keys):
+                if key is not None and out[i] is None:
+                    out[i] = fresh.get(key)
+                    self.counters["misses"] += 1
+        return out
+
+    def get(self, text: str, model: str, client) -> Optional[np.ndarray]:
+        return self.get_many([text], model, client)[0]
+
+    def stats(self) -> Dict:
+        c = dict(self.counters)
+        lookups = c["mem_hits"] + c["disk_hits"] + c["misses"]
+        c["hit_rate"] = round((c["mem_hits"] + c["disk_hits"]) / lookups, 4) if lookups else 0.0
+        c["mem_items"] = len(self._mem)
+        c["db_path"] = self.pool.db_path
+        return c
+
+
+# simple module-level singleton
+_CACHE: Optional[EmbeddingCache] = None
+_CACHE_LOCK = threading.Lock()
+
+def get_cache() -> EmbeddingCache:
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = EmbeddingCache()
+    return _CACHE
+
+def get_embedding(text: str, model: str, client) -> Optional[np.ndarray]:
+    return get_cache().get(text, model, client)
+
+def get_embeddings(texts: Sequence[str], model: str, client, batch_size: int = EMBED_BATCH
+                   ) -> List[Optional[np.ndarray]]:
+    return get_cache().get_many(texts, model, client, batch_size=batch_size)
+
+def cache_stats() -> Dict:
+    return get_cache().stats()
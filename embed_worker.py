@@ -0,0 +1,272 @@
+# embed_worker.py — background embedding queue for facts
+# -------------------------------------------------------------------------------------------
+# remember() inserts a fact with embedding_vec NULL and returns; this worker picks those rows
+# up in batches (oldest first), embeds them through embed_cache and writes the BLOBs back,
+# patching the resident index in place. The "queue" is just the NULL rows themselves, so it
+# survives restarts and is shared by every process on the same DB.
+#
+# Only one worker per DB does the embedding at a time: a lease row in `meta` (owner + expiry)
+# keeps N gunicorn workers from embedding the same rows N times. The others stay idle and
+# take over when the lease expires.
+#
+# If a batch call fails, its rows are retried one by one. A row the API refuses is counted in
+# `embed_failures` and, after EMBED_WORKER_MAX_ATTEMPTS, left out of the queue (it still
+# answers lexically), so one bad value can't stall every fact behind it — even when it is
+# the only row in the batch. Transport, auth, rate-limit and server errors say nothing about
+# the rows: they are an outage, nothing is counted and the error propagates to the back-off
+# loop.
+#
+# Env: EMBED_WORKER=1 (start from app.py), EMBED_WORKER_POLL=2.0 (seconds between scans),
+#      EMBED_WORKER_LEASE=30 (seconds), EMBED_BATCH=64, EMBED_WORKER_MAX_ATTEMPTS=3
+# -------------------------------------------------------------------------------------------
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import sqlite_memory
+from embed_cache import EMBED_BATCH, get_embeddings
+from sqlite_memory import SQLiteMemory, encode_vec
+
+EMBED_WORKER = os.getenv("EMBED_WORKER", "1") == "1"
+EMBED_WORKER_POLL = float(os.getenv("EMBED_WORKER_POLL", "2.0"))
+EMBED_WORKER_LEASE = float(os.getenv("EMBED_WORKER_LEASE", "30"))
+EMBED_WORKER_MAX_ATTEMPTS = int(os.getenv("EMBED_WORKER_MAX_ATTEMPTS", "3"))
+
+# openai's transport errors, matched by name so the (lazy, heavy) openai import isn't needed here
+_TRANSPORT_ERRORS = {"APIConnectionError", "APITimeoutError"}
+
+
+def _is_outage(e: BaseException) -> bool:
+    """True for errors that aren't about the input (network, auth, rate limit, 5xx)."""
+    if isinstance(e, (ConnectionError, TimeoutError)):
+        return True
+    status = getattr(e, "status_code", None)
+    if isinstance(status, int):
+        return status in (401, 403, 408, 429) or status >= 500
+    return any(c.__name__ in _TRANSPORT_ERRORS for c in type(e).__mro__)
+
+
+class EmbedWorker:
+    def __init__(self, memory: Optional[SQLiteMemory] = None, batch_size: int = EMBED_BATCH,
+                 poll: float = EMBED_WORKER_POLL, lease: float = EMBED_WORKER_LEASE,
+                 max_attempts: int = EMBED_WORKER_MAX_ATTEMPTS):
+        self.memory = memory or SQLiteMemory()
+        self.batch_size = batch_size
+        self.poll = poll
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.owner = f"{os.getpid()}-{id(self)}"
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fork_hook = False
+        self.last_fetched = 0  # rows the last run_once() took off the queue (written or not)
+        self.counters = {"batches": 0, "embedded": 0, "errors": 0, "row_failures": 0, "last_batch_at": None,
+                         "last_error": None}
+        conn = self.memory._connect()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS embed_failures (
+                    fact_id INTEGER PRIMARY KEY,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT
+                )
+            """)
+
+    # ---- lease ----------------------------------------------------------------
+    def _acquire_lease(self) -> bool:
+        now = time.time()
+        conn = self.memory._connect()
+        with conn:
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('embed_lease', '')")
+            cur = conn.execute("""
+                UPDATE meta SET value = ? WHERE key = 'embed_lease' AND (
+                    value = '' OR value LIKE ? OR CAST(substr(value, instr(value, ':') + 1) AS REAL) < ?
+                )
+            """, (f"{self.owner}:{now + self.lease}", f"{self.owner}:%", now))
+        return cur.rowcount == 1
+
+    def _release_lease(self):
+        conn = self.memory._connect()
+        with conn:
+            conn.execute("UPDATE meta SET value = '' WHERE key = 'embed_lease' AND value LIKE ?",
+                         (f"{self.owner}:%",))
+
+    # ---- work -----------------------------------------------------------------
+    def run_once(self) -> int:
+        """Embed one batch of pending facts; returns how many rows were written."""
+        client = sqlite_memory.client
+        self.last_fetched = 0
+        if not client:
+            return 0
+        conn = self.memory._connect()
+        rows = conn.execute("""
+            SELECT id, subject, relation, value FROM facts
+            WHERE embedding_vec IS NULL
+              AND id NOT IN (SELECT fact_id FROM embed_failures WHERE attempts >= ?)
+            ORDER BY id LIMIT ?
+        """, (self.max_attempts, self.batch_size)).fetchall()
+        self.last_fetched = len(rows)
+        if not rows:
+            return 0
+
+        texts = [f"{s} {r} {v}" for _, s, r, v in rows]
+        try:
+            vecs = get_embeddings(texts, sqlite_memory.EMBED_MODEL, client, batch_size=self.batch_size)
+        except Exception as e:
+            if _is_outage(e):
+                raise
+            print(f"[EmbedWorker] ⚠️ Batch failed ({e}); retrying {len(rows)} rows one by one")
+            vecs = self._embed_each(conn, rows, texts, client)
+        done = [(row[0], v) for row, v in zip(rows, vecs) if v is not None]
+        if not done:
+            return 0
+
+        gen_before = self.memory.generation()
+        with conn:
+            # rows deleted or embedded by someone else in the meantime are skipped
+            cur = conn.executemany(
+                "UPDATE facts SET embedding_vec = ? WHERE id = ? AND embedding_vec IS NULL",
+                [(encode_vec(v), row_id) for row_id, v in done],
+            )
+            written = cur.rowcount
+            gen_after = self.memory.generation()
+        self.memory._sync_matrix(gen_before, gen_after, written, upserts=done)
+
+        self.counters["batches"] += 1
+        self.counters["embedded"] += written
+        self.counters["last_batch_at"] = time.time()
+        print(f"[EmbedWorker] ✅ Embedded {written} facts (ids {rows[0][0]}..{rows[-1][0]})")
+        return written
+
+    def _embed_each(self, conn, rows, texts, client):
+        vecs, failed = [], []
+        for row, text in zip(rows, texts):
+            try:
+                vecs.append(get_embeddings([text], sqlite_memory.EMBED_MODEL, client)[0])
+            except Exception as e:
+                if _is_outage(e):
+                    self._record_failures(conn, failed)  # refusals seen before the outage still count
+                    raise
+                vecs.append(None)
+                failed.append((row[0], str(e)))
+        self._record_failures(conn, failed)
+        return vecs
+
+    def _record_failures(self, conn, failed):
+        if not failed:
+            return
+        with conn:
+            conn.executemany("""
+                INSERT INTO embed_failures (fact_id, attempts, last_error) VALUES (?, 1, ?)
+                ON CONFLICT(fact_id) DO UPDATE SET attempts = attempts + 1, last_error = excluded.last_error
+            """, failed)
+        self.counters["row_failures"] += len(failed)
+        for row_id, err in failed:
+            print(f"[EmbedWorker] ⚠️ Fact {row_id} failed to embed: {err}")
+
+    def drain(self, max_batches: Optional[int] = None) -> int:
+        """Embed everything pending in the foreground (used by reembed_all.py and tests)."""
+        total, batches = 0, 0
+        while max_batches is None or batches < max_batches:
+            total += self.run_once()
+            batches += 1
+            if not self.last_fetched:  # queue empty; a short write count only means failed rows
+                break
+        return total
+
+    def _run(self):
+        backoff = self.poll
+        while not self._stop.is_set():
+            fetched = 0
+            try:
+                if self._acquire_lease():
+                    self.run_once()
+                    fetched = self.last_fetched
+                backoff = self.poll
+            except Exception as e:
+                self.counters["errors"] += 1
+                self.counters["last_error"] = str(e)
+                print(f"[EmbedWorker] ⚠️ Batch failed: {e}")
+                backoff = min(backoff * 2, 60.0)
+            if fetched >= self.batch_size:
+                continue  # more rows waiting
+            self._wake.wait(backoff)
+            self._wake.clear()
+        try:
+            self._release_lease()
+        except Exception:
+            pass
+
+    # ---- lifecycle ------------------------------------------------------------
+    def start(self) -> "EmbedWorker":
+        if self.running:
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="embed-worker", daemon=True)
+        self._thread.start()
+        sqlite_memory.register_embed_worker(self.memory.db_path, self)
+        if not self._fork_hook and hasattr(os, "register_at_fork"):
+            # threads don't survive fork (gunicorn --preload): restart in the child
+            os.register_at_fork(after_in_child=self._after_fork)
+            self._fork_hook = True
+        print(f"[EmbedWorker] 🚀 Started (batch={self.batch_size}, poll={self.poll}s)")
+        return self
+
+    def _after_fork(self):
+        was_running = self._thread is not None and not self._stop.is_set()
+        self._thread = None
+        self.owner = f"{os.getpid()}-{id(self)}"
+        self._wake = threading.Event()
+        if was_running:
+            self.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        sqlite_memory.register_embed_worker(self.memory.db_path, None)
+
+    def notify(self):
+        self._wake.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def status(self) -> Dict:
+        pending, oldest = self.memory._connect().execute(
+            "SELECT COUNT(*), MIN(created_at) FROM facts WHERE embedding_vec IS NULL"
+        ).fetchone()
+        lease = self.memory._connect().execute("SELECT value FROM meta WHERE key = 'embed_lease'").fetchone()
+        skipped = self.memory._connect().execute(
+            "SELECT COUNT(*) FROM embed_failures WHERE attempts >= ?", (self.max_attempts,)
+        ).fetchone()[0]
+        return {
+            "running": self.running,
+            "pending": pending,
+            "skipped": skipped,
+            "lag_seconds": round(time.time() - oldest, 3) if oldest else 0.0,
+            "lease_owner": (lease[0].split(":")[0] if lease and lease[0] else None),
+            "owner": self.owner,
+            **self.counters,
+        }
+
+
+# simple module-level singleton
+_WORKER: Optional[EmbedWorker] = None
+
+def start_embed_worker(memory: Optional[SQLiteMemory] = None) -> EmbedWorker:
+    global _WORKER
+    if _WORKER is None:
+        _WORKER = EmbedWorker(memory)
+    return _WORKER.start()
+
+def embed_worker_status() -> Dict:
+    if _WORKER is None:
+        return {"running": False}
+    return _WORKER.status()
@@ -1,16 +1,16 @@
 # soulnode_final_one/escalation_core.py
+from keyword_matcher import TRIGGERS, scan
+
+# Simple keyword trigger examples
+emergency_triggers = ["emergency", "override", "critical", "priority", "urgent"]
+TRIGGERS.register("escalation", {"high": emergency_triggers})
 
 def escalate(message: str) -> dict:
     """
     Basic escalation logic for Block 12.
     Returns a dict with a response and escalation level.
     """
-    msg_lower = message.strip().lower()
-
-    # Simple keyword trigger examples
-    emergency_triggers = ["emergency", "override", "critical", "priority", "urgent"]
-
-    if any(trigger in msg_lower for trigger in emergency_triggers):
+    if scan(message.strip()).has("escalation", "high"):
         return {
             "response": "Escalation acknowledged. Switching to high-priority mode.",
             "level": "high"
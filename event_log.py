@@ -0,0 +1,409 @@
+# event_log.py — append-only JSONL event logs (activity, feedback, tester, session, memory logs)
+# -------------------------------------------------------------------------------------------
+# Replaces "json.load the whole array, append one entry, json.dump it back" — O(n) per event
+# and slower with every request — with O(1) appends. A log is addressed by the JSON path it
+# used to live at, so call sites keep their file names:
+#
+#   feedback_log.json              the old array, if present: read first, never rewritten
+#   feedback_log.000001.jsonl ...  rotated segments, oldest first
+#   feedback_log.jsonl             active segment, one JSON object per line
+#
+# Writes: one os.write() of one line on an O_APPEND fd under an in-process lock, so lines from
+# threads and from separate gunicorn workers never interleave. Past EVENT_LOG_SEGMENT_MB the
+# active segment is renamed to the next sequence number under an flock'ed <log>.jsonl.lock;
+# writers whose fd still points at the renamed inode reopen on their next append.
+# fsync policy: always | interval (at most once per EVENT_LOG_FSYNC_SECS) | never.
+# Reads: iter() streams every entry in order, tail(n) reads only the end of the newest
+# segments; a torn last line (crash mid-write) is skipped, not fatal.
+#
+# LogSink takes the write off the request path: submit() is a bounded-queue put; a writer
+# thread drains it in batches (LOG_SINK_BATCH entries or LOG_SINK_FLUSH_MS, whichever first)
+# with one append_many() per log. A full queue drops the entry (counted) unless
+# LOG_SINK_BLOCK_MS allows the caller to wait for room; close() flushes at exit.
+#
+# Env: EVENT_LOG_SEGMENT_MB=8  EVENT_LOG_KEEP=0 (rotated segments kept, 0 = all)
+#      EVENT_LOG_FSYNC=interval  EVENT_LOG_FSYNC_SECS=1.0
+#      LOG_SINK=1 (0 = write inline)  LOG_SINK_QUEUE=10000  LOG_SINK_BATCH=256
+#      LOG_SINK_FLUSH_MS=200  LOG_SINK_BLOCK_MS=0
+# -------------------------------------------------------------------------------------------
+
+import atexit
+import glob
+import json
+import os
+import queue
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: rotation falls back to the in-process lock only
+    fcntl = None
+
+EVENT_LOG_SEGMENT_MB = float(os.getenv("EVENT_LOG_SEGMENT_MB", "8"))
+EVENT_LOG_KEEP = int(os.getenv("EVENT_LOG_KEEP", "0"))
+EVENT_LOG_FSYNC = os.getenv("EVENT_LOG_FSYNC", "interval").strip().lower()
+EVENT_LOG_FSYNC_SECS = float(os.getenv("EVENT_LOG_FSYNC_SECS", "1.0"))
+LOG_SINK = os.getenv("LOG_SINK", "1") == "1"
+LOG_SINK_QUEUE = int(os.getenv("LOG_SINK_QUEUE", "10000"))
+LOG_SINK_BATCH = int(os.getenv("LOG_SINK_BATCH", "256"))
+LOG_SINK_FLUSH_MS = float(os.getenv("LOG_SINK_FLUSH_MS", "200"))
+LOG_SINK_BLOCK_MS = float(os.getenv("LOG_SINK_BLOCK_MS", "0"))
+
+_SEQ = re.compile(r"\.(\d{6,})\.jsonl$")
+
+
+@contextmanager
+def file_lock(path: str):
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def _reverse_lines(path: str, block: int = 1 << 16) -> Iterator[bytes]:
+    """Lines of `path`, last first, reading fixed-size blocks from the end."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        pos, rest = f.tell(), b""
+        while pos > 0:
+            step = min(block, pos)
+            pos -= step
+            f.seek(pos)
+            lines = (f.read(step) + rest).split(b"\n")
+            rest = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line
+        if rest:
+            yield rest
+
+
+class EventLog:
+    def __init__(self, path: str, segment_bytes: int = int(EVENT_LOG_SEGMENT_MB * 1024 * 1024),
+                 keep: int = EVENT_LOG_KEEP, fsync: str = EVENT_LOG_FSYNC,
+                 fsync_secs: float = EVENT_LOG_FSYNC_SECS, legacy_key: Optional[str] = None):
+        self.legacy_path = os.path.abspath(path)
+        self.base = os.path.splitext(self.legacy_path)[0]
+        self.path = self.base + ".jsonl"
+        self.segment_bytes = segment_bytes
+        self.keep = keep
+        self.fsync = fsync
+        self.fsync_secs = fsync_secs
+        self.legacy_key = legacy_key  # old file was {legacy_key: [...], ...} rather than a bare list
+        self._lock = threading.Lock()
+        self._fd: Optional[int] = None
+        self._ino: Optional[int] = None
+        self._pid = os.getpid()
+        self._last_sync = 0.0
+        self._legacy_cache = (None, [])
+        self.counters = {"appended": 0, "bytes": 0, "rotations": 0, "fsyncs": 0, "bad_lines": 0}
+
+    # ---- writing --------------------------------------------------------------
+    def _writer(self) -> int:
+        # reopen after a fork, or after another process rotated the active segment away
+        if self._fd is not None and self._pid != os.getpid():
+            os.close(self._fd)  # the child's copy; the parent keeps its own
+            self._fd, self._pid = None, os.getpid()
+        if self._fd is not None:
+            try:
+                moved = os.stat(self.path).st_ino != self._ino
+            except FileNotFoundError:
+                moved = True
+            if moved:
+                os.close(self._fd)
+                self._fd = None
+        if self._fd is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._ino = os.fstat(self._fd).st_ino
+        return self._fd
+
+    def _sync(self, fd: int, force: bool = False):
+        if self.fsync == "never":
+            return
+        now = time.monotonic()
+        if force or self.fsync == "always" or now - self._last_sync >= self.fsync_secs:
+            os.fsync(fd)
+            self._last_sync = now
+            self.counters["fsyncs"] += 1
+
+    def append(self, entry: Dict[str, Any]):
+        self.append_many([entry])
+
+    def append_many(self, entries: List[Dict[str, Any]]):
+        """All entries in one write() (and at most one fsync)."""
+        if not entries:
+            return
+        data = "".join(json.dumps(e, ensure_ascii=False, default=str) + "\n" for e in entries).encode("utf-8")
+        with self._lock:
+            fd = self._writer()
+            os.write(fd, data)
+            end = os.lseek(fd, 0, os.SEEK_CUR)  # O_APPEND: offset == file size after our write
+            self._sync(fd)
+            self.counters["appended"] += len(entries)
+            self.counters["bytes"] += len(data)
+            if end >= self.segment_bytes:
+                self._rotate(fd)
+
+    def _rotate(self, fd: int):
+        self._sync(fd, force=True)
+        with file_lock(self.path + ".lock"):
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return
+            if st.st_ino != self._ino or st.st_size < self.segment_bytes:
+                return  # another process rotated first
+            rotated = self.rotated()
+            seq = int(_SEQ.search(rotated[-1]).group(1)) + 1 if rotated else 1
+            os.rename(self.path, f"{self.base}.{seq:06d}.jsonl")
+            self.counters["rotations"] += 1
+            if self.keep:
+                for old in self.rotated()[:-self.keep]:
+                    os.remove(old)
+        os.close(self._fd)
+        self._fd = None
+
+    # ---- reading --------------------------------------------------------------
+    def rotated(self) -> List[str]:
+        paths = [p for p in glob.glob(glob.escape(self.base) + ".*.jsonl") if _SEQ.search(p)]
+        return sorted(paths, key=lambda p: int(_SEQ.search(p).group(1)))
+
+    def segments(self) -> List[str]:
+        return self.rotated() + ([self.path] if os.path.exists(self.path) else [])
+
+    def legacy(self) -> List[Dict[str, Any]]:
+        try:
+            st = os.stat(self.legacy_path)
+        except FileNotFoundError:
+            return []
+        sig = (st.st_mtime_ns, st.st_size)
+        if self._legacy_cache[0] != sig:
+            try:
+                with open(self.legacy_path, "r", encoding="utf-8") as f:
+                    raw = json.load(f)
+            except Exception:
+                raw = []
+            if self.legacy_key is not None:
+                raw = raw.get(self.legacy_key, []) if isinstance(raw, dict) else []
+            self._legacy_cache = (sig, raw if isinstance(raw, list) else [])
+        return self._legacy_cache[1]
+
+    def _decode(self, line: bytes) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(line)
+        except ValueError:
+            self.counters["bad_lines"] += 1
+            return None
+
+    def iter(self) -> Iterator[Dict[str, Any]]:
+        """Every entry, oldest first, streamed segment by segment."""
+        yield from self.legacy()
+        for seg in self.segments():
+            try:
+                with open(seg, "rb") as f:
+                    for line in f:
+                        entry = self._decode(line) if line.strip() else None
+                        if entry is not None:
+                            yield entry
+            except FileNotFoundError:  # pruned while we were reading
+                continue
+
+    def read(self) -> List[Dict[str, Any]]:
+        return list(self.iter())
+
+    def tail(self, n: int = 50) -> List[Dict[str, Any]]:
+        """The last n entries, oldest first, without reading the rest of the log."""
+        out: List[Dict[str, Any]] = []
+        for seg in reversed(self.segments()):
+            try:
+                for line in _reverse_lines(seg):
+                    entry = self._decode(line)
+                    if entry is not None:
+                        out.append(entry)
+                        if len(out) >= n:
+                            return out[::-1]
+            except FileNotFoundError:
+                continue
+        legacy = self.legacy()
+        out += legacy[::-1][:n - len(out)]
+        return out[::-1]
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": self.path, "segments": len(self.segments()), "fsync": self.fsync, **self.counters}
+
+
+class LogSink:
+    """Bounded queue + one writer thread in front of any number of EventLogs."""
+
+    def __init__(self, maxsize: int = LOG_SINK_QUEUE, batch: int = LOG_SINK_BATCH,
+                 flush_ms: float = LOG_SINK_FLUSH_MS, block_ms: float = LOG_SINK_BLOCK_MS):
+        self.maxsize = maxsize
+        self.batch = batch
+        self.flush_ms = flush_ms
+        self.block_ms = block_ms
+        self._q: "queue.Queue[Tuple[EventLog, Dict[str, Any]]]" = queue.Queue(maxsize)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._flush_now = threading.Event()
+        self._stop = threading.Event()
+        self._pid: Optional[int] = None
+        self.counters = {"submitted": 0, "written": 0, "dropped": 0, "blocked": 0, "batches": 0,
+                         "errors": 0, "max_depth": 0}
+
+    def _ensure_thread(self):
+        if self._pid == os.getpid() and self._thread is not None:
+            return
+        with self._start_lock:
+            if self._pid == os.getpid() and self._thread is not None:
+                return
+            if self._pid is not None:  # forked child: the parent's queue and thread are not ours
+                self._q = queue.Queue(self.maxsize)
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="log-sink", daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def submit(self, log: EventLog, entry: Dict[str, Any]) -> bool:
+        """Queue one entry; False if it was dropped because the queue stayed full."""
+        self._ensure_thread()
+        self.counters["submitted"] += 1
+        try:
+            self._q.put_nowait((log, entry))
+        except queue.Full:
+            if self.block_ms <= 0:
+                self.counters["dropped"] += 1
+                return False
+            self.counters["blocked"] += 1
+            self._flush_now.set()
+            try:
+                self._q.put((log, entry), timeout=self.block_ms / 1000)
+            except queue.Full:
+                self.counters["dropped"] += 1
+                return False
+        depth = self._q.qsize()
+        if depth > self.counters["max_depth"]:
+            self.counters["max_depth"] = depth
+        return True
+
+    def _collect(self) -> List[Tuple[EventLog, Dict[str, Any]]]:
+        try:
+            items = [self._q.get(timeout=0.5)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_ms / 1000
+        while len(items) < self.batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._flush_now.is_set() or self._stop.is_set():
+                try:  # flushing: take what is already queued, don't wait for more
+                    items.append(self._q.get_nowait())
+                    continue
+                except queue.Empty:
+                    break
+            try:
+                items.append(self._q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _write(self, items: List[Tuple[EventLog, Dict[str, Any]]]):
+        by_log: Dict[int, Tuple[EventLog, List[Dict[str, Any]]]] = {}
+        for log, entry in items:
+            by_log.setdefault(id(log), (log, []))[1].append(entry)
+        for log, entries in by_log.values():
+            try:
+                log.append_many(entries)
+                self.counters["written"] += len(entries)
+            except Exception as e:
+                self.counters["errors"] += 1
+                print(f"[LogSink ⚠️] write to {os.path.basename(log.path)} failed: {e}")
+        self.counters["batches"] += 1
+        for _ in items:
+            self._q.task_done()
+
+    def _run(self):
+        q = self._q
+        while not (self._stop.is_set() and q.empty()):
+            items = self._collect()
+            if items:
+                self._write(items)
+            elif self._flush_now.is_set():
+                self._flush_now.clear()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until everything submitted so far is written (True) or timeout (False)."""
+        if self._thread is None or self._pid != os.getpid():
+            return True
+        self._flush_now.set()
+        deadline = time.monotonic() + timeout
+        with self._q.all_tasks_done:
+            while self._q.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._q.all_tasks_done.wait(remaining)
+        self._flush_now.clear()
+        return True
+
+    def close(self, timeout: float = 5.0):
+        self.flush(timeout)
+        self._stop.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        running = self._thread is not None and self._thread.is_alive() and self._pid == os.getpid()
+        return {"running": running, "depth": self._q.qsize(), "maxsize": self.maxsize, "batch": self.batch,
+                "flush_ms": self.flush_ms, **self.counters}
+
+
+# simple module-level singletons, one per log
+_LOGS: Dict[str, EventLog] = {}
+_LOGS_LOCK = threading.Lock()
+
+def get_log(path: str, **kwargs) -> EventLog:
+    """Shared EventLog for `path`; kwargs only apply when the log is first opened."""
+    key = os.path.abspath(path)
+    log = _LOGS.get(key)
+    if log is None:
+        with _LOGS_LOCK:
+            log = _LOGS.get(key)
+            if log is None:
+                log = _LOGS[key] = EventLog(path, **kwargs)
+    return log
+
+def append_event(path: str, entry: Dict[str, Any]):
+    get_log(path).append(entry)
+
+_SINK: Optional[LogSink] = None
+
+def get_sink() -> LogSink:
+    global _SINK
+    if _SINK is None:
+        with _LOGS_LOCK:
+            if _SINK is None:
+                _SINK = LogSink()
+                atexit.register(_SINK.close)
+    return _SINK
+
+def submit_event(target, entry: Dict[str, Any]) -> bool:
+    """Fire-and-forget append through the shared LogSink (inline when LOG_SINK=0). `target` is a
+    log path or any object with append_many(entries), e.g. the analytics store."""
+    log = get_log(target) if isinstance(target, str) else target
+    if not LOG_SINK:
+        log.append_many([entry])
+        return True
+    return get_sink().submit(log, entry)
+
+def read_events(path: str) -> List[Dict[str, Any]]:
+    return get_log(path).read()
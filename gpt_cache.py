@@ -0,0 +1,244 @@
+# gpt_cache.py — response cache for GPT fallback answers
+# -------------------------------------------------------------------------------------------
+# Key = sha256(model + sha256(system prompt) + memory generation + scope + normalized question).
+# The memory generation is part of the key, so any teach/forget makes older answers
+# unreachable — a cached answer never predates the facts it was given. Two tiers, like
+# embed_cache:
+#   1) in-process LRU (OrderedDict) with per-entry expiry
+#   2) SQLite table (data/gpt_cache.db via sqlite_pool) — shared by every gunicorn worker,
+#      trimmed oldest-last_used-first past GPT_CACHE_MAX_ROWS, expired rows ignored + swept
+# Optional near-duplicate matching (GPT_CACHE_SEMANTIC=1): on an exact miss the question is
+# embedded (through embed_cache) and compared against recent in-process entries with the same
+# model/system/generation/scope; cosine ≥ GPT_CACHE_SIM counts as a hit.
+#
+# Env: GPT_CACHE=1  GPT_CACHE_PATH  GPT_CACHE_TTL=86400  GPT_CACHE_MEM_ITEMS=1024
+#      GPT_CACHE_MAX_ROWS=20000  GPT_CACHE_SEMANTIC=0  GPT_CACHE_SIM=0.95
+# -------------------------------------------------------------------------------------------
+
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from sqlite_pool import get_pool
+
+GPT_CACHE = os.getenv("GPT_CACHE", "1") == "1"
+GPT_CACHE_PATH = os.getenv("GPT_CACHE_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "gpt_cache.db"
+)
+GPT_CACHE_TTL = float(os.getenv("GPT_CACHE_TTL", "86400"))
+GPT_CACHE_MEM_ITEMS = int(os.getenv("GPT_CACHE_MEM_ITEMS", "1024"))
+GPT_CACHE_MAX_ROWS = int(os.getenv("GPT_CACHE_MAX_ROWS", "20000"))
+GPT_CACHE_SEMANTIC = os.getenv("GPT_CACHE_SEMANTIC", "0") == "1"
+GPT_CACHE_SIM = float(os.getenv("GPT_CACHE_SIM", "0.95"))
+
+_PUNCT = re.compile(r"[^\w\s']+")
+_WS = re.compile(r"\s+")
+
+Embedder = Callable[[str], Optional[np.ndarray]]
+
+
+def normalize_question(text: str) -> str:
+    t = (text or "").lower().replace("’", "'")
+    return _WS.sub(" ", _PUNCT.sub(" ", t)).strip()
+
+
+def _sha(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, db_path: str = GPT_CACHE_PATH, ttl: float = GPT_CACHE_TTL,
+                 mem_items: int = GPT_CACHE_MEM_ITEMS, max_rows: int = GPT_CACHE_MAX_ROWS,
+                 embedder: Optional[Embedder] = None, sim: float = GPT_CACHE_SIM):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.pool = get_pool(db_path)
+        self.ttl = ttl
+        self.mem_items = mem_items
+        self.max_rows = max_rows
+        self.embedder = embedder  # None disables near-duplicate matching
+        self.sim = sim
+        # key -> (answer, created, scope, question vector or None, cost_ms)
+        self._mem: "OrderedDict[str, Tuple[str, float, str, Optional[np.ndarray], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self.counters = {"hits": 0, "disk_hits": 0, "semantic_hits": 0, "misses": 0, "stores": 0,
+                         "expired": 0, "evicted": 0, "saved_ms": 0.0}
+        conn = self.pool.connection()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    scope TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    cost_ms REAL NOT NULL DEFAULT 0
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+
+    # ---- keys -----------------------------------------------------------------
+    @staticmethod
+    def scope_key(model: str, system: str, generation: int, scope: str = "") -> str:
+        """Everything but the question: entries only ever match within one scope."""
+        return _sha(f"{model}\x00{_sha(system)}\x00{generation}\x00{scope}")
+
+    @staticmethod
+    def key(question: str, scope_key: str) -> str:
+        return _sha(f"{scope_key}\x00{normalize_question(question)}")
+
+    # ---- tiers ----------------------------------------------------------------
+    def _mem_get(self, key: str, now: float) -> Optional[Tuple[str, float]]:
+        """(answer, cost_ms) for a live entry."""
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is None:
+                return None
+            if entry[1] + self.ttl < now:
+                del self._mem[key]
+                self.counters["expired"] += 1
+                return None
+            self._mem.move_to_end(key)
+            return entry[0], entry[4]
+
+    def _mem_put(self, key: str, answer: str, created: float, scope: str, vec=None, cost_ms: float = 0.0):
+        with self._lock:
+            self._mem[key] = (answer, created, scope, vec, cost_ms)
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.mem_items:
+                self._mem.popitem(last=False)
+
+    def _semantic_get(self, question: str, scope: str, now: float) -> Optional[Tuple[str, float]]:
+        try:
+            q = self.embedder(normalize_question(question))
+        except Exception as e:
+            print(f"[GPTCache ⚠️] embedding failed: {e}")
+            return None
+        if q is None:
+            return None
+        with self._lock:
+            cands = [e for e in self._mem.values()
+                     if e[2] == scope and e[3] is not None and e[1] + self.ttl >= now]
+        if not cands:
+            return None
+        mat = np.stack([e[3] for e in cands])
+        sims = mat @ q / (np.linalg.norm(mat, axis=1) * (np.linalg.norm(q) or 1.0) + 1e-12)
+        i = int(np.argmax(sims))
+        return (cands[i][0], cands[i][4]) if sims[i] >= self.sim else None
+
+    # ---- public API -----------------------------------------------------------
+    def get(self, question: str, scope: str) -> Optional[str]:
+        now = time.time()
+        key = self.key(question, scope)
+        hit = self._mem_get(key, now)
+        if hit is None:
+            row = self.pool.connection().execute(
+                "SELECT answer, created, cost_ms FROM responses WHERE key=? AND created>=?",
+                (key, now - self.ttl),
+            ).fetchone()
+            if row is not None:
+                hit = (row[0], row[2])
+                self._mem_put(key, row[0], row[1], scope, cost_ms=row[2])
+                self.counters["disk_hits"] += 1
+                conn = self.pool.connection()
+                with conn:
+                    conn.execute("UPDATE responses SET last_used=? WHERE key=?", (now, key))
+        if hit is not None:
+            self.counters["hits"] += 1
+            self.counters["saved_ms"] += hit[1]
+            return hit[0]
+        if self.embedder is not None:
+            near = self._semantic_get(question, scope, now)
+            if near is not None:
+                self.counters["semantic_hits"] += 1
+                self.counters["saved_ms"] += near[1]
+                return near[0]
+        self.counters["misses"] += 1
+        return None
+
+    def put(self, question: str, answer: str, scope: str, cost_ms: float = 0.0):
+        if not answer:
+            return
+        now = time.time()
+        key = self.key(question, scope)
+        vec = None
+        if self.embedder is not None:
+            try:
+                vec = self.embedder(normalize_question(question))  # embed_cache hit after get()
+            except Exception:
+                vec = None
+        self._mem_put(key, answer, now, scope, vec, cost_ms)
+        conn = self.pool.connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, scope, answer, created, last_used, cost_ms) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, scope, answer, now, now, cost_ms),
+            )
+        self.counters["stores"] += 1
+        self._writes_since_evict += 1
+        if self._writes_since_evict >= 64:
+            self._writes_since_evict = 0
+            self.evict()
+
+    def cached(self, question: str, scope: str, compute: Callable[[], Optional[str]]) -> Tuple[Optional[str], bool]:
+        """(answer, was_cached): serve from cache or run compute() and store its answer."""
+        answer = self.get(question, scope)
+        if answer is not None:
+            return answer, True
+        t0 = time.perf_counter()
+        answer = compute()
+        if answer:
+            self.put(question, answer, scope, cost_ms=(time.perf_counter() - t0) * 1000)
+        return answer, False
+
+    def evict(self) -> int:
+        conn = self.pool.connection()
+        with conn:
+            expired = conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)).rowcount
+            n = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            extra = max(0, n - self.max_rows)
+            if extra:
+                conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)",
+                    (extra,),
+                )
+        self.counters["evicted"] += expired + extra
+        return expired + extra
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+        conn = self.pool.connection()
+        with conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict:
+        c = dict(self.counters)
+        lookups = c["hits"] + c["semantic_hits"] + c["misses"]
+        c["hit_rate"] = round((c["hits"] + c["semantic_hits"]) / lookups, 4) if lookups else 0.0
+        c["saved_ms"] = round(c["saved_ms"], 1)
+        c["mem_items"] = len(self._mem)
+        c["semantic"] = self.embedder is not None
+        c["db_path"] = self.pool.db_path
+        return c
+
+
+# simple module-level singleton
+_CACHE: Optional[ResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+def get_response_cache(embedder: Optional[Embedder] = None) -> ResponseCache:
+    """Shared cache; `embedder` is only used (and only when GPT_CACHE_SEMANTIC=1) on first call."""
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = ResponseCache(embedder=embedder if GPT_CACHE_SEMANTIC else None)
+    return _CACHE
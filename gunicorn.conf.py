@@ -0,0 +1,31 @@
+# gunicorn.conf.py — `gunicorn 'app:create_app()'` picks this file up automatically
+# -------------------------------------------------------------------------------------------
+# preload_app: the master imports app.py and runs create_app() (the lifecycle boot steps:
+# sweep, identity + file preload, relation vocabulary) ONCE, then forks. Workers inherit the
+# warmed module state copy-on-write instead of each repeating the boot, so a restart or
+# scale-up serves its first request without the startup delay.
+# Fork safety rests on the master staying single-threaded: a thread running at fork time
+# can hold a lock (a pool's, the embed cache's) that the child then inherits held forever.
+# So BOOT_DEFER_PROCESS_STEPS=1 keeps the thread-starting steps (embed worker, pam warmup)
+# out of the master's boot, and post_fork runs them in each worker. sqlite_pool reopens
+# connections per pid, so the master's connections are never used by a worker.
+#
+# Env: PORT=8080  WEB_CONCURRENCY=2  GUNICORN_THREADS=4  GUNICORN_TIMEOUT=120
+# -------------------------------------------------------------------------------------------
+
+import os
+
+os.environ["BOOT_DEFER_PROCESS_STEPS"] = "1"  # read when app.py (lifecycle.BOOT) is imported
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8080')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_app = True
+
+
+def post_fork(server, worker):
+    import app
+    app.BOOT.run_process()  # embed worker + pam warmup threads, started in this worker only
+    server.log.info(f"[Boot] worker {worker.pid} forked from booted master "
+                    f"(boot_pid={app.BOOT.status()['boot_pid']}, {app.BOOT.total_ms} ms)")
@@ -0,0 +1,128 @@
+# hybrid_retriever.py — one-call fact retrieval: exact keys + FTS5 + vectors, fused with RRF
+# -------------------------------------------------------------------------------------------
+# Every source returns ranked candidates [(fact_id, subject, relation, value, raw_score)].
+# Sources run concurrently (the vector side may be waiting on an embedding call); any source
+# that hasn't answered when the latency budget runs out is dropped and reported, not awaited.
+# A "decisive" source (the app's exact-key lookup) that comes back confident ends the wait early.
+#
+# Fusion is reciprocal rank fusion:  score(fact) = Σ_source weight / (HYBRID_RRF_K + rank)
+# so raw scores on different scales (bm25, cosine) never have to be compared. A hit is
+# "confident" when at least one source vouches for it on its own scale: an exact key match,
+# cosine ≥ HYBRID_VECTOR_MIN, or a lexical hit whose relation words all appear in the query.
+#
+# Env: HYBRID_BUDGET_MS=800  HYBRID_RRF_K=60  HYBRID_VECTOR_MIN=0.45
+# -------------------------------------------------------------------------------------------
+
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlite_memory import content_tokens
+
+HYBRID_BUDGET_MS = float(os.getenv("HYBRID_BUDGET_MS", "800"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+HYBRID_VECTOR_MIN = float(os.getenv("HYBRID_VECTOR_MIN", "0.45"))
+
+Row = Tuple[int, str, str, str, float]
+SourceFn = Callable[[str, int, Dict[str, Any]], List[Row]]
+ConfidentFn = Callable[[str, Row], bool]
+
+# shared by every retriever; sources are short I/O-bound calls
+_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="hybrid")
+
+
+def _relation_named(query: str, row: Row) -> bool:
+    rel = content_tokens(row[2])
+    return bool(rel) and rel <= content_tokens(query)
+
+
+class HybridRetriever:
+    def __init__(self, memory, rrf_k: int = HYBRID_RRF_K, budget_ms: float = HYBRID_BUDGET_MS,
+                 vector_min: float = HYBRID_VECTOR_MIN):
+        self.memory = memory
+        self.rrf_k = rrf_k
+        self.budget_ms = budget_ms
+        self.vector_min = vector_min
+        self.sources: Dict[str, Tuple[SourceFn, float, ConfidentFn]] = {}
+        self.decisive = set()
+        self.add_source("lexical", lambda q, k, ctx: memory.lexical_search(q, k, match_any=True),
+                        confident=_relation_named)
+        self.add_source("vector", lambda q, k, ctx: memory.vector_search(q, k),
+                        confident=lambda q, row: row[4] >= self.vector_min)
+
+    def add_source(self, name: str, fn: SourceFn, weight: float = 1.0,
+                   confident: Optional[ConfidentFn] = None, decisive: bool = False):
+        """Register (or replace) a candidate generator fn(query, k, ctx) -> [Row].
+        decisive: once this source returns a confident row, stop waiting for the others."""
+        self.sources[name] = (fn, weight, confident or (lambda q, row: False))
+        if decisive:
+            self.decisive.add(name)
+        else:
+            self.decisive.discard(name)
+
+    def _run(self, fn: SourceFn, query: str, k: int, ctx: Dict[str, Any]):
+        t0 = time.perf_counter()
+        rows = fn(query, k, ctx)
+        return rows, (time.perf_counter() - t0) * 1000
+
+    def _decided(self, query: str, futures) -> bool:
+        for name in self.decisive:
+            fut = futures.get(name)
+            if fut is not None and fut.done() and fut.exception() is None:
+                confident = self.sources[name][2]
+                if any(confident(query, row) for row in fut.result()[0]):
+                    return True
+        return False
+
+    def retrieve(self, query: str, k: int = 5, budget_ms: Optional[float] = None, **ctx) -> Dict[str, Any]:
+        """Top-k facts for `query` → {"hits": [...], "ms", "sources", "timed_out"}.
+        Each hit: id, subject, relation, value, score (RRF), confident, provenance
+        ({source: {"rank", "score"}})."""
+        t0 = time.perf_counter()
+        budget = (self.budget_ms if budget_ms is None else budget_ms) / 1000
+        futures = {name: _EXECUTOR.submit(self._run, fn, query, k, ctx)
+                   for name, (fn, _, _) in self.sources.items()}
+        pending = set(futures.values())
+        deadline = t0 + budget
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.perf_counter()),
+                                 return_when=FIRST_COMPLETED)
+            if not done or self._decided(query, futures):
+                break
+
+        fused: Dict[int, Dict[str, Any]] = {}
+        report: Dict[str, Any] = {}
+        timed_out: List[str] = []
+        for name, fut in futures.items():
+            if not fut.done():
+                fut.cancel()
+                timed_out.append(name)
+                continue
+            try:
+                rows, ms = fut.result()
+            except Exception as e:
+                print(f"[Hybrid ⚠️] source {name} failed: {e}")
+                report[name] = {"error": str(e)}
+                continue
+            report[name] = {"n": len(rows), "ms": round(ms, 3)}
+            _, weight, confident = self.sources[name]
+            for rank, row in enumerate(rows, start=1):
+                fid, sub, rel, val, raw = row
+                hit = fused.setdefault(fid, {"id": fid, "subject": sub, "relation": rel, "value": val,
+                                             "score": 0.0, "confident": False, "provenance": {}})
+                hit["score"] += weight / (self.rrf_k + rank)
+                hit["provenance"][name] = {"rank": rank, "score": round(float(raw), 4)}
+                if not hit["confident"] and confident(query, row):
+                    hit["confident"] = True
+
+        # confident hits first, then fused score
+        hits = sorted(fused.values(), key=lambda h: (h["confident"], h["score"]), reverse=True)[:k]
+        for h in hits:
+            h["score"] = round(h["score"], 6)
+        return {
+            "hits": hits,
+            "ms": round((time.perf_counter() - t0) * 1000, 3),
+            "sources": report,
+            "timed_out": timed_out,
+        }
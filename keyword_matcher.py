@@ -0,0 +1,149 @@
+# keyword_matcher.py — one-pass multi-phrase trigger matching (Aho-Corasick, pure Python)
+# -------------------------------------------------------------------------------------------
+# Every keyword table in the app (tone/emotion, identity, relation keywords, escalation,
+# style, predict_tone) registers here under a namespace:
+#
+#   TRIGGERS.register("escalation", {"high": ["emergency", "urgent", ...]})
+#   hits = scan(text)                       # one pass over the text, all namespaces at once
+#   hits.has("escalation", "high")          # any(p in t for p in ...) equivalent
+#   hits.first_tag("tone", order)           # first tag of an if/elif chain that matched
+#
+# Matching is on the lowercased text with plain substring semantics (same answers as the
+# `any(x in t for x in [...])` scans it replaces), overlapping phrases included. The
+# automaton is rebuilt lazily after a register() and scan() results for recent texts are
+# memoized, so several consumers reading the same message pay for a single pass.
+# -------------------------------------------------------------------------------------------
+
+import threading
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+
+class Hits:
+    """Tagged matches for one text: {(namespace, tag): [phrases, in text order]}."""
+
+    __slots__ = ("_by_tag", "_namespaces")
+
+    def __init__(self, by_tag: Dict[Tuple[str, str], List[str]]):
+        self._by_tag = by_tag
+        self._namespaces: FrozenSet[str] = frozenset(ns for ns, _ in by_tag)
+
+    def has(self, namespace: str, tag: Optional[str] = None) -> bool:
+        if tag is None:
+            return namespace in self._namespaces
+        return (namespace, tag) in self._by_tag
+
+    def tags(self, namespace: str) -> List[str]:
+        return [tag for ns, tag in self._by_tag if ns == namespace]
+
+    def phrases(self, namespace: str, tag: str) -> List[str]:
+        return list(self._by_tag.get((namespace, tag), ()))
+
+    def first_tag(self, namespace: str, order: Sequence[str]) -> Optional[str]:
+        for tag in order:
+            if (namespace, tag) in self._by_tag:
+                return tag
+        return None
+
+    def __bool__(self):
+        return bool(self._by_tag)
+
+    def __repr__(self):
+        return f"Hits({dict(self._by_tag)})"
+
+
+class KeywordMatcher:
+    def __init__(self):
+        self._tables: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+        self._lock = threading.Lock()
+        self._automaton = None  # (goto, fail, out, dfa) — None until (re)built
+
+    # ---- registration ---------------------------------------------------------
+    def register(self, namespace: str, table: Mapping[str, Iterable[str]]) -> "KeywordMatcher":
+        """Set (replace) a namespace's {tag: phrases} table."""
+        with self._lock:
+            self._tables[namespace] = {tag: tuple(p.lower() for p in phrases if p)
+                                       for tag, phrases in table.items()}
+            self._automaton = None
+        self._scan_cached.cache_clear()
+        return self
+
+    def _build(self):
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[Tuple[str, str, str]]] = [[]]
+        for ns, table in self._tables.items():
+            for tag, phrases in table.items():
+                for phrase in phrases:
+                    s = 0
+                    for ch in phrase:
+                        nxt = goto[s].get(ch)
+                        if nxt is None:
+                            nxt = len(goto)
+                            goto[s][ch] = nxt
+                            goto.append({})
+                            out.append([])
+                        s = nxt
+                    out[s].append((ns, tag, phrase))
+
+        # breadth-first failure links; outputs of the fallback state are merged in
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            s = queue.popleft()
+            for ch, nxt in goto[s].items():
+                queue.append(nxt)
+                f = fail[s]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0) if goto[f].get(ch, 0) != nxt else 0
+                out[nxt] = out[nxt] + out[fail[nxt]]
+        # dfa: goto completed lazily with failure transitions, so a step is one dict lookup
+        return goto, fail, [tuple(o) for o in out], [dict(g) for g in goto]
+
+    # ---- matching -------------------------------------------------------------
+    def find(self, text: str) -> List[Tuple[int, str, str, str]]:
+        """Every (end_index, namespace, tag, phrase) occurrence in one left-to-right pass."""
+        automaton = self._automaton
+        if automaton is None:
+            with self._lock:
+                if self._automaton is None:
+                    self._automaton = self._build()
+                automaton = self._automaton
+        goto, fail, out, dfa = automaton
+        found = []
+        s = 0
+        for i, ch in enumerate((text or "").lower()):
+            nxt = dfa[s].get(ch)
+            if nxt is None:
+                # first time this (state, char) is seen: follow failure links once, then memoize
+                f = s
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                nxt = dfa[s][ch] = goto[f].get(ch, 0)
+            s = nxt
+            if out[s]:
+                found.extend((i, ns, tag, phrase) for ns, tag, phrase in out[s])
+        return found
+
+    def scan(self, text: str) -> Hits:
+        return self._scan_cached((text or "").lower())
+
+    @lru_cache(maxsize=512)
+    def _scan_cached(self, lowered: str) -> Hits:
+        by_tag: Dict[Tuple[str, str], List[str]] = {}
+        for _, ns, tag, phrase in self.find(lowered):
+            by_tag.setdefault((ns, tag), []).append(phrase)
+        return Hits(by_tag)
+
+    def stats(self) -> Dict:
+        phrases = sum(len(p) for t in self._tables.values() for p in t.values())
+        return {"namespaces": sorted(self._tables), "phrases": phrases,
+                "states": len(self._automaton[0]) if self._automaton else None}
+
+
+# simple module-level singleton shared by every consumer
+TRIGGERS = KeywordMatcher()
+
+def scan(text: str) -> Hits:
+    return TRIGGERS.scan(text)
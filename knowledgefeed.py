@@ -27,10 +27,15 @@ class KnowledgeFeed:
     On any error or unknown shape, the file is skipped instead of crashing the app.
     """
 
+    FLUSH_EVERY = 512  # rows buffered before a bulk remember_many call
+
     def __init__(self, mem, root: Optional[str | Path] = "knowledge"):
         self.mem = mem
         self.root = Path(root) if root else Path("knowledge")
         self.stats = {"files": 0, "saved": 0, "skipped_files": 0, "skipped_rows": 0, "errors": []}
+        # SQLiteMemory-style stores get batched embeddings + one transaction per flush
+        self._bulk = hasattr(mem, "remember_many")
+        self._buffer: List[tuple] = []
 
     # ---- Public API ---------------------------------------------------------
     def ingest_paths(self, targets: Optional[Iterable[str | Path]] = None) -> Dict[str, Any]:
@@ -38,6 +43,7 @@ class KnowledgeFeed:
             targets = [self.root]
         for t in targets:
             self._ingest_target(Path(t))
+        self._flush()
         return {"ok": True, **self.stats}
 
     # Back-compat alias (your app.py may call this)
@@ -81,12 +87,32 @@ class KnowledgeFeed:
 
     # ---- Parsers ------------------------------------------------------------
     def _save(self, subject: str, relation: str, obj: Any):
+        if self._bulk:
+            self._buffer.append((subject, relation, str(obj)))
+            if len(self._buffer) >= self.FLUSH_EVERY:
+                self._flush()
+            return
         ok, _ = self.mem.save_fact(subject, relation, obj)
         if ok:
             self.stats["saved"] += 1
         else:
             self.stats["skipped_rows"] += 1
 
+    def _flush(self):
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        try:
+            res = self.mem.remember_many(rows) or {}
+            saved = int(res.get("facts", len(rows)))
+            self.stats["saved"] += saved
+            self.stats["skipped_rows"] += len(rows) - saved
+            if "facts_per_sec" in res:
+                self.stats["facts_per_sec"] = res["facts_per_sec"]
+        except Exception as e:
+            self.stats["errors"].append(f"bulk save: {e}")
+            self.stats["skipped_rows"] += len(rows)
+
     def _ingest_txt(self, f: Path):
         text = f.read_text(encoding="utf-8", errors="ignore")
         # 1) Triple lines: "A | rel | B"
@@ -0,0 +1,148 @@
+# lifecycle.py — application lifecycle: lazy singletons + explicit, run-once boot steps
+# -------------------------------------------------------------------------------------------
+# Importing a module should only define things. Two helpers keep it that way:
+#
+#   memory = lazy(SQLiteMemory, "memory")   # proxy; the real object is built on first use
+#   BOOT = Boot()
+#   @BOOT.step("sanitize")                  # registered now, run by BOOT.run() — once, inherited by forks
+#   def _sanitize(): memory.sanitize_all()
+#   @BOOT.step("worker", per_process=True)  # starts threads: run by BOOT.run_process() — once per pid
+#
+# A Lazy proxy forwards attribute access / truthiness to the object its factory returns
+# (factories may return None, e.g. "no API key" → falsy, same as a plain `client = None`).
+# Boot steps run in registration order; a failing step is logged and recorded, never raised,
+# matching the old try/except-at-import blocks. Under gunicorn with preload_app the master
+# runs the boot once and workers inherit the warmed state copy-on-write (see gunicorn.conf.py).
+# Steps that start threads are per-process: threads don't survive fork, and a thread running
+# in the master could hold a lock at fork time that the child then inherits held. run() also
+# runs them unless BOOT_DEFER_PROCESS_STEPS=1 (set by gunicorn.conf.py, whose post_fork hook
+# runs them in each worker instead), so the preloading master stays thread-free.
+#
+# Env: BOOT_DEFER_PROCESS_STEPS=0 -------------------------------------------------------------------------------------------
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+_MISSING = object()
+
+
+class Lazy:
+    __slots__ = ("_lazy_factory", "_lazy_name", "_lazy_obj", "_lazy_lock")
+
+    def __init__(self, factory: Callable[[], Any], name: str = ""):
+        object.__setattr__(self, "_lazy_factory", factory)
+        object.__setattr__(self, "_lazy_name", name or getattr(factory, "__name__", "lazy"))
+        object.__setattr__(self, "_lazy_obj", _MISSING)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+
+    def _get(self):
+        obj = self._lazy_obj
+        if obj is _MISSING:
+            with self._lazy_lock:
+                obj = self._lazy_obj
+                if obj is _MISSING:
+                    obj = self._lazy_factory()
+                    object.__setattr__(self, "_lazy_obj", obj)
+        return obj
+
+    @property
+    def loaded(self) -> bool:
+        return self._lazy_obj is not _MISSING
+
+    def reset(self):
+        """Drop the built object; the next use rebuilds it."""
+        object.__setattr__(self, "_lazy_obj", _MISSING)
+
+    def __getattr__(self, name):
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._get(), name, value)
+
+    def __bool__(self):
+        return bool(self._get())
+
+    def __repr__(self):
+        state = repr(self._lazy_obj) if self.loaded else "not built"
+        return f"<lazy {self._lazy_name}: {state}>"
+
+
+def lazy(factory: Callable[[], Any], name: str = "") -> Any:
+    return Lazy(factory, name)
+
+
+class Boot:
+    def __init__(self):
+        self._steps: List[Tuple[str, Callable[[], Any]]] = []
+        self._process_steps: List[Tuple[str, Callable[[], Any]]] = []
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._process_pid: Optional[int] = None
+        self.defer_process_steps = os.getenv("BOOT_DEFER_PROCESS_STEPS", "0") == "1"
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.total_ms = 0.0
+
+    def step(self, name: str, per_process: bool = False):
+        """Decorator: register fn as a boot step (replaces a step of the same name).
+        per_process steps (anything that starts a thread) run once in every process instead."""
+        def register(fn):
+            self._steps = [(n, f) for n, f in self._steps if n != name]
+            self._process_steps = [(n, f) for n, f in self._process_steps if n != name]
+            (self._process_steps if per_process else self._steps).append((name, fn))
+            return fn
+        return register
+
+    def _run_steps(self, steps: List[Tuple[str, Callable[[], Any]]]):
+        for name, fn in steps:
+            t0 = time.perf_counter()
+            try:
+                fn()
+                res: Dict[str, Any] = {"ok": True}
+            except Exception as e:
+                print(f"[Boot ⚠️] {name} failed: {e}")
+                res = {"ok": False, "error": str(e)}
+            res["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+            self.results[name] = res
+
+    @property
+    def booted(self) -> bool:
+        return self._pid is not None
+
+    def run(self) -> bool:
+        """Run every step once; later calls (and forked children of a booted process) are no-ops.
+        Returns True if this call did the boot."""
+        if self._pid is not None:
+            return False
+        with self._lock:
+            if self._pid is not None:
+                return False
+            t_all = time.perf_counter()
+            self._run_steps(self._steps)
+            self.total_ms = round((time.perf_counter() - t_all) * 1000, 1)
+            self._pid = os.getpid()
+            print(f"[Boot] ✅ {len(self._steps)} step(s) in {self.total_ms} ms (pid {self._pid})")
+        if not self.defer_process_steps:
+            self.run_process()
+        return True
+
+    def run_process(self) -> bool:
+        """Run the per-process steps once in this pid (a forked child runs them again).
+        Returns True if this call ran them."""
+        pid = os.getpid()
+        if self._process_pid == pid:
+            return False
+        with self._lock:
+            if self._process_pid == pid:
+                return False
+            self._run_steps(self._process_steps)
+            self._process_pid = pid
+            if self._process_steps:
+                print(f"[Boot] ✅ {len(self._process_steps)} per-process step(s) (pid {pid})")
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        return {"booted": self.booted, "boot_pid": self._pid, "pid": os.getpid(),
+                "steps": [n for n, _ in self._steps], "process_steps": [n for n, _ in self._process_steps],
+                "process_pid": self._process_pid, "results": self.results, "total_ms": self.total_ms}
@@ -1,6 +1,9 @@
 import json
 from datetime import datetime
 
+from event_log import append_event, read_events
+from keyword_matcher import TRIGGERS, scan
+
 def load_session_memory(file_path):
     try:
         with open(file_path, "r") as f:
@@ -52,25 +55,12 @@ def promote_memory_entry(user_input, tone, context, importance):
         "importance": int(importance)
     }
 
-    try:
-        with open("SessionMemory.json", "r") as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        data = []
-
-    data.append(entry)
-
-    with open("SessionMemory.json", "w") as f:
-        json.dump(data, f, indent=2)
+    append_event("SessionMemory.json", entry)
 
     return "Memory entry promoted successfully."
 
 def match_memory_by_tone_and_input(user_input, predicted_tone):
-    try:
-        with open("soulnode_memory.json", "r") as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+    data = read_events("soulnode_memory.json")
 
     matches = []
     for entry in data:
@@ -94,11 +84,13 @@ def summarize_responses_by_topic(topic):
     else:
         return f"No summary found for topic: {topic}"
 
+TRIGGERS.register("predict_tone", {"Chill": ["tired", "calm"], "Heart": ["love", "purpose"]})
+
 def predict_tone(user_input):
-    input_lower = user_input.lower()
-    if "tired" in input_lower or "calm" in input_lower:
+    hits = scan(user_input)
+    if hits.has("predict_tone", "Chill"):
         return "Chill", "Detected 'tired' or 'calm' in input — Chill mode"
-    elif "love" in input_lower or "purpose" in input_lower:
+    elif hits.has("predict_tone", "Heart"):
         return "Heart", "Detected 'love' or 'purpose' in input — Heart mode"
     else:
         return "Beast", "No specific trigger found. Defaulting to Beast tone."
\ No newline at end of file
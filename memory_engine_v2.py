@@ -1,4 +1,4 @@
-import json
+from event_log import append_event
 
 def save_memory_entry(user_input, response, tone, topic):
     entry = {
@@ -8,15 +8,6 @@ def save_memory_entry(user_input, response, tone, topic):
         "topic": topic
     }
 
-    try:
-        with open("soulnode_memory.json", "r") as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        data = []
-
-    data.append(entry)
-
-    with open("soulnode_memory.json", "w") as f:
-        json.dump(data, f, indent=2)
+    append_event("soulnode_memory.json", entry)
 
     return f"Memory saved for input: {user_input}"
\ No newline at end of file
@@ -2,6 +2,8 @@ from pathlib import Path
 import json
 from typing import List, Dict, Any
 
+from event_log import read_events
+
 # Returns a list of dicts like {"content": "..."} for the given user_id.
 # It looks for common files you already have; falls back to an empty list.
 def get_all_memories(user_id: str) -> List[Dict[str, Any]]:
@@ -15,12 +17,15 @@ def get_all_memories(user_id: str) -> List[Dict[str, Any]]:
 
     entries: List[Dict[str, Any]] = []
     for p in candidates:
-        if not p.exists():
-            continue
-        try:
-            data = json.loads(p.read_text(encoding="utf-8"))
-        except Exception:
+        if p.name == "SessionMemory.json":
+            data = read_events(str(p))  # append-only log (+ the old array)
+        elif not p.exists():
             continue
+        else:
+            try:
+                data = json.loads(p.read_text(encoding="utf-8"))
+            except Exception:
+                continue
 
         # Normalize various shapes to [{"content": "...", "user_id": "..."}]
         if isinstance(data, list):
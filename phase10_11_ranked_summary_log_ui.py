@@ -1,15 +1,13 @@
 import gradio as gr
-import json
+from event_log import read_events
 from logic import summarize_ranked_results
 from memory_engine_v2 import save_memory_entry
 
 MEMORY_FILE = "soulnode_memory.json"
 
 def summarize_and_log(topic, query):
-    try:
-        with open(MEMORY_FILE, "r") as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+    data = read_events(MEMORY_FILE)
+    if not data:
         return "No memory data available."
 
     # Filter by topic
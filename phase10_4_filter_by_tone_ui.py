@@ -1,13 +1,11 @@
 import gradio as gr
-import json
+from event_log import read_events
 
 TONE_FILE = "soulnode_memory.json"
 
 def recall_by_tone(tone):
-    try:
-        with open(TONE_FILE, "r") as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+    data = read_events(TONE_FILE)
+    if not data:
         return "No memory data found."
 
     tone_lower = tone.lower()
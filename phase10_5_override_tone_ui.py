@@ -1,14 +1,12 @@
 import gradio as gr
-import json
+from event_log import read_events
 from voice_output import speak_text
 
 MEMORY_FILE = "soulnode_memory.json"
 
 def override_recall(user_input, override_tone):
-    try:
-        with open(MEMORY_FILE, "r") as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+    data = read_events(MEMORY_FILE)
+    if not data:
         return "Memory file missing or corrupted."
 
     for entry in data:
@@ -1,13 +1,11 @@
 import gradio as gr
-import json
+from event_log import read_events
 
 MEMORY_FILE = "soulnode_memory.json"
 
 def predict_and_recall(user_input):
-    try:
-        with open(MEMORY_FILE, "r") as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+    data = read_events(MEMORY_FILE)
+    if not data:
         return "No memory available."
 
     for entry in data:
@@ -1,13 +1,11 @@
 import gradio as gr
-import json
+from event_log import read_events
 
 TAG_FILE = "soulnode_memory.json"
 
 def recall_by_topic(tag):
-    try:
-        with open(TAG_FILE, "r") as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+    data = read_events(TAG_FILE)
+    if not data:
         return "No memory data found."
 
     tag_lower = tag.lower()
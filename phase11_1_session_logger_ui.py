@@ -1,5 +1,5 @@
 import gradio as gr
-import json
+from event_log import append_event
 import uuid
 import datetime
 
@@ -28,16 +28,7 @@ def log_session_entry(user_input, response, tone, topic="general", correction=Fa
         "corrected": correction
     }
 
-    try:
-        with open(SESSION_LOG, "r") as f:
-            data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        data = []
-
-    data.append(entry)
-
-    with open(SESSION_LOG, "w") as f:
-        json.dump(data, f, indent=4)
+    append_event(SESSION_LOG, entry)
 
     return f"Logged at {timestamp} under tone '{tone}' and topic '{topic}'."
 
@@ -1,14 +1,12 @@
 import gradio as gr
-import json
+from event_log import read_events
 from datetime import datetime
 
 SESSION_LOG = "session_memory.json"
 
 def recall_sessions(topic_filter="", from_date="", to_date=""):
-    try:
-        with open(SESSION_LOG, "r") as f:
-            sessions = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+    sessions = read_events(SESSION_LOG)
+    if not sessions:
         return "Session log is empty or unreadable."
 
     results = []
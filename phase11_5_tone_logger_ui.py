@@ -1,5 +1,5 @@
 import gradio as gr
-import json
+from event_log import append_event
 from datetime import datetime
 from logic import predict_tone
 
@@ -15,16 +15,7 @@ def log_tone_session(user_input):
         "explanation": explanation
     }
 
-    try:
-        with open(SESSION_FILE, "r") as f:
-            session_data = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        session_data = []
-
-    session_data.append(entry)
-
-    with open(SESSION_FILE, "w") as f:
-        json.dump(session_data, f, indent=2)
+    append_event(SESSION_FILE, entry)
 
     return f"Tone: {tone}\n\nExplanation: {explanation}\n\nLogged at {entry['timestamp']}"
 
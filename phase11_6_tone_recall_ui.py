@@ -1,13 +1,11 @@
 import gradio as gr
-import json
+from event_log import read_events
 
 SESSION_FILE = "session_memory.json"
 
 def recall_by_tone(tone_input):
-    try:
-        with open(SESSION_FILE, "r") as f:
-            sessions = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+    sessions = read_events(SESSION_FILE)
+    if not sessions:
         return "No session memory found."
 
     tone_input = tone_input.strip().lower()
@@ -0,0 +1,122 @@
+# question_router.py — staged question routing: normalize once, gate cheaply, time every stage
+# -------------------------------------------------------------------------------------------
+# A question is normalized exactly once into a Query (lowercased text, apostrophes folded,
+# tokens). Stages are tried in order; each may carry a precompiled gate (one combined regex
+# built from its trigger phrases, or any predicate) so a stage whose triggers can't be in the
+# text is skipped without running its own keyword loops. First stage to return a dict wins.
+#
+#   router = Router()
+#   router.register("identity", stage_fn, gate=compile_phrases(["who are you", ...]))
+#   router.register("gpt", gpt_fn)                       # no gate: always tried
+#   router.route(text, profile="ty") -> dict | None      # result carries "route" timings
+#
+# Stages can be added/replaced at runtime (before=/after= to position them); stats() gives
+# per-stage calls / hits / skips / latency.
+# -------------------------------------------------------------------------------------------
+
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+
+
+class Query:
+    __slots__ = ("raw", "text", "lower", "tokens", "token_set", "ctx")
+
+    def __init__(self, raw: str, **ctx):
+        self.raw = raw or ""
+        self.text = self.raw.strip()
+        self.lower = self.text.lower().replace("’", "'")
+        self.tokens: List[str] = _TOKEN_RE.findall(self.lower)
+        self.token_set = frozenset(self.tokens)
+        self.ctx = ctx
+
+
+def compile_phrases(phrases: Iterable[str], words: bool = False) -> "re.Pattern":
+    """One alternation for a whole trigger list. Substring semantics by default (same as
+    `any(p in t for p in phrases)`); words=True anchors each phrase on word boundaries."""
+    alts = "|".join(re.escape(p) for p in sorted(set(phrases), key=len, reverse=True) if p)
+    if not alts:
+        return re.compile(r"(?!)")
+    return re.compile(rf"\b(?:{alts})\b" if words else f"(?:{alts})")
+
+
+Gate = Union["re.Pattern", Callable[[Query], bool], None]
+StageFn = Callable[[Query], Optional[Dict[str, Any]]]
+
+
+class _Stage:
+    __slots__ = ("name", "fn", "gate", "calls", "hits", "skipped", "total_ms")
+
+    def __init__(self, name: str, fn: StageFn, gate: Gate):
+        self.name, self.fn, self.gate = name, fn, gate
+        self.calls = self.hits = self.skipped = 0
+        self.total_ms = 0.0
+
+    def admits(self, q: Query) -> bool:
+        if self.gate is None:
+            return True
+        if hasattr(self.gate, "search"):
+            return self.gate.search(q.lower) is not None
+        return bool(self.gate(q))
+
+
+class Router:
+    def __init__(self):
+        self._stages: List[_Stage] = []
+        self._lock = threading.Lock()
+
+    def register(self, name: str, fn: StageFn, gate: Gate = None,
+                 before: Optional[str] = None, after: Optional[str] = None) -> "Router":
+        """Add a stage (or replace one with the same name, keeping its position)."""
+        stage = _Stage(name, fn, gate)
+        with self._lock:
+            stages = list(self._stages)
+            names = [s.name for s in stages]
+            if name in names:
+                stages[names.index(name)] = stage
+            elif before in names:
+                stages.insert(names.index(before), stage)
+            elif after in names:
+                stages.insert(names.index(after) + 1, stage)
+            else:
+                stages.append(stage)
+            self._stages = stages  # swap, so route() never sees a half-edited list
+        return self
+
+    def unregister(self, name: str):
+        with self._lock:
+            self._stages = [s for s in self._stages if s.name != name]
+
+    @property
+    def stages(self) -> List[str]:
+        return [s.name for s in self._stages]
+
+    def route(self, text: str, **ctx) -> Optional[Dict[str, Any]]:
+        q = Query(text, **ctx)
+        timings: Dict[str, float] = {}
+        for stage in self._stages:
+            if not stage.admits(q):
+                stage.skipped += 1
+                continue
+            t0 = time.perf_counter()
+            try:
+                res = stage.fn(q)
+            finally:
+                ms = (time.perf_counter() - t0) * 1000
+                timings[stage.name] = round(ms, 3)
+                stage.calls += 1
+                stage.total_ms += ms
+            if res:
+                stage.hits += 1
+                return {**res, "route": {"stage": stage.name, "timings_ms": timings}}
+        return None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            s.name: {"calls": s.calls, "hits": s.hits, "skipped": s.skipped,
+                     "avg_ms": round(s.total_ms / s.calls, 3) if s.calls else 0.0}
+            for s in self._stages
+        }
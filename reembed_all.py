@@ -1,50 +1,28 @@
-import sqlite3
-import json
+# reembed_all.py — embed every fact still missing a vector, in the foreground
+# -------------------------------------------------------------------------------------------
+# The app's background embed_worker normally keeps up on its own; this drains the same queue
+# (facts WHERE embedding_vec IS NULL) once, e.g. after a bulk import with the worker off.
+# -------------------------------------------------------------------------------------------
+
 import os
-from openai import OpenAI
+import sys
 
-# ✅ Load API key and model from environment
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-EMBED_MODEL = os.getenv("EMBED_MODEL", "text-embedding-3-large")
+import sqlite_memory
+from embed_cache import cache_stats
+from embed_worker import EmbedWorker
 
-if not OPENAI_API_KEY:
+if not os.getenv("OPENAI_API_KEY") or not sqlite_memory.client:
     raise ValueError("❌ OPENAI_API_KEY is not set. Set it before running this script.")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
-
-# ✅ Path to your DB (adjust if needed)
-DB_PATH = os.path.join(os.path.dirname(__file__), "data", "memory_store.db")
-
-conn = sqlite3.connect(DB_PATH)
-cur = conn.cursor()
-
-# ✅ Fetch all rows missing embeddings
-cur.execute("SELECT id, subject, relation, value FROM facts WHERE embedding IS NULL")
-rows = cur.fetchall()
-
-if not rows:
+# SQLiteMemory() runs the schema check + JSON → BLOB embedding migration (init_db) first
+worker = EmbedWorker(sqlite_memory.SQLiteMemory())
+pending = worker.memory.pending_embeddings()
+if not pending:
     print("✅ All facts already have embeddings — nothing to update.")
-    conn.close()
-    exit()
-
-print(f"🚀 Found {len(rows)} rows without embeddings. Starting re-embed...")
-
-updated = 0
-for row in rows:
-    _id, subject, relation, value = row
-    text = f"{subject} {relation} {value}"
-
-    try:
-        print(f"[Embedding] ID={_id} → {text}")
-        resp = client.embeddings.create(model=EMBED_MODEL, input=text)
-        embedding_vector = resp.data[0].embedding
-        cur.execute("UPDATE facts SET embedding = ? WHERE id = ?", (json.dumps(embedding_vector), _id))
-        updated += 1
-
-    except Exception as e:
-        print(f"⚠️ Failed to embed row { _id }: {e}")
+    sys.exit()
 
-conn.commit()
-conn.close()
+print(f"🚀 Found {pending} rows without embeddings. Starting re-embed...")
+updated = worker.drain()
 
 print(f"✅ Done. Successfully updated {updated} rows with semantic embeddings.")
+print(f"[EmbedCache] {cache_stats()}")
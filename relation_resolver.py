@@ -0,0 +1,180 @@
+# relation_resolver.py — relation canonicalization: alias map → memo → trigram fuzzy index
+# -------------------------------------------------------------------------------------------
+# Teach and recall both funnel a free-form relation ("home town", "fav color", "dream cars")
+# through resolve(). Lookup order:
+#   1) LRU memo of already-resolved inputs            (dict hit)
+#   2) exact alias map, then exact vocabulary hit      (dict hit)
+#   3) fuzzy fallback: a character-trigram inverted index shortlists the few relations that
+#      share the most trigrams (Dice), and only those are scored with SequenceMatcher.ratio —
+#      the same scale and threshold the old scan over every relation used.
+#
+# Vocabulary has two tiers: the seeded canonical relations (+ alias targets) always win a
+# fuzzy tie-break, so existing teach/recall keys resolve exactly as before; relations learned
+# from the facts table (learn_from / observe) extend matching to everything taught since.
+#
+# Env: REL_FUZZY_MIN=0.68  REL_FUZZY_CANDIDATES=8  REL_MEMO_ITEMS=4096
+# -------------------------------------------------------------------------------------------
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+REL_FUZZY_MIN = float(os.getenv("REL_FUZZY_MIN", "0.68"))
+REL_FUZZY_CANDIDATES = int(os.getenv("REL_FUZZY_CANDIDATES", "8"))
+REL_MEMO_ITEMS = int(os.getenv("REL_MEMO_ITEMS", "4096"))
+
+_WS = re.compile(r"\s+")
+
+
+def normalize_relation(r: str) -> str:
+    return _WS.sub(" ", (r or "").strip().lower().replace("_", " "))
+
+
+def trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class RelationResolver:
+    def __init__(self, canonical: Iterable[str] = (), aliases: Optional[Mapping[str, str]] = None,
+                 threshold: float = REL_FUZZY_MIN, candidates: int = REL_FUZZY_CANDIDATES,
+                 memo_items: int = REL_MEMO_ITEMS):
+        self.threshold = threshold
+        self.candidates = candidates
+        self.memo_items = memo_items
+        self._aliases: Dict[str, str] = {}
+        self._tier: Dict[str, int] = {}           # relation -> 0 seeded, 1 learned
+        self._grams: Dict[str, Set[str]] = {}     # trigram -> relations containing it
+        self._size: Dict[str, int] = {}           # relation -> trigram count
+        self._memo: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._learned_gen: Optional[int] = None
+        self.counters = {"memo_hits": 0, "exact": 0, "fuzzy": 0, "misses": 0, "learned": 0}
+        for rel in canonical:
+            self.add_relation(rel)
+        for alias, rel in (aliases or {}).items():
+            self.add_alias(alias, rel)
+
+    # ---- vocabulary -----------------------------------------------------------
+    def add_relation(self, rel: str, learned: bool = False) -> bool:
+        """Index a relation; returns True if it was new. A learned relation never demotes a seeded one."""
+        rel = normalize_relation(rel)
+        if not rel:
+            return False
+        tier = 1 if learned else 0
+        with self._lock:
+            if rel in self._tier:
+                if tier < self._tier[rel]:
+                    self._tier[rel] = tier
+                    self._memo.clear()
+                return False
+            self._tier[rel] = tier
+            grams = trigrams(rel)
+            self._size[rel] = len(grams)
+            for g in grams:
+                self._grams.setdefault(g, set()).add(rel)
+            self._memo.clear()
+        return True
+
+    def add_alias(self, alias: str, rel: str):
+        alias, rel = normalize_relation(alias), normalize_relation(rel)
+        if not alias or not rel:
+            return
+        with self._lock:
+            self.add_relation(rel)  # alias targets are fuzzy candidates too
+            self._aliases[alias] = rel
+            self._memo.clear()
+
+    def observe(self, rel: str) -> bool:
+        """A relation just written to the facts table (teach/import path)."""
+        added = self.add_relation(rel, learned=True)
+        if added:
+            self.counters["learned"] += 1
+        return added
+
+    def learn_from(self, memory) -> int:
+        """Pull relations from the facts table; a no-op while memory.generation() is unchanged."""
+        try:
+            gen = memory.generation()
+            if gen == self._learned_gen:
+                return 0
+            rows = memory._connect().execute("SELECT DISTINCT relation FROM facts").fetchall()
+        except Exception as e:
+            print(f"[Relations ⚠️] learn_from failed: {e}")
+            return 0
+        added = sum(self.observe(r) for (r,) in rows)
+        self._learned_gen = gen
+        if added:
+            print(f"[Relations] 📚 Learned {added} relation(s) from facts (vocab={len(self._tier)})")
+        return added
+
+    # ---- resolution -----------------------------------------------------------
+    def _shortlist(self, rel: str, among: Optional[Set[str]] = None) -> List[str]:
+        grams = trigrams(rel)
+        shared: Dict[str, int] = {}
+        for g in grams:
+            for cand in self._grams.get(g, ()):
+                if among is None or cand in among:
+                    shared[cand] = shared.get(cand, 0) + 1
+        dice = sorted(shared, key=lambda c: 2 * shared[c] / (len(grams) + self._size[c]), reverse=True)
+        return dice[:self.candidates]
+
+    def _fuzzy(self, rel: str, among: Optional[Set[str]] = None) -> Tuple[Optional[str], float]:
+        best, best_key = None, None
+        for cand in self._shortlist(rel, among):
+            ratio = SequenceMatcher(None, rel, cand).ratio()
+            key = (ratio >= self.threshold and among is None and self._tier[cand] == 0, ratio)
+            if best_key is None or key > best_key:
+                best, best_key = cand, key
+        return best, (best_key[1] if best_key else 0.0)
+
+    def resolve(self, rel: str) -> str:
+        """Canonical relation for `rel` (the normalized input itself when nothing is close enough)."""
+        r = normalize_relation(rel)
+        with self._lock:
+            hit = self._memo.get(r)
+            if hit is not None:
+                self._memo.move_to_end(r)
+                self.counters["memo_hits"] += 1
+                return hit
+
+            out = self._aliases.get(r, r)
+            if self._tier.get(out) == 0:
+                self.counters["exact"] += 1
+            else:
+                best, ratio = self._fuzzy(out)
+                if best is not None and ratio >= self.threshold:
+                    self.counters["fuzzy" if best != out else "exact"] += 1
+                    out = best
+                else:
+                    self.counters["misses"] += 1
+
+            self._memo[r] = out
+            while len(self._memo) > self.memo_items:
+                self._memo.popitem(last=False)
+            return out
+
+    def match(self, text: str, among: Iterable[str], min_ratio: Optional[float] = None
+              ) -> Tuple[Optional[str], float]:
+        """Closest relation to `text` restricted to `among` (e.g. one subject's relations) →
+        (relation, ratio), or (None, best_ratio) below min_ratio. Unmemoized: `among` varies."""
+        pool = {normalize_relation(r) for r in among}
+        for r in pool:
+            self.add_relation(r, learned=True)
+        t = normalize_relation(text)
+        t = self._aliases.get(t, t)
+        with self._lock:
+            if t in pool:
+                return t, 1.0
+            best, ratio = self._fuzzy(t, pool)
+        floor = self.threshold if min_ratio is None else min_ratio
+        return (best, ratio) if best is not None and ratio >= floor else (None, ratio)
+
+    def stats(self) -> Dict:
+        seeded = sum(1 for t in self._tier.values() if t == 0)
+        return {"relations": len(self._tier), "seeded": seeded, "learned": len(self._tier) - seeded,
+                "aliases": len(self._aliases), "memo_items": len(self._memo),
+                "trigrams": len(self._grams), **self.counters}
@@ -1,14 +1,23 @@
 # retriever_pam.py
 # Simple semantic retriever for data/pam.txt (no extra libs; numpy only)
 
-import os, re, json, pathlib, math
+import os, re, json, pathlib, math, threading, time, hashlib
 from typing import List, Tuple, Optional
 import numpy as np
-from openai import OpenAI
+
+from ann_index import IVFIndex, make_index
+from embed_cache import get_embeddings, get_embedding
+from vector_matrix import MappedMatrix
 
 EMBED_MODEL = "text-embedding-3-small" # cheap + good
-CHUNKS_JSON = pathlib.Path("data/pam_chunks.json")
-VECTORS_NPY = pathlib.Path("data/pam_vectors.npy")
+DATA_DIR = pathlib.Path(__file__).resolve().parent / "data"
+PAM_TXT = pathlib.Path(os.getenv("PAM_TXT_PATH") or DATA_DIR / "pam.txt")
+CHUNKS_JSON = DATA_DIR / "pam_chunks.json"
+VECTORS_NPY = DATA_DIR / "pam_vectors.npy"
+NORMS_NPY = DATA_DIR / "pam_norms.npy" # row norms of pam_vectors.npy, written next to it
+MANIFEST_JSON = DATA_DIR / "pam_manifest.json" # chunk hashes + pam.txt signature of the index
+IVF_NPZ = DATA_DIR / "pam_ivf.npz" # only written when the IVF backend is active
+PAM_WARMUP = os.getenv("PAM_WARMUP", "0") == "1" # build/map the index in a thread at boot
 
 def _split_paragraphs(text: str) -> List[str]:
     # split on blank lines; keep paragraphs short-ish
@@ -47,65 +56,181 @@ def _load_text(path: pathlib.Path) -> str:
     except Exception:
         return ""
 
+# Manifest: which chunk (by content hash) each row of pam_vectors.npy holds, plus the pam.txt
+# signature it was built from. Edits re-embed only new/changed chunks; removed ones are dropped.
+def _chunk_hash(chunk: str) -> str:
+    return hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+def _source_sig(pam_txt: pathlib.Path) -> dict:
+    st = pam_txt.stat()
+    return {"size": st.st_size, "mtime": st.st_mtime}
+
+def _load_manifest() -> dict:
+    try:
+        return json.loads(MANIFEST_JSON.read_text(encoding="utf-8"))
+    except Exception:
+        return {}
+
 def _need_rebuild(pam_txt: pathlib.Path) -> bool:
+    if not pam_txt.exists():
+        return False
     if not CHUNKS_JSON.exists() or not VECTORS_NPY.exists():
         return True
-    # if pam.txt is newer than index, rebuild
-    return pam_txt.stat().st_mtime > min(CHUNKS_JSON.stat().st_mtime, VECTORS_NPY.stat().st_mtime)
+    m = _load_manifest()
+    if m.get("model") != EMBED_MODEL:
+        return True
+    src = m.get("source", {})
+    if {k: src.get(k) for k in ("size", "mtime")} == _source_sig(pam_txt):
+        return False
+    # touched but maybe not edited: only the content hash decides
+    return src.get("sha256") != hashlib.sha256(pam_txt.read_bytes()).hexdigest()
+
+def _load_norms(vectors: np.ndarray) -> np.ndarray:
+    # norms are computed once per vectors file, not once per query
+    try:
+        if NORMS_NPY.exists() and NORMS_NPY.stat().st_mtime >= VECTORS_NPY.stat().st_mtime:
+            norms = np.load(str(NORMS_NPY))
+            if norms.shape == (len(vectors),):
+                return norms
+    except Exception as e:
+        print("pam norms load error:", e)
+    norms = np.linalg.norm(vectors, axis=1).astype(np.float32)
+    try:
+        np.save(str(NORMS_NPY), norms)
+    except OSError as e:
+        print("pam norms save error:", e)
+    return norms
 
 class PamRetriever:
     def __init__(self, pam_txt_path: pathlib.Path):
         self.pam_txt_path = pam_txt_path
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        key = os.getenv("OPENAI_API_KEY")
+        if key:
+            from openai import OpenAI  # deferred: keeps `import app` light
+            self.client = OpenAI(api_key=key)
+        else:
+            self.client = None
         self.chunks: List[str] = []
-        self.vectors: Optional[np.ndarray] = None
+        self.vectors: Optional[np.ndarray] = None # read-only memmap of pam_vectors.npy
+        self.norms: Optional[np.ndarray] = None
+        self.index = None # mmap matrix or IVF (ann_index.make_index), ids = chunk positions
+        self._source: Optional[dict] = None # pam.txt size/mtime the loaded index reflects
 
     def ensure_index(self):
         if _need_rebuild(self.pam_txt_path):
-            self._build_index()
-        else:
             try:
-                self.chunks = json.loads(CHUNKS_JSON.read_text(encoding="utf-8"))
-                self.vectors = np.load(str(VECTORS_NPY))
-            except Exception:
                 self._build_index()
+            except Exception as e:
+                print("pam index rebuild error (serving the existing index):", e)
+        try:
+            self.chunks = json.loads(CHUNKS_JSON.read_text(encoding="utf-8"))
+            # mmap: gunicorn workers share the page cache instead of each holding a copy
+            self.vectors = np.load(str(VECTORS_NPY), mmap_mode="r")
+        except Exception:
+            self._build_index()
+        if self.vectors is not None:
+            self.norms = _load_norms(self.vectors)
+        self._attach_index()
+        self._source = _source_sig(self.pam_txt_path) if self.pam_txt_path.exists() else None
         return self
 
-    def _build_index(self):
+    def _attach_index(self):
+        if self.vectors is None or not self.chunks:
+            self.index = None
+            return
+        n = len(self.chunks)
+        idx = make_index(n)
+        if idx.kind == "ivf":
+            # reuse the persisted IVF index if it was built from the current vectors
+            if IVF_NPZ.exists() and IVF_NPZ.stat().st_mtime >= VECTORS_NPY.stat().st_mtime:
+                try:
+                    saved, meta = IVFIndex.load_file(IVF_NPZ)
+                    if meta.get("rows") == n:
+                        self.index = saved
+                        return
+                except Exception as e:
+                    print("pam ivf load error:", e)
+            idx.load(range(n), self.vectors)
+            idx.save(IVF_NPZ, rows=n)
+        else:
+            idx = MappedMatrix(self.vectors, self.norms)
+        self.index = idx
+
+    def _build_index(self) -> dict:
+        """Incremental re-index: reuse vectors of unchanged chunks, embed only the rest."""
         text = _load_text(self.pam_txt_path)
         if not text:
             self.chunks, self.vectors = [], None
-            return
+            return {"chunks": 0}
         chunks = _split_paragraphs(text)
-        # embed in small batches to avoid long prompts
-        vecs = []
-        B = 64
-        for i in range(0, len(chunks), B):
-            batch = chunks[i:i+B]
-            resp = self.client.embeddings.create(
-                model=EMBED_MODEL,
-                input=batch
-            )
-            vecs.extend([np.array(d.embedding, dtype=np.float32) for d in resp.data])
-        self.chunks = chunks
-        self.vectors = np.stack(vecs, axis=0) if vecs else None
-        CHUNKS_JSON.write_text(json.dumps(self.chunks, ensure_ascii=False, indent=2), encoding="utf-8")
-        if self.vectors is not None:
-            np.save(str(VECTORS_NPY), self.vectors)
+        hashes = [_chunk_hash(c) for c in chunks]
+
+        old_chunks: List[str] = []
+        old_vecs = None
+        old_rows = {}
+        manifest = _load_manifest()
+        # no manifest yet = index from before manifests, built with the same model
+        if manifest.get("model", EMBED_MODEL) == EMBED_MODEL:
+            try:
+                old_chunks = json.loads(CHUNKS_JSON.read_text(encoding="utf-8"))
+                old_vecs = np.load(str(VECTORS_NPY), mmap_mode="r")
+                if len(old_vecs) == len(old_chunks):
+                    old_rows = {_chunk_hash(c): i for i, c in enumerate(old_chunks)}
+            except Exception:
+                old_chunks, old_vecs = [], None
+
+        todo = [i for i, h in enumerate(hashes) if h not in old_rows]
+        # batched; the embedding cache also skips any chunk text it has seen before
+        fresh = get_embeddings([chunks[i] for i in todo], EMBED_MODEL, self.client) if todo else []
+        dim = len(fresh[0]) if fresh else (old_vecs.shape[1] if old_vecs is not None else 0)
+        if fresh and old_rows and old_vecs.shape[1] != dim:
+            raise ValueError(f"pam vectors dim {old_vecs.shape[1]} != embedding dim {dim}")
+
+        vectors = np.empty((len(chunks), dim), dtype=np.float32)
+        new_vecs = dict(zip(todo, fresh))
+        for i, h in enumerate(hashes):
+            vectors[i] = new_vecs[i] if i in new_vecs else old_vecs[old_rows[h]]
+        removed = len(set(old_rows) - set(hashes))
+
+        if todo or chunks != old_chunks:
+            # write-then-rename: processes that still map the old file keep a valid view
+            CHUNKS_JSON.write_text(json.dumps(chunks, ensure_ascii=False, indent=2), encoding="utf-8")
+            tmp = VECTORS_NPY.with_suffix(".tmp.npy")
+            np.save(str(tmp), vectors)
+            os.replace(tmp, VECTORS_NPY)
+            np.save(str(NORMS_NPY), np.linalg.norm(vectors, axis=1).astype(np.float32))
+        MANIFEST_JSON.write_text(json.dumps({
+            "model": EMBED_MODEL,
+            "source": {**_source_sig(self.pam_txt_path),
+                       "sha256": hashlib.sha256(self.pam_txt_path.read_bytes()).hexdigest()},
+            "chunks": hashes,
+        }), encoding="utf-8")
+
+        self.chunks, self.vectors = chunks, vectors
+        stats = {"chunks": len(chunks), "embedded": len(todo), "reused": len(chunks) - len(todo), "removed": removed}
+        print(f"[PamRetriever] ✅ Re-indexed pam.txt: {stats}")
+        return stats
+
+    def refresh(self) -> "PamRetriever":
+        """Pick up edits to pam.txt without a restart (cheap stat check when nothing changed)."""
+        if not self.pam_txt_path.exists() or _source_sig(self.pam_txt_path) == self._source:
+            return self
+        if _need_rebuild(self.pam_txt_path):
+            self.ensure_index()
+        self._source = _source_sig(self.pam_txt_path)
+        return self
 
     def search(self, query: str, k: int = 3, threshold: float = 0.72) -> List[Tuple[float, str]]:
-        if not self.chunks or self.vectors is None:
+        if not self.chunks or self.index is None or self.client is None:
+            return []
+        # one (cached) query embedding + one mat-vec product
+        q = get_embedding(query, EMBED_MODEL, self.client)
+        if q is None:
             return []
-        q = self.client.embeddings.create(model=EMBED_MODEL, input=[query]).data[0].embedding
-        qv = np.array(q, dtype=np.float32)
-        # cosine vs all
-        sims = self.vectors @ qv / (np.linalg.norm(self.vectors, axis=1) * (np.linalg.norm(qv) + 1e-9) + 1e-9)
-        idx = np.argsort(-sims)[:k]
         out = []
-        for i in idx:
-            score = float(sims[i])
+        for i, score in self.index.top_k(q, k=k):
             if score >= threshold:
-                out.append((score, self.chunks[int(i)]))
+                out.append((score, self.chunks[i]))
         return out
 
     def answer(self, query: str) -> Optional[str]:
@@ -128,15 +253,48 @@ class PamRetriever:
             total += len(p)
         return " ".join(out).strip()
 
-# simple module-level helpers
+# simple module-level helpers: one retriever per process, built on first use
 _PAM_RET: Optional[PamRetriever] = None
+_PAM_LOCK = threading.Lock()
 
-def init_pam_retriever(pam_txt_path: pathlib.Path) -> Optional[PamRetriever]:
+def init_pam_retriever(pam_txt_path: pathlib.Path = PAM_TXT) -> Optional[PamRetriever]:
     global _PAM_RET
     ret = PamRetriever(pam_txt_path).ensure_index()
     _PAM_RET = ret
     return ret
 
+_PAM_FAILED_AT = 0.0
+
+def get_pam_retriever() -> Optional[PamRetriever]:
+    global _PAM_FAILED_AT
+    # a failed init is retried at most once a minute, not on every Pam question
+    if _PAM_RET is None and time.time() - _PAM_FAILED_AT > 60:
+        with _PAM_LOCK:
+            if _PAM_RET is None:
+                try:
+                    init_pam_retriever(PAM_TXT)
+                except Exception as e:
+                    _PAM_FAILED_AT = time.time()
+                    print("pam retriever init error:", e)
+    elif _PAM_RET is not None:
+        try:
+            with _PAM_LOCK:
+                _PAM_RET.refresh()
+        except Exception as e:
+            print("pam retriever refresh error:", e)
+    return _PAM_RET
+
+def warm_pam_retriever() -> threading.Thread:
+    """Build/map the index and fault its pages in off the request path (PAM_WARMUP=1)."""
+    def _warm():
+        ret = get_pam_retriever()
+        if ret is not None and hasattr(ret.index, "warm"):
+            ret.index.warm()
+        print(f"[PamRetriever] ✅ Warm: {len(ret.chunks) if ret else 0} chunks")
+    t = threading.Thread(target=_warm, name="pam-warmup", daemon=True)
+    t.start()
+    return t
+
 def retrieve_pam_answer(ret: Optional[PamRetriever], text: str) -> Optional[str]:
     if not ret:
         return None
@@ -0,0 +1,273 @@
+# sandbox_store.py — per-tester sandbox memory: SQLite namespaces + resident vectors
+# -------------------------------------------------------------------------------------------
+# /sandbox/ask used to json.load a whole /data/memory_tester_N.json (every embedding included)
+# per question and rewrite it with indent=2 per "remember". Here:
+#   sandbox_facts(tester, key → value, embedding BLOB)   one row per fact, WITHOUT ROWID
+#   sandbox_ns(tester → gen)                             bumped by triggers on every write
+# - a "remember" is a single-row upsert; nothing else is rewritten
+# - each namespace is cached in-process (values dict + pre-normalized float32 matrix) and
+#   reloaded only when its generation moved (i.e. another worker wrote); own writes patch
+#   the cache in place
+# - semantic recall is one mat-vec product over the namespace's matrix
+# - a namespace is created only for testers the `known` check accepts (the app passes its
+#   tester registries), up to SANDBOX_MAX_NAMESPACES; any other id reads as empty and can't
+#   write, so unauthenticated ids can't use up the namespaces. A legacy JSON file for a
+#   tester is imported once when its namespace is created
+#
+# Env: SANDBOX_DB_PATH (default data/sandbox.db), SANDBOX_MAX_NAMESPACES=1000,
+#      SANDBOX_CACHE_NAMESPACES=64
+# -------------------------------------------------------------------------------------------
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from sqlite_memory import decode_vec, encode_vec
+from sqlite_pool import get_pool
+
+SANDBOX_DB_PATH = os.getenv("SANDBOX_DB_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "sandbox.db"
+)
+SANDBOX_MAX_NAMESPACES = int(os.getenv("SANDBOX_MAX_NAMESPACES", "1000"))
+SANDBOX_CACHE_NAMESPACES = int(os.getenv("SANDBOX_CACHE_NAMESPACES", "64"))
+
+_TESTER_RE = re.compile(r"^[a-z0-9][a-z0-9_.-]{0,63}$")
+
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS sandbox_facts (
+        tester TEXT NOT NULL,
+        key TEXT NOT NULL,
+        value TEXT NOT NULL,
+        embedding BLOB,
+        updated REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (tester, key)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS sandbox_ns (
+        tester TEXT PRIMARY KEY,
+        gen INTEGER NOT NULL DEFAULT 0,
+        created REAL NOT NULL DEFAULT 0
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS sandbox_gen_insert AFTER INSERT ON sandbox_facts BEGIN
+        UPDATE sandbox_ns SET gen = gen + 1 WHERE tester = NEW.tester;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS sandbox_gen_update AFTER UPDATE ON sandbox_facts BEGIN
+        UPDATE sandbox_ns SET gen = gen + 1 WHERE tester = NEW.tester;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS sandbox_gen_delete AFTER DELETE ON sandbox_facts BEGIN
+        UPDATE sandbox_ns SET gen = gen + 1 WHERE tester = OLD.tester;
+    END""",
+]
+
+
+def _unit(vec) -> Optional[np.ndarray]:
+    if vec is None:
+        return None
+    v = np.asarray(vec, dtype=np.float32)
+    n = float(np.linalg.norm(v))
+    return v / n if v.ndim == 1 and v.size and n else None
+
+
+class _Namespace:
+    """Resident copy of one tester's facts: values + a pre-normalized embedding matrix."""
+
+    def __init__(self, gen: int, rows):
+        self.gen = gen
+        self.values: Dict[str, str] = {}
+        self.keys: List[str] = []  # matrix row i belongs to keys[i]
+        vecs = []
+        for key, value, blob in rows:
+            self.values[key] = value
+            v = _unit(decode_vec(blob))
+            if v is not None and (not vecs or v.size == vecs[0].size):
+                self.keys.append(key)
+                vecs.append(v)
+        self.matrix = np.stack(vecs) if vecs else None
+
+    def _drop_row(self, key: str):
+        if key in self.keys:
+            i = self.keys.index(key)
+            self.keys.pop(i)
+            self.matrix = np.delete(self.matrix, i, axis=0) if self.keys else None
+
+    def put(self, key: str, value: str, vec: Optional[np.ndarray]):
+        self.values[key] = value
+        self._drop_row(key)
+        if vec is not None and (self.matrix is None or vec.size == self.matrix.shape[1]):
+            self.keys.append(key)
+            self.matrix = vec[None, :] if self.matrix is None else np.vstack([self.matrix, vec])
+
+    def drop(self, key: str):
+        self.values.pop(key, None)
+        self._drop_row(key)
+
+
+class SandboxStore:
+    def __init__(self, db_path: str = SANDBOX_DB_PATH, legacy_path: Optional[Callable[[str], Optional[str]]] = None,
+                 known: Optional[Callable[[str], bool]] = None, max_namespaces: int = SANDBOX_MAX_NAMESPACES, cache_namespaces: int = SANDBOX_CACHE_NAMESPACES):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.path = db_path
+        self.pool = get_pool(db_path)
+        self.legacy_path = legacy_path  # tester → old JSON file to import when its namespace is created
+        self.known = known  # tester → may it get a namespace? (None: any valid id)
+        self.max_namespaces = max_namespaces
+        self.cache_namespaces = cache_namespaces
+        self._cache: "OrderedDict[str, _Namespace]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.counters = {"hits": 0, "loads": 0, "writes": 0, "imported": 0}
+        conn = self.pool.connection()
+        with conn:
+            for stmt in _SCHEMA:
+                conn.execute(stmt)
+
+    # ---- namespaces -----------------------------------------------------------
+    def _gen(self, conn, tester: str) -> Optional[int]:
+        row = conn.execute("SELECT gen FROM sandbox_ns WHERE tester=?", (tester,)).fetchone()
+        return row[0] if row else None
+
+    def _create(self, conn, tester: str) -> int:
+        count = conn.execute("SELECT COUNT(*) FROM sandbox_ns").fetchone()[0]
+        if count >= self.max_namespaces:
+            raise ValueError(f"Sandbox namespace limit reached ({self.max_namespaces})")
+        with conn:
+            created = conn.execute("INSERT OR IGNORE INTO sandbox_ns (tester, gen, created) VALUES (?, 0, ?)",
+                                   (tester, time.time())).rowcount
+        if created and self.legacy_path:
+            self._import_legacy(conn, tester, self.legacy_path(tester))
+        return self._gen(conn, tester)
+
+    def _import_legacy(self, conn, tester: str, path: Optional[str]):
+        if not path or not os.path.exists(path):
+            return
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except Exception as e:
+            print(f"[Sandbox ⚠️] legacy file {path} unreadable: {e}")
+            return
+        data, index = raw.get("data", {}) or {}, raw.get("_index", {}) or {}
+        now = time.time()
+        rows = [(tester, str(k), str(v), encode_vec((index.get(k) or {}).get("embedding") or None), now)
+                for k, v in data.items()]
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO sandbox_facts (tester, key, value, embedding, updated) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+        self.counters["imported"] += len(rows)
+        print(f"[Sandbox] 📥 Imported {len(rows)} facts for {tester} from {path}")
+
+    def _namespace(self, tester: str, write: bool = False) -> _Namespace:
+        """Cached namespace; one indexed generation read per call, a reload only if it moved.
+        Testers without a namespace that `known` rejects read as empty and can't write."""
+        tester = (tester or "").lower().strip()
+        if not _TESTER_RE.match(tester):
+            raise ValueError(f"Unknown tester ID: {tester}")
+        conn = self.pool.connection()
+        gen = self._gen(conn, tester)
+        if gen is None:
+            if self.known is not None and not self.known(tester):
+                if write:
+                    raise ValueError(f"Unknown tester ID: {tester}")
+                return _Namespace(-1, [])  # not cached: nothing to keep for an unknown id
+            gen = self._create(conn, tester)
+        with self._lock:
+            ns = self._cache.get(tester)
+            if ns is not None and ns.gen == gen:
+                self._cache.move_to_end(tester)
+                self.counters["hits"] += 1
+                return ns
+            rows = conn.execute("SELECT key, value, embedding FROM sandbox_facts WHERE tester=?", (tester,)).fetchall()
+            ns = self._cache[tester] = _Namespace(gen, rows)
+            self._cache.move_to_end(tester)
+            while len(self._cache) > self.cache_namespaces:
+                self._cache.popitem(last=False)
+            self.counters["loads"] += 1
+            return ns
+
+    # ---- writes ---------------------------------------------------------------
+    def remember(self, tester: str, key: str, value: str, embedding=None):
+        """Upsert one fact; the cached namespace is patched in place when no one else wrote meanwhile."""
+        tester = (tester or "").lower().strip()
+        ns = self._namespace(tester, write=True)
+        conn = self.pool.connection()
+        with self._lock:
+            with conn:
+                conn.execute(
+                    "INSERT INTO sandbox_facts (tester, key, value, embedding, updated) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(tester, key) DO UPDATE SET value=excluded.value, embedding=excluded.embedding, "
+                    "updated=excluded.updated",
+                    (tester, key, value, encode_vec(embedding), time.time()),
+                )
+            gen = self._gen(conn, tester)
+            if gen == ns.gen + 1 and self._cache.get(tester) is ns:
+                ns.put(key, value, _unit(embedding))
+                ns.gen = gen
+            self.counters["writes"] += 1
+
+    def forget(self, tester: str, key: str) -> int:
+        tester = (tester or "").lower().strip()
+        ns = self._namespace(tester, write=True)
+        conn = self.pool.connection()
+        with self._lock:
+            with conn:
+                n = conn.execute("DELETE FROM sandbox_facts WHERE tester=? AND key=?", (tester, key)).rowcount
+            gen = self._gen(conn, tester)
+            if gen == ns.gen + n and self._cache.get(tester) is ns:
+                ns.drop(key)
+                ns.gen = gen
+        return n
+
+    # ---- reads ----------------------------------------------------------------
+    def recall(self, tester: str, key: str) -> Optional[str]:
+        return self._namespace(tester).values.get(key)
+
+    def items(self, tester: str) -> Dict[str, str]:
+        return dict(self._namespace(tester).values)
+
+    def vectors(self, tester: str) -> int:
+        ns = self._namespace(tester)
+        return 0 if ns.matrix is None else len(ns.keys)
+
+    def nearest(self, tester: str, embedding, min_score: float = 0.0) -> Optional[Tuple[str, str, float]]:
+        """(key, value, cosine) of the closest stored fact at or above min_score, else None."""
+        ns = self._namespace(tester)
+        q = _unit(embedding)
+        if q is None or ns.matrix is None or q.size != ns.matrix.shape[1]:
+            return None
+        scores = ns.matrix @ q
+        i = int(np.argmax(scores))
+        score = float(scores[i])
+        if score < min_score:
+            return None
+        key = ns.keys[i]
+        return key, ns.values[key], score
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self.pool.connection()
+        return {
+            "path": self.path,
+            "namespaces": conn.execute("SELECT COUNT(*) FROM sandbox_ns").fetchone()[0],
+            "facts": conn.execute("SELECT COUNT(*) FROM sandbox_facts").fetchone()[0],
+            "cached": len(self._cache),
+            **self.counters,
+        }
+
+
+# simple module-level singleton
+_STORE: Optional[SandboxStore] = None
+_STORE_LOCK = threading.Lock()
+
+def get_sandbox_store(legacy_path: Optional[Callable[[str], Optional[str]]] = None,
+                      known: Optional[Callable[[str], bool]] = None) -> SandboxStore:
+    global _STORE
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None:
+                _STORE = SandboxStore(legacy_path=legacy_path, known=known)
+    return _STORE
@@ -1,78 +1,426 @@
 import sqlite3
 import json
 import os
-import math
+import re
+import threading
+import time
 from difflib import SequenceMatcher
-from openai import OpenAI
+import hashlib
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
 import dotenv
 
+from lifecycle import lazy
+from sqlite_pool import get_pool
+from embed_cache import EMBED_BATCH, get_embedding, get_embeddings
+from ann_index import ANN_INDEX, IVFIndex, make_index
+
 # ------------------------------
 # CONFIGURATION
 # ------------------------------
 # ✅ Load environment variables if .env exists
 dotenv.load_dotenv()
 
-DB_PATH = os.path.join(os.path.dirname(__file__), "data", "memory_store.db")
+DB_PATH = os.getenv("MEMORY_DB_PATH") or os.path.join(os.path.dirname(__file__), "data", "memory_store.db")
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
 # ✅ Load from environment or fallback (for local testing)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") or "sk-proj-PASTE_YOUR_KEY_HERE"  # TEMP for local only
 EMBED_MODEL = os.getenv("EMBED_MODEL", "text-embedding-3-large")
-
-client = None
-if OPENAI_API_KEY and OPENAI_API_KEY.strip():
+# Embeddings are stored as raw little-endian BLOBs; float16 halves the size again at ~1e-3 precision.
+EMBED_DTYPE = os.getenv("EMBED_DTYPE", "float32").strip().lower()
+if EMBED_DTYPE not in ("float32", "float16"):
+    print(f"[SQLiteMemory] ⚠️ Unsupported EMBED_DTYPE={EMBED_DTYPE}; using float32.")
+    EMBED_DTYPE = "float32"
+# Per-write change log (generation → fact id): other processes patch their resident index by id
+# from it instead of reloading every vector. Older entries than this many generations are pruned.
+FACT_LOG_KEEP = int(os.getenv("FACT_LOG_KEEP", "20000"))
+
+def _make_client():
+    # openai is a heavy import (~0.5 s); it is only paid when an embedding is first needed
+    if not (OPENAI_API_KEY and OPENAI_API_KEY.strip()):
+        print("[SQLiteMemory] ⚠️ No OPENAI_API_KEY detected; semantic recall disabled.")
+        return None
     try:
-        client = OpenAI(api_key=OPENAI_API_KEY)
+        from openai import OpenAI
+        c = OpenAI(api_key=OPENAI_API_KEY)
         print(f"[SQLiteMemory] ✅ OpenAI client ready. Using model: {EMBED_MODEL}")
+        return c
     except Exception as e:
         print(f"[SQLiteMemory] ⚠️ OpenAI init failed: {e}")
-else:
-    print("[SQLiteMemory] ⚠️ No OPENAI_API_KEY detected; semantic recall disabled.")
+        return None
+
+client = lazy(_make_client, "openai")  # falsy when there is no key, like the old `client = None`
+
+
+
+# ------------------------------
+# VECTOR ENCODING
+# ------------------------------
+def encode_vec(vec, dtype: str = EMBED_DTYPE) -> Optional[bytes]:
+    if vec is None:
+        return None
+    return np.asarray(vec, dtype="<" + ("f4" if dtype == "float32" else "f2")).tobytes()
 
+def decode_vec(blob, dtype: str = EMBED_DTYPE) -> Optional[np.ndarray]:
+    # Zero-copy view over the BLOB; callers upcast only when they need float32 math.
+    if not blob:
+        return None
+    return np.frombuffer(blob, dtype="<" + ("f4" if dtype == "float32" else "f2"))
 
 
 # ------------------------------
 # DATABASE INITIALIZATION
 # ------------------------------
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS facts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            subject TEXT NOT NULL,
-            relation TEXT NOT NULL,
-            value TEXT NOT NULL,
-            embedding TEXT,
-            UNIQUE(subject, relation, value)
-        )
-    """)
-    conn.commit()
-    conn.close()
+def _get_meta(conn, key: str) -> Optional[str]:
+    row = conn.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+    return row[0] if row else None
+
+def _set_meta(conn, key: str, value: str):
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+        (key, str(value)),
+    )
+
+def _migrate_embeddings(conn) -> int:
+    """One-shot: JSON TEXT embeddings → BLOB column, and re-encode BLOBs if EMBED_DTYPE changed."""
+    migrated = 0
+    with conn:
+        rows = conn.execute("SELECT id, embedding FROM facts WHERE embedding IS NOT NULL").fetchall()
+        for _id, emb_json in rows:
+            try:
+                blob = encode_vec(json.loads(emb_json))
+            except Exception:
+                blob = None
+            conn.execute("UPDATE facts SET embedding_vec=?, embedding=NULL WHERE id=?", (blob, _id))
+            migrated += 1
+
+        stored = _get_meta(conn, "vec_dtype")
+        if stored and stored != EMBED_DTYPE:
+            for _id, blob in conn.execute(
+                "SELECT id, embedding_vec FROM facts WHERE embedding_vec IS NOT NULL"
+            ).fetchall():
+                vec = decode_vec(blob, stored)
+                conn.execute("UPDATE facts SET embedding_vec=? WHERE id=?", (encode_vec(vec), _id))
+                migrated += 1
+        _set_meta(conn, "vec_dtype", EMBED_DTYPE)
+
+    if migrated:
+        conn.execute("VACUUM")  # hand the JSON text pages back to the filesystem
+        print(f"[SQLiteMemory] ✅ Migrated {migrated} embeddings to {EMBED_DTYPE} BLOBs.")
+    return migrated
+
+def file_fingerprint(path: str, hash_chunk: int = 1 << 20) -> Dict:
+    """size + mtime (cheap) and sha256 (only read when size/mtime moved)."""
+    st = os.stat(path)
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(hash_chunk), b""):
+            h.update(block)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": h.hexdigest()}
+
+def _clean_triples(triples: Iterable[Tuple[str, str, str]]) -> List[Tuple[str, str, str]]:
+    rows = {}
+    for subject, relation, value in triples:
+        subject, relation, value = str(subject).strip().lower(), str(relation).strip().lower(), str(value).strip()
+        if subject and relation and value:
+            rows[(subject, relation, value)] = None  # de-dupe, keep order
+    return list(rows)
+
+# ------------------------------
+# LEXICAL INDEX (FTS5)
+# ------------------------------
+# facts_fts is an external-content FTS5 table over facts (no text stored twice), kept in
+# sync by triggers. search() ranks with bm25 and prefix-matches the last query token, instead
+# of a leading-wildcard LIKE scan + SequenceMatcher over every hit.
+_FTS: Dict[str, bool] = {}
+
+def _init_fts(conn) -> bool:
+    try:
+        with conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type='table' AND name='facts_fts'"
+            ).fetchone()
+            conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS facts_fts USING fts5(
+                    subject, relation, value, content='facts', content_rowid='id', tokenize='unicode61'
+                )
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS facts_fts_insert AFTER INSERT ON facts BEGIN
+                    INSERT INTO facts_fts(rowid, subject, relation, value)
+                    VALUES (new.id, new.subject, new.relation, new.value);
+                END
+            """)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS facts_fts_delete AFTER DELETE ON facts BEGIN
+                    INSERT INTO facts_fts(facts_fts, rowid, subject, relation, value)
+                    VALUES ('delete', old.id, old.subject, old.relation, old.value);
+                END
+            """)
+            # only text edits touch the index (the embed worker's vector updates don't)
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS facts_fts_update AFTER UPDATE OF subject, relation, value ON facts
+                BEGIN
+                    INSERT INTO facts_fts(facts_fts, rowid, subject, relation, value)
+                    VALUES ('delete', old.id, old.subject, old.relation, old.value);
+                    INSERT INTO facts_fts(rowid, subject, relation, value)
+                    VALUES (new.id, new.subject, new.relation, new.value);
+                END
+            """)
+            if not exists:
+                conn.execute("INSERT INTO facts_fts(facts_fts) VALUES ('rebuild')")
+                print("[SQLiteMemory] 🔎 FTS5 index built.")
+        return True
+    except sqlite3.OperationalError as e:
+        print(f"[SQLiteMemory] ⚠️ FTS5 unavailable ({e}); search falls back to LIKE.")
+        return False
+
+
+def _fts_query(text: str, match_any: bool = False) -> Optional[str]:
+    # quoted terms, so user punctuation can't break FTS syntax; the last one is a prefix
+    # ("los ang" → "los" "ang"*) — prefixing every term expands common words into huge doclists.
+    # match_any: OR over the question's content words (hybrid recall on full questions)
+    if match_any:
+        toks = [t for t in re.findall(r"\w+", (text or "").lower()) if t not in _STOPWORDS]
+    else:
+        toks = re.findall(r"\w+", (text or "").lower())
+    if not toks:
+        return None
+    terms = [f'"{t}"' for t in toks[:-1]] + [f'"{toks[-1]}"*']
+    return (" OR " if match_any else " ").join(terms)
+
+
+def init_db(db_path: str = DB_PATH):
+    # Schema check runs once per pool (i.e. once per process), not once per question.
+    pool = get_pool(db_path)
+    if pool.schema_ready:
+        return
+    conn = pool.connection()
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS facts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                subject TEXT NOT NULL,
+                relation TEXT NOT NULL,
+                value TEXT NOT NULL,
+                embedding TEXT,
+                embedding_vec BLOB,
+                created_at REAL,
+                UNIQUE(subject, relation, value)
+            )
+        """)
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        # which facts each preload file contributed (row-level diff when the file changes)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS source_facts (
+                source TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                relation TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (source, subject, relation, value)
+            ) WITHOUT ROWID
+        """)
+        cols = {r[1] for r in conn.execute("PRAGMA table_info(facts)")}
+        if "embedding_vec" not in cols:
+            conn.execute("ALTER TABLE facts ADD COLUMN embedding_vec BLOB")
+        if "created_at" not in cols:
+            conn.execute("ALTER TABLE facts ADD COLUMN created_at REAL")
+        # recall() looks up (subject, relation); UNIQUE(subject, relation, value) already gives a
+        # covering index for that — only older tables created without it need one
+        leading = [
+            [r[2] for r in conn.execute(f"PRAGMA index_info('{ix[1]}')")][:2]
+            for ix in conn.execute("PRAGMA index_list(facts)")
+        ]
+        if ["subject", "relation"] not in leading:
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_facts_subject_relation ON facts(subject, relation)")
+        # embedding queue = facts still waiting for a vector (see embed_worker.py)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_facts_unembedded ON facts(id) WHERE embedding_vec IS NULL")
+
+        # Generation counter: bumped by triggers on every write, from any worker process,
+        # so resident caches (embedding matrix, digests) know when to reload. Each bump also
+        # logs which fact it was for, so the embedding index can catch up by id.
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('generation', '0')")
+        conn.execute("CREATE TABLE IF NOT EXISTS fact_changes (gen INTEGER PRIMARY KEY, fact_id INTEGER NOT NULL)")
+        for op, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            conn.execute(f"DROP TRIGGER IF EXISTS facts_gen_{op.lower()}")  # counter-only trigger, pre change log
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS facts_genlog_{op.lower()} AFTER {op} ON facts
+                BEGIN
+                    UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'generation';
+                    INSERT OR REPLACE INTO fact_changes (gen, fact_id)
+                        SELECT CAST(value AS INTEGER), {row}.id FROM meta WHERE key = 'generation';
+                    DELETE FROM fact_changes WHERE gen <= (
+                        SELECT CAST(value AS INTEGER) FROM meta WHERE key = 'generation'
+                    ) - {FACT_LOG_KEEP};
+                END
+            """)
+    _migrate_embeddings(conn)
+    _FTS[os.path.abspath(db_path)] = _init_fts(conn)
+    pool.schema_ready = True
     print("[SQLiteMemory] ✅ Database initialized.")
-init_db()
+
+
+# ------------------------------
+# RESIDENT EMBEDDING MATRIX
+# ------------------------------
+class _FactMatrix:
+    """One pre-normalized index per DB file, shared by every SQLiteMemory on that file."""
+
+    def __init__(self):
+        self.matrix = make_index(0)
+        self.generation: Optional[int] = None
+        self.lock = threading.Lock()
+
+_MATRICES: Dict[str, _FactMatrix] = {}
+_MATRICES_LOCK = threading.Lock()
+
+def _fact_matrix(db_path: str) -> _FactMatrix:
+    key = os.path.abspath(db_path)
+    with _MATRICES_LOCK:
+        fm = _MATRICES.get(key)
+        if fm is None:
+            fm = _MATRICES[key] = _FactMatrix()
+        return fm
+
+
+# Background embedders (embed_worker.EmbedWorker) register here per DB file; while one is
+# running, remember() stores the fact without a vector and leaves the embedding to it.
+_EMBED_WORKERS: Dict[str, object] = {}
+
+def register_embed_worker(db_path: str, worker):
+    key = os.path.abspath(db_path)
+    if worker is None:
+        _EMBED_WORKERS.pop(key, None)
+    else:
+        _EMBED_WORKERS[key] = worker
+
+def _embed_worker_for(db_path: str):
+    w = _EMBED_WORKERS.get(os.path.abspath(db_path))
+    return w if w is not None and w.running else None
+
+
+_STOPWORDS = {"what", "whats", "who", "is", "are", "the", "a", "an", "my", "your", "his", "her", "their",
+              "of", "do", "does", "you", "know", "tell", "me", "about", "s", "and", "to", "in"}
+
+def content_tokens(text: str):
+    return {t for t in re.findall(r"[a-z0-9]+", text.lower()) if t not in _STOPWORDS}
 
 
 # ------------------------------
 # CORE CLASS
 # ------------------------------
 class SQLiteMemory:
-    def __init__(self):
-        self.db_path = DB_PATH
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or DB_PATH
+        self.pool = get_pool(self.db_path)
+        init_db(self.db_path)
 
     def _connect(self):
-        return sqlite3.connect(self.db_path)
+        # Pooled per-thread connection — callers must NOT close it.
+        return self.pool.connection()
+
+    def pool_stats(self):
+        return self.pool.stats()
+
+    def generation(self) -> int:
+        row = self._connect().execute("SELECT value FROM meta WHERE key='generation'").fetchone()
+        return int(row[0]) if row else 0
+
+    def _ann_path(self) -> str:
+        # persisted IVF index lives next to the DB (data/memory_store.ivf.npz)
+        return os.path.splitext(self.db_path)[0] + ".ivf.npz"
+
+    def _catch_up(self, index, gen_from, gen_to: int) -> bool:
+        """Patch `index` from generation gen_from to gen_to by fact id, using the change log.
+        False when the log doesn't cover that span (pruned, or older than the log)."""
+        if not isinstance(gen_from, int) or not gen_from < gen_to or gen_to - gen_from > FACT_LOG_KEEP:
+            return False
+        conn = self._connect()
+        logged = conn.execute("SELECT COUNT(*) FROM fact_changes WHERE gen > ? AND gen <= ?",
+                              (gen_from, gen_to)).fetchone()[0]
+        if logged != gen_to - gen_from:
+            return False
+        rows = conn.execute("""
+            SELECT c.fact_id, f.embedding_vec
+            FROM (SELECT DISTINCT fact_id FROM fact_changes WHERE gen > ? AND gen <= ?) c
+            LEFT JOIN facts f ON f.id = c.fact_id
+        """, (gen_from, gen_to)).fetchall()
+        for row_id, blob in rows:
+            vec = decode_vec(blob)
+            if vec is None or not index.upsert(row_id, vec):  # deleted, not embedded yet, or another dim
+                index.remove([row_id])
+        return True
+
+    def _matrix(self):
+        """Resident index (exact or IVF). When another writer bumped the generation it is patched
+        by id from the change log; a full reload happens only when the log doesn't reach back."""
+        fm = _fact_matrix(self.db_path)
+        gen = self.generation()
+        if fm.generation == gen:
+            return fm.matrix
+        with fm.lock:
+            if fm.generation == gen:
+                return fm.matrix
+            if self._catch_up(fm.matrix, fm.generation, gen):
+                fm.generation = gen
+                return fm.matrix
+            ann_path = self._ann_path()
+            saved = None
+            if ANN_INDEX != "exact" and os.path.exists(ann_path):
+                try:
+                    saved, meta = IVFIndex.load_file(ann_path)
+                    saved_gen = meta.get("generation")
+                    if saved_gen == gen or self._catch_up(saved, saved_gen, gen):
+                        fm.matrix, fm.generation = saved, gen
+                        print(f"[SQLiteMemory] 🔄 IVF index restored: {len(saved)} rows "
+                              f"(saved at gen {saved_gen}, now {gen})")
+                        return fm.matrix
+                except Exception as e:
+                    print(f"[SQLiteMemory] ⚠️ IVF index load failed: {e}")
+
+            rows = self._connect().execute(
+                "SELECT id, embedding_vec FROM facts WHERE embedding_vec IS NOT NULL"
+            ).fetchall()
+            vecs = [decode_vec(b) for _, b in rows]
+            dim = len(vecs[0]) if vecs else 0
+            keep = [(i, v) for (i, _), v in zip(rows, vecs) if len(v) == dim]
+
+            idx = make_index(len(keep))
+            if idx.kind == "ivf" and saved is not None:
+                idx = saved  # stale rows, but its trained centroids skip k-means
+            if idx.kind != fm.matrix.kind or idx is saved:
+                fm.matrix = idx
+            fm.matrix.load([i for i, _ in keep], np.stack([v for _, v in keep]) if keep else [])
+            fm.generation = gen
+            if fm.matrix.kind == "ivf":
+                fm.matrix.save(ann_path, generation=gen)
+            print(f"[SQLiteMemory] 🔄 Embedding {fm.matrix.kind} index loaded: {len(keep)} rows (gen {gen})")
+        return fm.matrix
+
+    def _sync_matrix(self, gen_before: int, gen_after: int, writes: int, upserts=(), removed=()):
+        """Apply our own write in place. If anyone else wrote too, leave the index at its old
+        generation: the next _matrix() catches up on both writes from the change log."""
+        fm = _fact_matrix(self.db_path)
+        with fm.lock:
+            if fm.generation is None or fm.generation != gen_before or gen_after != gen_before + writes:
+                return
+            for row_id, vec in upserts:
+                if vec is None:
+                    fm.matrix.remove([row_id])
+                else:
+                    fm.matrix.upsert(row_id, vec)
+            fm.matrix.remove(removed)
+            fm.generation = gen_after
 
     def _embed(self, text: str):
         if not client or not text:
             print("[Embed ❌] Client missing or empty text.")
             return None
         try:
-            print(f"[Embed 🚀] Creating embedding for: {text}")
-            resp = client.embeddings.create(model=EMBED_MODEL, input=text)
-            emb = resp.data[0].embedding
+            emb = get_embedding(text, EMBED_MODEL, client)
             print(f"[Embed ✅] Length: {len(emb)}")
-            return json.dumps(emb)
+            return emb
         except Exception as e:
             print(f"[Embed Error] {e}")
             return None
@@ -80,100 +428,270 @@ class SQLiteMemory:
 
 
     def _cosine(self, a, b):
-        if not a or not b:
+        if a is None or b is None or len(a) == 0 or len(b) == 0:
             return -1.0
-        dot = sum(x * y for x, y in zip(a, b))
-        norm_a = math.sqrt(sum(x * x for x in a))
-        norm_b = math.sqrt(sum(y * y for y in b))
+        a = np.asarray(a, dtype=np.float32)
+        b = np.asarray(b, dtype=np.float32)
+        norm_a = float(np.linalg.norm(a))
+        norm_b = float(np.linalg.norm(b))
         if norm_a == 0 or norm_b == 0:
             return -1.0
-        return dot / (norm_a * norm_b)
+        return float(np.dot(a, b)) / (norm_a * norm_b)
 
-    def remember(self, subject: str, relation: str, value: str):
+    def remember(self, subject: str, relation: str, value: str, defer: Optional[bool] = None):
+        """Store one fact. With a background embedder running (or defer=True) the row goes in
+        with embedding_vec NULL and the call returns without touching the network."""
         subject, relation, value = subject.strip().lower(), relation.strip().lower(), value.strip()
+        worker = _embed_worker_for(self.db_path)
+        if defer is None:
+            defer = worker is not None
+        if defer:
+            return self._remember_deferred(subject, relation, value, worker)
 
         # 🧠 Use all 3 fields for embedding context
         emb = self._embed(f"{subject} {relation} {value}") if client else None
-        if emb:
-            print("[Embed ✅] Vector length:", len(json.loads(emb)))
+        if emb is not None:
+            print("[Embed ✅] Vector length:", len(emb))
         else:
             print("[Embed ⚠️] Embedding is None – check API key or OpenAI client")
 
         conn = self._connect()
-        cur = conn.cursor()
         try:
+            gen_before = self.generation()
             # UPSERT logic: if row exists, update embedding too
-            cur.execute("""
-                INSERT INTO facts (subject, relation, value, embedding)
-                VALUES (?, ?, ?, ?)
-                ON CONFLICT(subject, relation, value) DO UPDATE SET embedding=excluded.embedding
-            """, (subject, relation, value, emb))
-            conn.commit()
+            with conn:
+                conn.execute("""
+                    INSERT INTO facts (subject, relation, value, embedding_vec, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(subject, relation, value) DO UPDATE SET embedding_vec=excluded.embedding_vec
+                """, (subject, relation, value, encode_vec(emb), time.time()))
+                row_id = conn.execute(
+                    "SELECT id FROM facts WHERE subject=? AND relation=? AND value=?", (subject, relation, value)
+                ).fetchone()[0]
+                gen_after = self.generation()
+            self._sync_matrix(gen_before, gen_after, 1, upserts=[(row_id, emb)])
             print(f"[SQLiteMemory] ✅ Remembered: {subject} → {relation}: {value}")
         except Exception as e:
             print(f"[SQLiteMemory] ⚠️ Insert failed: {e}")
-        finally:
-            conn.close()
 
+    def _remember_deferred(self, subject: str, relation: str, value: str, worker=None):
+        conn = self._connect()
+        try:
+            gen_before = self.generation()
+            with conn:
+                # an existing row keeps its vector; a new one waits in the embedding queue
+                cur = conn.execute("""
+                    INSERT INTO facts (subject, relation, value, created_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(subject, relation, value) DO NOTHING
+                """, (subject, relation, value, time.time()))
+                writes = cur.rowcount
+                gen_after = self.generation()
+            self._sync_matrix(gen_before, gen_after, writes)
+            if worker is not None:
+                worker.notify()
+            print(f"[SQLiteMemory] ✅ Remembered (embedding queued): {subject} → {relation}: {value}")
+        except Exception as e:
+            print(f"[SQLiteMemory] ⚠️ Insert failed: {e}")
+
+    def pending_embeddings(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM facts WHERE embedding_vec IS NULL").fetchone()[0]
 
+    def remember_many(self, triples: Iterable[Tuple[str, str, str]], batch_size: int = EMBED_BATCH) -> Dict:
+        """Bulk remember: batched embedding requests + one executemany transaction."""
+        t0 = time.perf_counter()
+        rows = _clean_triples(triples)
+        if not rows:
+            return {"facts": 0, "embedded": 0, "seconds": 0.0, "facts_per_sec": 0.0}
 
-    def recall(self, subject: str, relation: str):
-        conn = self._connect()
-        cur = conn.cursor()
-        cur.execute("SELECT value FROM facts WHERE subject=? AND relation=?", (subject.lower(), relation.lower()))
-        rows = [r[0] for r in cur.fetchall()]
-        conn.close()
-        return rows[0] if len(rows) == 1 else rows or None
+        vecs = [None] * len(rows)
+        if client:
+            try:
+                vecs = get_embeddings([f"{s} {r} {v}" for s, r, v in rows], EMBED_MODEL, client,
+                                      batch_size=batch_size)
+            except Exception as e:
+                print(f"[Embed Error] batch of {len(rows)}: {e}")
+        t_embed = time.perf_counter()
 
-    def search(self, query: str):
+        now = time.time()
         conn = self._connect()
-        cur = conn.cursor()
-        q = f"%{query.lower()}%"
-        cur.execute("SELECT subject, relation, value FROM facts WHERE relation LIKE ? OR value LIKE ?", (q, q))
-        results = cur.fetchall()
-        conn.close()
-        if results:
-            best = max(results, key=lambda x: SequenceMatcher(None, query, x[1]).ratio())
-            return f"{best[0].title()}'s {best[1]} is {best[2]}"
-        return None
-
-    def semantic_search(self, query: str):
-        if not client:
-            return None
+        try:
+            with conn:
+                conn.executemany("""
+                    INSERT INTO facts (subject, relation, value, embedding_vec, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(subject, relation, value) DO UPDATE SET embedding_vec=excluded.embedding_vec
+                """, [(s, r, v, encode_vec(e), now) for (s, r, v), e in zip(rows, vecs)])
+        except Exception as e:
+            print(f"[SQLiteMemory] ⚠️ Bulk insert failed: {e}")
+            return {"facts": 0, "embedded": 0, "error": str(e)}
+        _fact_matrix(self.db_path).generation = None  # bulk write: reload lazily on next query
+
+        secs = time.perf_counter() - t0
+        stats = {
+            "facts": len(rows),
+            "embedded": sum(1 for e in vecs if e is not None),
+            "embed_seconds": round(t_embed - t0, 3),
+            "seconds": round(secs, 3),
+            "facts_per_sec": round(len(rows) / secs, 1) if secs else 0.0,
+        }
+        print(f"[SQLiteMemory] ✅ Remembered {stats['facts']} facts in {stats['seconds']}s "
+              f"({stats['facts_per_sec']}/s)")
+        return stats
+
+    # ---- preload sources -------------------------------------------------------
+    def source_fingerprint(self, source: str) -> Optional[Dict]:
+        raw = _get_meta(self._connect(), f"source:{source}")
+        return json.loads(raw) if raw else None
+
+    def sync_file(self, path: str, parse: Callable[[str], Iterable[Tuple[str, str, str]]]) -> Dict:
+        """Import a preload file only as far as it changed since the last boot.
+
+        Unchanged size+mtime → skipped without reading; same sha256 → fingerprint refreshed;
+        otherwise the parsed facts are diffed against what this file contributed last time:
+        new rows go through remember_many and are recorded as this file's, and rows the file
+        dropped are deleted unless another source still lists them. A listed row that is
+        already in facts without any source (taught at runtime, or from a boot before
+        fingerprints existed) is left to its owner: not re-embedded, not recorded, so editing
+        the file never deletes it. A missing file leaves its facts alone."""
+        t0 = time.perf_counter()
+        source = os.path.abspath(path)
+        out = {"source": os.path.basename(path), "status": "missing", "added": 0, "removed": 0, "embedded": 0}
+        if not os.path.exists(path):
+            return out
+        prev = self.source_fingerprint(source)
+        st = os.stat(path)
+        if prev and prev["size"] == st.st_size and prev["mtime_ns"] == st.st_mtime_ns:
+            out["status"] = "unchanged"
+            return out
+
+        fp = file_fingerprint(path)
         conn = self._connect()
-        cur = conn.cursor()
-        cur.execute("SELECT subject, relation, value, embedding FROM facts WHERE embedding IS NOT NULL")
-        rows = cur.fetchall()
-        conn.close()
-
-        # normalize query to match how we embed facts
-        normalized_q = query.lower().replace("’", "'").replace("whats", "what is").replace("ty’s", "ty").replace("ty's", "ty")
-        q_emb_resp = client.embeddings.create(model=EMBED_MODEL, input=normalized_q)
+        if prev and prev["sha256"] == fp["sha256"]:
+            with conn:
+                _set_meta(conn, f"source:{source}", json.dumps(fp))
+            out["status"] = "touched"
+            return out
+
+        rows = _clean_triples(parse(path))
+        old = set(conn.execute(
+            "SELECT subject, relation, value FROM source_facts WHERE source=?", (source,)
+        ).fetchall())
+        new = set(rows)
+        added = [r for r in rows if r not in old]
+        removed = [r for r in old if r not in new]
+        fresh, claimed = [], []
+        for r in added:
+            if not conn.execute("SELECT 1 FROM facts WHERE subject=? AND relation=? AND value=?", r).fetchone():
+                fresh.append(r)
+                claimed.append(r)
+            elif conn.execute("SELECT 1 FROM source_facts WHERE subject=? AND relation=? AND value=? LIMIT 1",
+                              r).fetchone():
+                claimed.append(r)  # another file's row: share it
+        if fresh:
+            out["embedded"] = self.remember_many(fresh).get("embedded", 0)
+
+        deleted = 0
+        with conn:
+            conn.executemany("DELETE FROM source_facts WHERE source=? AND subject=? AND relation=? AND value=?",
+                             [(source, *r) for r in removed])
+            for r in removed:
+                if not conn.execute("SELECT 1 FROM source_facts WHERE subject=? AND relation=? AND value=?",
+                                    r).fetchone():
+                    deleted += conn.execute("DELETE FROM facts WHERE subject=? AND relation=? AND value=?",
+                                            r).rowcount
+            conn.executemany("INSERT OR IGNORE INTO source_facts (source, subject, relation, value) "
+                             "VALUES (?, ?, ?, ?)", [(source, *r) for r in claimed])
+            _set_meta(conn, f"source:{source}", json.dumps(fp))
+        if deleted:
+            _fact_matrix(self.db_path).generation = None
+
+        out.update(status="synced", facts=len(rows), added=len(claimed), kept=len(added) - len(claimed),
+                   removed=len(removed),
+                   ms=round((time.perf_counter() - t0) * 1000, 1))
+        print(f"[SQLiteMemory] 🔄 {out['source']}: +{len(claimed)} / -{len(removed)} rows "
+              f"({out['embedded']} embedded)")
+        return out
+
+    def forget(self, subject: str, relation: str) -> int:
+        """Delete every value stored for (subject, relation); returns rows removed."""
+        conn = self._connect()
+        gen_before = self.generation()
+        with conn:
+            ids = [r[0] for r in conn.execute(
+                "SELECT id FROM facts WHERE subject=? AND relation=?", (subject.lower(), relation.lower())
+            )]
+            if ids:
+                conn.executemany("DELETE FROM facts WHERE id=?", [(i,) for i in ids])
+            gen_after = self.generation()
+        if ids:
+            self._sync_matrix(gen_before, gen_after, len(ids), removed=ids)
+            print(f"[SQLiteMemory] 🗑️ Forgot: {subject} → {relation} ({len(ids)} rows)")
+        return len(ids)
+
+
+
+    def recall_rows(self, subject: str, relation: str):
+        """[(id, subject, relation, value)] for an exact (subject, relation) key."""
+        return self._connect().execute(
+            "SELECT id, subject, relation, value FROM facts WHERE subject=? AND relation=?",
+            (subject.lower(), relation.lower()),
+        ).fetchall()
+
+    def relations(self, subject: str):
+        """Distinct relations stored for one subject."""
+        return [r for (r,) in self._connect().execute(
+            "SELECT DISTINCT relation FROM facts WHERE subject=?", (subject.lower(),)
+        )]
 
-        q_emb = q_emb_resp.data[0].embedding
+    def recall(self, subject: str, relation: str):
+        cur = self._connect().execute(
+            "SELECT value FROM facts WHERE subject=? AND relation=?", (subject.lower(), relation.lower())
+        )
+        rows = [r[0] for r in cur.fetchall()]
+        return rows[0] if len(rows) == 1 else rows or None
 
-        best_score, best_row = 0.0, None
-        for sub, rel, val, emb_json in rows:
-            try:
-                emb = json.loads(emb_json)
-                score = self._cosine(q_emb, emb)
-                if score > best_score:
-                    best_score, best_row = score, (sub, rel, val)
-            except Exception:
-                continue
+    def lexical_search(self, query: str, k: int = 10, match_any: bool = False):
+        """BM25-ranked prefix match over relation/value → [(id, subject, relation, value, score)],
+        best first (score is -bm25, higher is better). Relation hits weigh double.
+        match_any=True ORs the content words of a full question and also searches subject."""
+        if not _FTS.get(os.path.abspath(self.db_path)):
+            return self._like_search(query, k)
+        match = _fts_query(query, match_any)
+        if not match:
+            return []
+        cols = "{subject relation value}" if match_any else "{relation value}"
+        try:
+            rows = self._connect().execute("""
+                SELECT f.id, f.subject, f.relation, f.value, -bm25(facts_fts, 1.0, 2.0, 1.0) AS score
+                FROM facts_fts JOIN facts f ON f.id = facts_fts.rowid
+                WHERE facts_fts MATCH ?
+                ORDER BY bm25(facts_fts, 1.0, 2.0, 1.0)
+                LIMIT ?
+            """, (f"{cols} : ({match})", k)).fetchall()
+        except sqlite3.OperationalError as e:
+            print(f"[SQLiteMemory] ⚠️ FTS query failed for {query!r}: {e}")
+            return []
+        return [(i, s, r, v, float(sc)) for i, s, r, v, sc in rows]
+
+    def _like_search(self, query: str, k: int):
+        # pre-FTS5 path (SQLite built without FTS5)
+        q = f"%{query.lower()}%"
+        rows = self._connect().execute(
+            "SELECT id, subject, relation, value FROM facts WHERE relation LIKE ? OR value LIKE ?", (q, q)
+        ).fetchall()
+        scored = [(i, s, r, v, SequenceMatcher(None, query, r).ratio()) for i, s, r, v in rows]
+        return sorted(scored, key=lambda x: -x[4])[:k]
 
-        if best_row and best_score >= 0.55:
-            sub, rel, val = best_row
-            print(f"[Semantic ✅] '{query}' → {rel} ({best_score:.2f})")
+    def search(self, query: str):
+        hits = self.lexical_search(query, k=1)
+        if hits:
+            _, sub, rel, val, _ = hits[0]
             return f"{sub.title()}'s {rel} is {val}"
         return None
 
     def export(self):
-        conn = self._connect()
-        cur = conn.cursor()
-        cur.execute("SELECT subject, relation, value FROM facts")
+        cur = self._connect().execute("SELECT subject, relation, value FROM facts")
         rows = cur.fetchall()
-        conn.close()
         data = {}
         for sub, rel, val in rows:
             data.setdefault(sub, {}).setdefault(rel, []).append(val)
@@ -202,36 +720,65 @@ class SQLiteMemory:
             f"keywords: dream, goal, desire, ultimate, main, favorite, most wanted."
         )
 
-        # create query embedding
-        q_emb_resp = client.embeddings.create(model=EMBED_MODEL, input=boosted_query)
-        q_emb = q_emb_resp.data[0].embedding
-
-        # get all facts with embeddings
-        conn = self._connect()
-        cur = conn.cursor()
-        cur.execute("SELECT subject, relation, value, embedding FROM facts WHERE embedding IS NOT NULL")
-        rows = cur.fetchall()
-        conn.close()
-
-        best_score, best_row = 0.0, None
-        for sub, rel, val, emb_json in rows:
-            try:
-                emb = json.loads(emb_json)
-                score = self._cosine(q_emb, emb)
-                if score > best_score:
-                    best_score, best_row = score, (sub, rel, val)
-            except Exception:
-                continue
+        try:
+            hits = self.vector_search(boosted_query, k=1)
+        except Exception as e:
+            print(f"[Semantic ⚠️] query embedding failed: {e}")
+            return self._lexical_unembedded(normalized_q)
 
+        best_score = hits[0][4] if hits else 0.0
         # 🔥 FINAL THRESHOLD (aggressive recall mode)
-        if best_row and best_score >= 0.45:
-            sub, rel, val = best_row
+        if hits and best_score >= 0.45:
+            _, sub, rel, val, _ = hits[0]
             print(f"[Semantic ✅] '{query}' → {rel} ({best_score:.2f})")
             return f"{sub.title()}'s {rel} is {val}"
 
+        fallback = self._lexical_unembedded(normalized_q)
+        if fallback:
+            return fallback
         print(f"[Semantic ❌] '{query}' → No strong match (best_score={best_score:.2f})")
         return None
 
+    def vector_search(self, query: str, k: int = 5):
+        """[(id, subject, relation, value, cosine)] from the resident index, best first."""
+        if not client or not query:
+            return []
+        # query embedding is cached: repeat questions make no API call
+        q_emb = get_embedding(query, EMBED_MODEL, client)
+        # one mat-vec product against the resident, pre-normalized matrix
+        hits = self._matrix().top_k(q_emb, k=k)
+        if not hits:
+            return []
+        marks = ",".join("?" * len(hits))
+        rows = {r[0]: r for r in self._connect().execute(
+            f"SELECT id, subject, relation, value FROM facts WHERE id IN ({marks})", [i for i, _ in hits]
+        )}
+        return [(*rows[i], score) for i, score in hits if i in rows]
+
+    def _lexical_unembedded(self, query: str, limit: int = 500):
+        """Token-overlap match over facts still waiting in the embedding queue (newest first),
+        so a fact taught a moment ago is answerable before its vector lands."""
+        q = content_tokens(query)
+        if not q:
+            return None
+        rows = self._connect().execute(
+            "SELECT subject, relation, value FROM facts WHERE embedding_vec IS NULL ORDER BY id DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        best, best_key = None, (0, 0)
+        for sub, rel, val in rows:
+            rel_hits = len(q & content_tokens(rel))
+            if not rel_hits:
+                continue  # the question has to name the relation
+            key = (rel_hits, len(q & content_tokens(f"{sub} {val}")))
+            if key > best_key:
+                best, best_key = (sub, rel, val), key
+        if best:
+            sub, rel, val = best
+            print(f"[Semantic ↩️] '{query}' → {rel} (lexical, not yet embedded)")
+            return f"{sub.title()}'s {rel} is {val}"
+        return None
+
 
 
     # ------------------------------
@@ -0,0 +1,169 @@
+# sqlite_pool.py — per-thread pooled SQLite connections (WAL + tuned pragmas)
+# -------------------------------------------------------------------------------------------
+# One long-lived connection per (process, thread) instead of connect/close on every call.
+# - WAL journal so readers never block the writer (gunicorn workers + threads)
+# - synchronous / cache_size / mmap_size / busy_timeout tuned via env
+# - sqlite3's per-connection statement cache gives prepared-statement reuse for free
+#   once the connection stays open
+# - fork-safe: a pool inherited from the gunicorn master is dropped and reopened in the worker
+# - a thread's connection is closed when the thread exits (a finalizer on its thread-local
+#   slot), so short-lived threads don't leave file descriptors behind
+# -------------------------------------------------------------------------------------------
+
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from typing import Dict, Any, Optional
+
+# ------------------------------
+# CONFIGURATION (env overrides)
+# ------------------------------
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", "-16000"))        # negative = KiB (~16 MB)
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(64 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_STMT_CACHE = int(os.getenv("SQLITE_STMT_CACHE", "256"))           # prepared statements kept per conn
+
+
+class _Slot:
+    """Per-thread holder of a connection; collected with the thread's locals when it exits."""
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+class SQLitePool:
+    """Thread-local connection pool for a single SQLite database file."""
+
+    def __init__(self, db_path: str, journal_mode: str = SQLITE_JOURNAL_MODE,
+                 synchronous: str = SQLITE_SYNCHRONOUS, cache_size: int = SQLITE_CACHE_SIZE,
+                 mmap_size: int = SQLITE_MMAP_SIZE, busy_timeout_ms: int = SQLITE_BUSY_TIMEOUT_MS,
+                 stmt_cache: int = SQLITE_STMT_CACHE):
+        self.db_path = db_path
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.stmt_cache = stmt_cache
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._conns: Dict[int, sqlite3.Connection] = {}  # id(slot) → conn; not thread idents, which get reused
+        self._pid = os.getpid()
+        self._opened = 0
+        self._checkouts = 0
+        self._open_ms = 0.0
+        self.schema_ready = False
+
+    # ---- internals ------------------------------------------------------------
+    def _reset_after_fork(self):
+        # Connections must never cross a fork; drop the inherited ones without closing
+        # (closing would touch the parent's file locks).
+        self._local = threading.local()
+        self._conns = {}
+        self._pid = os.getpid()
+
+    def _open(self) -> sqlite3.Connection:
+        t0 = time.perf_counter()
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout_ms / 1000.0,
+            cached_statements=self.stmt_cache,
+        )
+        cur = conn.cursor()
+        try:
+            cur.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        except sqlite3.DatabaseError as e:
+            print(f"[SQLitePool] ⚠️ journal_mode={self.journal_mode} rejected: {e}")
+        cur.execute(f"PRAGMA synchronous={self.synchronous}")
+        cur.execute(f"PRAGMA cache_size={int(self.cache_size)}")
+        cur.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        cur.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        cur.execute("PRAGMA temp_store=MEMORY")
+        cur.close()
+        self._open_ms += (time.perf_counter() - t0) * 1000.0
+        return conn
+
+    def _release(self, key: int, conn: sqlite3.Connection, pid: int):
+        # Runs when the owning thread's locals are collected, possibly on another thread and
+        # inside gc: no pool lock here (dict.pop is atomic), and never close across a fork.
+        self._conns.pop(key, None)
+        if pid == os.getpid():
+            try:
+                conn.close()
+            except Exception:
+                pass  # wrong-thread close: dropping the last reference closes it anyway
+
+    # ---- public API -----------------------------------------------------------
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        if os.getpid() != self._pid:
+            with self._lock:
+                if os.getpid() != self._pid:
+                    self._reset_after_fork()
+
+        slot = getattr(self._local, "slot", None)
+        with self._lock:
+            self._checkouts += 1
+        if slot is not None:
+            return slot.conn
+
+        conn = self._open()
+        slot = self._local.slot = _Slot(conn)
+        weakref.finalize(slot, self._release, id(slot), conn, os.getpid())
+        with self._lock:
+            self._conns[id(slot)] = conn
+            self._opened += 1
+        return conn
+
+    def close_all(self):
+        """Close every connection this process opened (shutdown / tests)."""
+        with self._lock:
+            conns, self._conns = list(self._conns.values()), {}
+            self._local = threading.local()
+        for c in conns:
+            try:
+                c.close()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            opened, checkouts = self._opened, self._checkouts
+            live = len(self._conns)
+        return {
+            "db_path": self.db_path,
+            "pid": self._pid,
+            "live_connections": live,
+            "opened_total": opened,
+            "checkouts": checkouts,
+            "reuse_ratio": round(1.0 - (opened / checkouts), 4) if checkouts else 0.0,
+            "avg_open_ms": round(self._open_ms / opened, 3) if opened else 0.0,
+            "pragmas": {
+                "journal_mode": self.journal_mode,
+                "synchronous": self.synchronous,
+                "cache_size": self.cache_size,
+                "mmap_size": self.mmap_size,
+                "busy_timeout_ms": self.busy_timeout_ms,
+                "stmt_cache": self.stmt_cache,
+            },
+        }
+
+
+# simple module-level registry: one pool per database file
+_POOLS: Dict[str, SQLitePool] = {}
+_POOLS_LOCK = threading.Lock()
+
+def get_pool(db_path: str, **overrides) -> SQLitePool:
+    key = os.path.abspath(db_path)
+    with _POOLS_LOCK:
+        pool: Optional[SQLitePool] = _POOLS.get(key)
+        if pool is None:
+            pool = SQLitePool(key, **overrides)
+            _POOLS[key] = pool
+        return pool
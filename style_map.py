@@ -1,11 +1,11 @@
+from keyword_matcher import TRIGGERS, scan
+
 style_map = {
     "from the heart": "Heart",
     "beast mode": "Beast Mode",
     "keep it chill": "Real Chill"
 }
+TRIGGERS.register("style", {tone: [phrase] for phrase, tone in style_map.items()})
 
 def detect_style(user_input):
-    for phrase, tone in style_map.items():
-        if phrase in user_input.lower():
-            return tone
-    return "Tactical"
\ No newline at end of file
+    return scan(user_input).first_tag("style", list(style_map.values())) or "Tactical"
\ No newline at end of file
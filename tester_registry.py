@@ -0,0 +1,182 @@
+# tester_registry.py — closed-test tester registry: in-memory key → tester map over a JSON file
+# -------------------------------------------------------------------------------------------
+# Key checks used to open + json.load the registry file (sometimes twice) per request. Here:
+#   - the file is parsed once into {key: {"name": ..., ...}}; lookups are dict hits
+#   - it is re-read only when its (mtime, size) changed — checked at most once per
+#     TESTER_REGISTRY_CHECK_SECS, so edits by hand or by another worker still show up
+#   - writes are write-through: merged under an flock, written to a temp file, fsync'ed and
+#     os.replace'd over the original (readers never see a half-written registry)
+# Accepted shapes (kept on write): {"KEY": "Name"}, [{"key": "KEY", "name": "Name"}, ...],
+# {"testers": {"KEY": {"name": "Name", ...}}}. A "logs" list in the last shape is moved,
+# once, into the append-only log given as `logs_to` and dropped from the registry file.
+#
+# Env: TESTER_REGISTRY_CHECK_SECS=1.0
+# -------------------------------------------------------------------------------------------
+
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from event_log import EventLog, file_lock
+
+TESTER_REGISTRY_CHECK_SECS = float(os.getenv("TESTER_REGISTRY_CHECK_SECS", "1.0"))
+
+
+def atomic_write_json(path: str, data: Any, indent: int = 2):
+    """Write JSON to a temp file in the same directory, fsync, then os.replace over `path`."""
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=folder)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _parse(raw: Any) -> Tuple[str, Dict[str, Dict[str, Any]]]:
+    """(shape, {key: tester}) for any of the accepted file shapes."""
+    if isinstance(raw, dict) and isinstance(raw.get("testers"), dict):
+        return "nested", {str(k): (dict(v) if isinstance(v, dict) else {"name": str(v)})
+                          for k, v in raw["testers"].items()}
+    if isinstance(raw, list):
+        return "list", {str(t["key"]): {k: v for k, v in t.items() if k != "key"}
+                        for t in raw if isinstance(t, dict) and t.get("key")}
+    if isinstance(raw, dict):
+        return "flat", {str(k): (dict(v) if isinstance(v, dict) else {"name": str(v)}) for k, v in raw.items()}
+    return "flat", {}
+
+
+def _dump(shape: str, testers: Dict[str, Dict[str, Any]]) -> Any:
+    if shape == "nested":
+        return {"testers": testers}
+    if shape == "list":
+        return [{"key": k, **v} for k, v in testers.items()]
+    return {k: v.get("name", "") for k, v in testers.items()}
+
+
+class TesterRegistry:
+    def __init__(self, path: str, logs_to: Optional[EventLog] = None, shape: str = "nested",
+                 check_secs: float = TESTER_REGISTRY_CHECK_SECS):
+        self.path = path
+        self.logs_to = logs_to
+        self.shape = shape  # used when the file does not exist yet
+        self.check_secs = check_secs
+        self._lock = threading.RLock()
+        self._testers: Dict[str, Dict[str, Any]] = {}
+        self._upper: Dict[str, str] = {}
+        self._sig: Optional[Tuple[int, int]] = None
+        self._checked = 0.0
+        self._loaded = False
+        self.counters = {"lookups": 0, "loads": 0, "writes": 0, "logs_moved": 0}
+
+    # ---- loading --------------------------------------------------------------
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _read(self) -> Tuple[str, Dict[str, Dict[str, Any]], list]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f)
+        except FileNotFoundError:
+            return self.shape, {}, []
+        except Exception as e:
+            print(f"[Registry ⚠️] {os.path.basename(self.path)} unreadable, keeping last good copy: {e}")
+            return self.shape, dict(self._testers), []
+        shape, testers = _parse(raw)
+        logs = raw.get("logs") if shape == "nested" and isinstance(raw.get("logs"), list) else []
+        return shape, testers, logs
+
+    def _install(self, shape: str, testers: Dict[str, Dict[str, Any]]):
+        self.shape = shape
+        self._testers = testers
+        self._upper = {k.upper(): k for k in testers}
+        self._sig = self._stat()
+
+    def _refresh(self, force: bool = False, locked: bool = False):
+        now = time.monotonic()
+        if not force and self._loaded and now - self._checked < self.check_secs:
+            return
+        self._checked = now
+        if not force and self._loaded and self._stat() == self._sig:
+            return
+        with self._lock:
+            shape, testers, logs = self._read()
+            if logs and self.logs_to is not None:
+                self._move_logs(locked)
+                shape, testers, _ = self._read()
+            self._install(shape, testers)
+            self._loaded = True
+            self.counters["loads"] += 1
+
+    def _move_logs(self, locked: bool = False):
+        """Append the registry's embedded "logs" to the event log and rewrite the file without them."""
+        if not locked:  # flock is per open file: never take it again when the caller holds it
+            with file_lock(self.path + ".lock"):
+                return self._move_logs(locked=True)
+        shape, testers, logs = self._read()  # re-read under the lock: another worker may have moved them
+        if not logs:
+            return
+        self.logs_to.append_many([e for e in logs if isinstance(e, dict)])
+        atomic_write_json(self.path, _dump(shape, testers))
+        self.counters["logs_moved"] += len(logs)
+        print(f"[Registry] 📦 Moved {len(logs)} log entries out of {os.path.basename(self.path)}")
+
+    # ---- lookups --------------------------------------------------------------
+    def exists(self) -> bool:
+        self._refresh()
+        return self._sig is not None
+
+    def get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Tester record for `key` (exact, then case-insensitive match), or None."""
+        self._refresh()
+        self.counters["lookups"] += 1
+        if not key:
+            return None
+        key = key.strip()
+        hit = self._testers.get(key)
+        if hit is None:
+            real = self._upper.get(key.upper())
+            hit = self._testers.get(real) if real else None
+        return hit
+
+    def name(self, key: Optional[str]) -> Optional[str]:
+        hit = self.get(key)
+        return hit.get("name") if hit else None
+
+    def all(self) -> Dict[str, Dict[str, Any]]:
+        self._refresh()
+        return {k: dict(v) for k, v in self._testers.items()}
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._testers)
+
+    # ---- writes ---------------------------------------------------------------
+    def register(self, key: str, name: str, limit: Optional[int] = None, **extra) -> bool:
+        """Add/update a tester (write-through, atomic). False when `limit` testers already exist."""
+        with self._lock, file_lock(self.path + ".lock"):
+            self._refresh(force=True, locked=True)  # merge whatever another worker wrote
+            if limit is not None and key not in self._testers and len(self._testers) >= limit:
+                return False
+            testers = dict(self._testers)
+            testers[key] = {"name": name, **extra}
+            atomic_write_json(self.path, _dump(self.shape, testers))
+            self._install(self.shape, testers)
+            self.counters["writes"] += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": self.path, "testers": len(self._testers), "shape": self.shape, **self.counters}
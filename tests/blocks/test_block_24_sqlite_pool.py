@@ -0,0 +1,57 @@
+# tests/blocks/test_block_24_sqlite_pool.py
+import gc
+import os
+import threading
+
+import pytest
+
+import sqlite_memory
+from sqlite_pool import SQLitePool
+
+
+def test_pool_reuses_connection_per_thread(tmp_path):
+    pool = SQLitePool(str(tmp_path / "pool.db"))
+    c1 = pool.connection()
+    c2 = pool.connection()
+    assert c1 is c2
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(pool.connection()))
+    t.start(); t.join()
+    assert other[0] is not c1
+
+    stats = pool.stats()
+    assert stats["opened_total"] == 2
+    assert stats["checkouts"] == 3
+    assert c1.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+    pool.close_all()
+
+
+def _open_fds(prefix):
+    return sum(1 for fd in os.listdir("/proc/self/fd")
+               if os.path.realpath(f"/proc/self/fd/{fd}").startswith(prefix))
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_exited_threads_release_their_connections(tmp_path):
+    pool = SQLitePool(str(tmp_path / "threads.db"))
+    main = pool.connection()
+    before = _open_fds(str(tmp_path))
+    for _ in range(5):  # thread idents get reused; each thread still gets (and frees) its own
+        t = threading.Thread(target=pool.connection)
+        t.start(); t.join()
+    gc.collect()
+
+    assert pool.stats()["live_connections"] == 1 and pool.stats()["opened_total"] == 6
+    assert _open_fds(str(tmp_path)) == before
+    assert main.execute("SELECT 1").fetchone() == (1,)
+    pool.close_all()
+
+
+def test_memory_roundtrip_on_pooled_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(sqlite_memory, "client", None)
+    mem = sqlite_memory.SQLiteMemory(db_path=str(tmp_path / "facts.db"))
+    mem.remember("pam", "hometown", "Los Angeles")
+    assert mem.recall("pam", "hometown") == "Los Angeles"
+    assert mem.export() == {"pam": {"hometown": ["Los Angeles"]}}
+    assert mem.pool_stats()["opened_total"] == 1
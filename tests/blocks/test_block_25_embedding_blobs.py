@@ -0,0 +1,40 @@
+# tests/blocks/test_block_25_embedding_blobs.py
+import json
+import sqlite3
+
+import numpy as np
+
+import sqlite_memory
+
+
+def _legacy_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE facts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            subject TEXT NOT NULL, relation TEXT NOT NULL, value TEXT NOT NULL,
+            embedding TEXT, UNIQUE(subject, relation, value)
+        )
+    """)
+    conn.execute("INSERT INTO facts (subject, relation, value, embedding) VALUES (?,?,?,?)",
+                 ("ty", "dream car", "escalade", json.dumps([0.5, -0.25, 1.0])))
+    conn.commit()
+    conn.close()
+
+
+def test_json_embeddings_migrate_to_blobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(sqlite_memory, "client", None)
+    db = str(tmp_path / "legacy.db")
+    _legacy_db(db)
+
+    mem = sqlite_memory.SQLiteMemory(db_path=db)
+    emb_text, blob = mem._connect().execute("SELECT embedding, embedding_vec FROM facts").fetchone()
+    assert emb_text is None
+    assert isinstance(blob, bytes) and len(blob) == 3 * 4
+    assert np.allclose(sqlite_memory.decode_vec(blob), [0.5, -0.25, 1.0])
+
+
+def test_encode_decode_roundtrip_float16():
+    blob = sqlite_memory.encode_vec([0.1, 0.2, 0.3], dtype="float16")
+    assert len(blob) == 6
+    assert np.allclose(sqlite_memory.decode_vec(blob, "float16"), [0.1, 0.2, 0.3], atol=1e-3)
@@ -0,0 +1,88 @@
+# tests/blocks/test_block_26_embedding_matrix.py
+import sqlite3
+
+import numpy as np
+
+import sqlite_memory
+from vector_matrix import EmbeddingMatrix
+
+
+def test_top_k_and_remove():
+    m = EmbeddingMatrix().load([10, 20, 30], np.eye(3, dtype=np.float32))
+    assert m.top_k([0.0, 0.9, 0.1], k=2)[0][0] == 20
+    m.remove([20])
+    assert 20 not in dict(m.top_k([0.0, 1.0, 0.0], k=5))
+    assert len(m) == 2
+
+
+def test_semantic_search_uses_resident_matrix(tmp_path, monkeypatch, fake_embed_client):
+    monkeypatch.setattr(sqlite_memory, "client", fake_embed_client(keywords=[("car", "escalade")]))
+    db = str(tmp_path / "facts.db")
+    mem = sqlite_memory.SQLiteMemory(db_path=db)
+    mem.remember("ty", "dream car", "escalade")
+    mem.remember("ty", "favorite snack", "oranges")
+
+    assert mem.semantic_search("what's my dream whip") == "Ty's dream car is escalade"
+    assert len(mem._matrix()) == 2
+
+    # another "worker" deletes a row behind our back → the index catches up from the change log
+    other = sqlite3.connect(db)
+    other.execute("DELETE FROM facts WHERE relation='favorite snack'")
+    other.commit(); other.close()
+    assert len(mem._matrix()) == 1
+
+    assert mem.forget("ty", "dream car") == 1
+    assert len(mem._matrix()) == 0
+
+
+def test_other_writers_are_applied_by_id_not_by_reload(tmp_path, monkeypatch, fake_embed_client):
+    monkeypatch.setattr(sqlite_memory, "client", fake_embed_client(keywords=[("car", "escalade")]))
+    db = str(tmp_path / "delta.db")
+    mem = sqlite_memory.SQLiteMemory(db_path=db)
+    mem.remember("ty", "dream car", "escalade")
+    mem.remember("ty", "favorite snack", "oranges")
+    assert len(mem._matrix()) == 2
+
+    def no_reload(*a, **k):
+        raise AssertionError("full index reload")
+
+    make_index = sqlite_memory.make_index
+    monkeypatch.setattr(sqlite_memory, "make_index", no_reload)
+    other = sqlite3.connect(db)  # another process: deferred insert, its vector, and a delete
+    other.execute("INSERT INTO facts (subject, relation, value) VALUES ('ty', 'lucky car', 'mustang')")
+    other.execute("UPDATE facts SET embedding_vec=(SELECT embedding_vec FROM facts WHERE value='escalade') "
+                  "WHERE value='mustang'")
+    other.execute("DELETE FROM facts WHERE value='oranges'")
+    other.commit(); other.close()
+
+    m = mem._matrix()
+    car_ids = {r[0] for r in mem._connect().execute("SELECT id FROM facts WHERE relation LIKE '%car'")}
+    assert len(m) == 2 and {i for i, _ in m.top_k(mem._embed("car"), k=5)} == car_ids
+
+    monkeypatch.setattr(sqlite_memory, "FACT_LOG_KEEP", 1)  # log no longer reaches back → full reload
+    other = sqlite3.connect(db)
+    other.execute("DELETE FROM facts WHERE value='mustang'")
+    other.execute("DELETE FROM facts WHERE value='escalade'")
+    other.commit(); other.close()
+    monkeypatch.setattr(sqlite_memory, "make_index", make_index)
+    assert len(mem._matrix()) == 0
+
+
+def test_saved_ivf_index_catches_up_from_the_change_log(tmp_path, monkeypatch, fake_embed_client):
+    import ann_index
+
+    monkeypatch.setattr(sqlite_memory, "client", fake_embed_client(keywords=[("car", "escalade")]))
+    monkeypatch.setattr(sqlite_memory, "ANN_INDEX", "ivf")
+    monkeypatch.setattr(ann_index, "ANN_INDEX", "ivf")
+    mem = sqlite_memory.SQLiteMemory(db_path=str(tmp_path / "ivf.db"))
+    mem.remember("ty", "dream car", "escalade")
+    mem.remember("ty", "favorite snack", "oranges")
+    assert len(mem._matrix()) == 2  # full load, saved at this generation
+    mem.remember("ty", "first car", "civic")  # patched in place; the file is now behind
+
+    def no_reload(*a, **k):
+        raise AssertionError("full index reload")
+
+    monkeypatch.setattr(sqlite_memory, "_MATRICES", {})  # a fresh process
+    monkeypatch.setattr(ann_index.IVFIndex, "load", no_reload)
+    assert len(mem._matrix()) == 3
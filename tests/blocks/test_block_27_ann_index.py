@@ -0,0 +1,44 @@
+# tests/blocks/test_block_27_ann_index.py
+import numpy as np
+
+from ann_index import IVFIndex, make_index
+from vector_matrix import EmbeddingMatrix
+
+
+def _data(n=2000, dim=32, topics=20, seed=3):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((topics, dim), dtype=np.float32)
+    return centers[rng.integers(topics, size=n)] + 0.3 * rng.standard_normal((n, dim), dtype=np.float32)
+
+
+def test_ivf_matches_exact_top1():
+    vecs = _data()
+    exact = EmbeddingMatrix().load(range(len(vecs)), vecs)
+    ivf = IVFIndex(nlist=20, nprobe=4, min_train=100).load(range(len(vecs)), vecs)
+    assert ivf.trained
+    hits = sum(ivf.top_k(q, 1)[0][0] == exact.top_k(q, 1)[0][0] for q in vecs[:100])
+    assert hits >= 95
+
+
+def test_ivf_incremental_insert_remove_and_persist(tmp_path):
+    vecs = _data(n=500)
+    ivf = IVFIndex(nlist=10, nprobe=10, min_train=200).load(range(400), vecs[:400])
+    for i in range(400, 500):
+        ivf.upsert(i, vecs[i])
+    assert len(ivf) == 500
+    assert ivf.top_k(vecs[450], 1)[0][0] == 450
+
+    ivf.remove([450])
+    assert 450 not in dict(ivf.top_k(vecs[450], 5))
+
+    path = tmp_path / "ivf.npz"
+    ivf.save(path, generation=7)
+    back, meta = IVFIndex.load_file(path)
+    assert meta == {"generation": 7}
+    assert len(back) == 499
+    assert back.top_k(vecs[10], 1)[0][0] == 10
+
+
+def test_make_index_auto_switch():
+    assert make_index(10, kind="auto").kind == "exact"
+    assert make_index(10, kind="ivf").kind == "ivf"
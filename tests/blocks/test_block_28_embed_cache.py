@@ -0,0 +1,45 @@
+# tests/blocks/test_block_28_embed_cache.py
+from embed_cache import EmbeddingCache, cache_key
+
+
+def test_repeat_texts_hit_cache_and_survive_restart(tmp_path, fake_embed_client):
+    client = fake_embed_client()
+    emb = client.embeddings
+    db = str(tmp_path / "cache.db")
+
+    cache = EmbeddingCache(db_path=db)
+    first = cache.get_many(["hello  world", "pam hometown", "hello world"], "m", client)
+    assert len(emb.calls) == 1 and len(emb.calls[0]) == 2   # deduped + batched
+    assert list(first[0]) == list(first[2])
+    assert cache.get("pam hometown", "m", client) is not None
+    assert len(emb.calls) == 1
+    assert cache.stats()["mem_hits"] == 1
+
+    restarted = EmbeddingCache(db_path=db)
+    restarted.get_many(["pam hometown", "hello world"], "m", client)
+    assert len(emb.calls) == 1
+    assert restarted.stats()["disk_hits"] == 2
+
+
+def test_model_is_part_of_key_and_lru_eviction(tmp_path, fake_embed_client):
+    assert cache_key("a", "x") != cache_key("b", "x")
+    client = fake_embed_client()
+    cache = EmbeddingCache(db_path=str(tmp_path / "cache.db"), max_rows=2, mem_items=1)
+    cache.get_many(["one", "two", "three"], "m", client)
+    assert cache.evict() == 1
+    assert cache.stats()["mem_items"] == 1
+
+
+def test_disk_hits_only_touch_stale_rows(tmp_path, fake_embed_client):
+    client = fake_embed_client()
+    db = str(tmp_path / "cache.db")
+    EmbeddingCache(db_path=db).get_many(["fresh", "old"], "m", client)
+    conn = EmbeddingCache(db_path=db).pool.connection()
+    with conn:
+        conn.execute("UPDATE embeddings SET last_used = 0 WHERE key = ?", (cache_key("m", "old"),))
+
+    reader = EmbeddingCache(db_path=db, mem_items=0, touch_secs=3600)
+    for _ in range(5):
+        assert all(v is not None for v in reader.get_many(["fresh", "old"], "m", client))
+    assert reader.stats()["touches"] == 1  # only the stale row, and only once
+    assert conn.execute("SELECT MIN(last_used) FROM embeddings").fetchone()[0] > 0
@@ -0,0 +1,33 @@
+# tests/blocks/test_block_29_remember_many.py
+import sqlite_memory
+from knowledgefeed import KnowledgeFeed
+
+
+def test_remember_many_batches_embeddings_in_one_transaction(tmp_path, monkeypatch, fake_embed_client):
+    client = fake_embed_client()
+    monkeypatch.setattr(sqlite_memory, "client", client)
+    mem = sqlite_memory.SQLiteMemory(db_path=str(tmp_path / "bulk.db"))
+
+    triples = [("pam", f"bulk fact {i}", f"value {i}") for i in range(130)]
+    triples.append(("pam", "bulk fact 0", "value 0"))  # duplicate is ignored
+    gen_before = mem.generation()
+    stats = mem.remember_many(triples, batch_size=64)
+
+    assert stats["facts"] == 130
+    assert stats["embedded"] == 130
+    assert len(client.embeddings.calls) == 3
+    assert mem.generation() == gen_before + 130
+    assert mem.recall("pam", "bulk fact 42") == "value 42"
+    assert len(mem._matrix()) == 130
+
+
+def test_knowledgefeed_uses_bulk_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(sqlite_memory, "client", None)
+    mem = sqlite_memory.SQLiteMemory(db_path=str(tmp_path / "feed.db"))
+    kdir = tmp_path / "knowledge"
+    kdir.mkdir()
+    (kdir / "family.txt").write_text("Pam | hometown | Los Angeles\nTy | dream car | Escalade\n", encoding="utf-8")
+
+    res = KnowledgeFeed(mem, root=kdir).ingest_paths()
+    assert res["saved"] == 2
+    assert mem.recall("ty", "dream car") == "Escalade"
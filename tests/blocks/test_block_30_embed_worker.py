@@ -0,0 +1,102 @@
+# tests/blocks/test_block_30_embed_worker.py
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import sqlite_memory
+from embed_worker import EmbedWorker
+
+
+def test_deferred_remember_then_drain(tmp_path, monkeypatch, fake_embed_client):
+    client = fake_embed_client()
+    emb = client.embeddings
+    monkeypatch.setattr(sqlite_memory, "client", client)
+    mem = sqlite_memory.SQLiteMemory(db_path=str(tmp_path / "queue.db"))
+
+    for i in range(10):
+        mem.remember("ty", f"queued fact {i}", f"value {i}", defer=True)
+    assert emb.calls == []
+    assert mem.pending_embeddings() == 10
+    assert mem.recall("ty", "queued fact 3") == "value 3"
+
+    worker = EmbedWorker(mem, batch_size=4)
+    assert worker.status()["pending"] == 10
+    assert worker.drain() == 10
+    assert len(emb.calls) == 3
+    assert mem.pending_embeddings() == 0
+    assert len(mem._matrix()) == 10
+
+
+def test_unembedded_fact_answers_lexically(tmp_path, monkeypatch, fake_embed_client):
+    monkeypatch.setattr(sqlite_memory, "client", fake_embed_client())
+    mem = sqlite_memory.SQLiteMemory(db_path=str(tmp_path / "lex.db"))
+    mem.remember("ty", "dream car", "Escalade", defer=True)
+    assert mem.semantic_search("what's ty's dream car?") == "Ty's dream car is Escalade"
+
+
+def test_running_worker_embeds_in_background(tmp_path, monkeypatch, fake_embed_client):
+    monkeypatch.setattr(sqlite_memory, "client", fake_embed_client())
+    mem = sqlite_memory.SQLiteMemory(db_path=str(tmp_path / "bg.db"))
+    worker = EmbedWorker(mem, poll=0.05).start()
+    try:
+        mem.remember("pam", "hometown", "Los Angeles")  # deferred: a worker is registered
+        deadline = time.time() + 5
+        while mem.pending_embeddings() and time.time() < deadline:
+            time.sleep(0.02)
+        assert mem.pending_embeddings() == 0
+        assert worker.status()["embedded"] == 1
+    finally:
+        worker.stop()
+
+
+def test_drain_runs_past_batches_shortened_by_a_failed_row(tmp_path, monkeypatch, fake_embed_client):
+    monkeypatch.setattr(sqlite_memory, "client", fake_embed_client(reject=lambda t: "poison" in t))
+    mem = sqlite_memory.SQLiteMemory(db_path=str(tmp_path / "short.db"))
+    mem.remember("ty", "bad fact", "poison", defer=True)
+    for i in range(10):
+        mem.remember("ty", f"good fact {i}", f"value {i}", defer=True)
+
+    worker = EmbedWorker(mem, batch_size=4, max_attempts=3)
+    assert worker.drain() == 10  # every batch writes 3 of 4 until the bad row leaves the queue
+    assert mem.pending_embeddings() == 1 and worker.status()["skipped"] == 1
+
+
+def test_one_rejected_row_does_not_stall_the_queue(tmp_path, monkeypatch, fake_embed_client):
+    monkeypatch.setattr(sqlite_memory, "client", fake_embed_client(reject=lambda t: "poison" in t))
+    mem = sqlite_memory.SQLiteMemory(db_path=str(tmp_path / "poison.db"))
+    mem.remember("ty", "bad fact", "poison", defer=True)
+    for i in range(5):
+        mem.remember("ty", f"good fact {i}", f"value {i}", defer=True)
+
+    worker = EmbedWorker(mem, batch_size=4, max_attempts=2)
+    assert worker.run_once() == 3  # batch rejected → rows retried singly; only the bad one fails
+    assert worker.drain() == 2
+    assert mem.pending_embeddings() == 1 and worker.status()["skipped"] == 1  # out of the queue after 2 tries
+    assert worker.run_once() == 0 and worker.counters["row_failures"] == 2
+    assert mem.recall("ty", "bad fact") == "poison"
+
+    mem.remember("ty", "also bad", "poison 2", defer=True)
+    assert worker.drain() == 0  # alone in the queue, a refused row is still counted and leaves it
+    assert mem.pending_embeddings() == 2 and worker.status()["skipped"] == 2
+
+
+def test_outage_is_not_counted_against_rows(tmp_path, monkeypatch):
+    class Unauthorized(Exception):
+        status_code = 401
+
+    def create(model, input):
+        raise errors[0]
+
+    errors = [ConnectionError("network down")]
+    monkeypatch.setattr(sqlite_memory, "client", SimpleNamespace(embeddings=SimpleNamespace(create=create)))
+    mem = sqlite_memory.SQLiteMemory(db_path=str(tmp_path / "outage.db"))
+    mem.remember("ty", "dream car", "Escalade", defer=True)
+
+    worker = EmbedWorker(mem, max_attempts=1)
+    for err in (ConnectionError("network down"), Unauthorized("bad key")):
+        errors[0] = err
+        with pytest.raises(type(err)):
+            worker.drain()
+    assert worker.counters["row_failures"] == 0 and worker.status()["skipped"] == 0
+    assert mem.pending_embeddings() == 1
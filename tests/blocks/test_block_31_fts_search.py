@@ -0,0 +1,33 @@
+# tests/blocks/test_block_31_fts_search.py
+import sqlite_memory
+
+
+def _mem(tmp_path, monkeypatch):
+    monkeypatch.setattr(sqlite_memory, "client", None)
+    mem = sqlite_memory.SQLiteMemory(db_path=str(tmp_path / "fts.db"))
+    mem.remember("ty", "dream car", "Escalade")
+    mem.remember("pam", "hometown", "Los Angeles")
+    mem.remember("ty", "favorite food", "tacos")
+    return mem
+
+
+def test_search_uses_bm25_prefix_match(tmp_path, monkeypatch):
+    mem = _mem(tmp_path, monkeypatch)
+    assert mem.search("dream car") == "Ty's dream car is Escalade"
+    assert mem.search("los ang") == "Pam's hometown is Los Angeles"
+    assert mem.search('food "(') == "Ty's favorite food is tacos"  # stray FTS syntax is quoted away
+    hits = mem.lexical_search("tacos", k=5)
+    assert [h[3] for h in hits] == ["tacos"] and hits[0][4] > 0
+
+
+def test_fts_index_follows_writes(tmp_path, monkeypatch):
+    mem = _mem(tmp_path, monkeypatch)
+    mem.forget("ty", "dream car")
+    assert mem.search("dream") is None
+
+    conn = mem._connect()
+    with conn:
+        conn.execute("UPDATE facts SET relation='home town' WHERE relation='hometown'")
+    assert mem.search("home town") == "Pam's home town is Los Angeles"
+    plan = conn.execute("EXPLAIN QUERY PLAN SELECT value FROM facts WHERE subject='ty' AND relation='x'").fetchall()
+    assert "INDEX" in str(plan)
@@ -0,0 +1,38 @@
+# tests/blocks/test_block_32_hybrid_retriever.py
+import time
+
+import sqlite_memory
+from hybrid_retriever import HybridRetriever
+
+CARISH = [("car", "escalade", "whip")]  # car-ish text points one way, everything else another
+
+
+def _mem(tmp_path, monkeypatch, client):
+    monkeypatch.setattr(sqlite_memory, "client", client)
+    mem = sqlite_memory.SQLiteMemory(db_path=str(tmp_path / "hybrid.db"))
+    mem.remember("ty", "dream car", "escalade")
+    mem.remember("pam", "hometown", "Los Angeles")
+    return mem
+
+
+def test_fuses_lexical_and_vector_with_provenance(tmp_path, monkeypatch, fake_embed_client):
+    res = HybridRetriever(_mem(tmp_path, monkeypatch, fake_embed_client(keywords=CARISH))).retrieve("what is ty's dream car", k=2)
+    top = res["hits"][0]
+    assert (top["relation"], top["value"]) == ("dream car", "escalade")
+    assert top["confident"]
+    assert set(top["provenance"]) == {"lexical", "vector"}
+    assert top["score"] > 0 and res["timed_out"] == []
+
+    # no shared words: only the vector side can find it
+    top = HybridRetriever(sqlite_memory.SQLiteMemory(db_path=str(tmp_path / "hybrid.db"))).retrieve("whip")["hits"][0]
+    assert top["value"] == "escalade" and set(top["provenance"]) == {"vector"}
+
+
+def test_slow_source_is_dropped_at_budget(tmp_path, monkeypatch, fake_embed_client):
+    r = HybridRetriever(_mem(tmp_path, monkeypatch, fake_embed_client(keywords=CARISH)), budget_ms=100)
+    r.add_source("slow", lambda q, k, ctx: time.sleep(1) or [])
+    t0 = time.perf_counter()
+    res = r.retrieve("pam hometown")
+    assert time.perf_counter() - t0 < 0.8
+    assert res["timed_out"] == ["slow"]
+    assert res["hits"][0]["value"] == "Los Angeles"
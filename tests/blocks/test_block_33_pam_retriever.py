@@ -0,0 +1,68 @@
+# tests/blocks/test_block_33_pam_retriever.py
+import numpy as np
+
+import retrieve_pam
+
+PAM_TOPICS = [("garden",), ("church",)]  # garden text points one way, church another, the rest a third
+
+
+def _point_at(tmp_path, monkeypatch):
+    for name, fname in (("CHUNKS_JSON", "pam_chunks.json"), ("VECTORS_NPY", "pam_vectors.npy"),
+                        ("NORMS_NPY", "pam_norms.npy"), ("IVF_NPZ", "pam_ivf.npz"),
+                        ("MANIFEST_JSON", "pam_manifest.json")):
+        monkeypatch.setattr(retrieve_pam, name, tmp_path / fname)
+    pam_txt = tmp_path / "pam.txt"
+    pam_txt.write_text("Pam loves her garden of roses.\n\nPam sings at church every Sunday.\n", encoding="utf-8")
+    return pam_txt
+
+
+def test_vectors_are_mapped_and_norms_stored(tmp_path, monkeypatch, fake_embed_client):
+    pam_txt = _point_at(tmp_path, monkeypatch)
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    ret = retrieve_pam.PamRetriever(pam_txt)
+    ret.client = fake_embed_client(keywords=PAM_TOPICS)
+    emb = ret.client.embeddings
+    ret.ensure_index()
+
+    assert isinstance(ret.vectors, np.memmap)
+    assert ret.index.kind == "mmap"
+    assert np.allclose(np.load(retrieve_pam.NORMS_NPY), np.linalg.norm(np.asarray(ret.vectors), axis=1))
+
+    calls = len(emb.calls)
+    assert "garden" in ret.answer("what does pam grow in her garden?")
+    assert len(emb.calls) == calls + 1  # one query embedding, no re-embedding of chunks
+
+
+def test_singleton_survives_missing_key(tmp_path, monkeypatch):
+    _point_at(tmp_path, monkeypatch).write_text("Pam was born in Shreveport.\n", encoding="utf-8")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setattr(retrieve_pam, "_PAM_RET", None)
+    monkeypatch.setattr(retrieve_pam, "_PAM_FAILED_AT", 0.0)
+    monkeypatch.setattr(retrieve_pam, "PAM_TXT", tmp_path / "pam.txt")
+    assert retrieve_pam.get_pam_retriever() is None  # no client, nothing cached: logged, not raised
+    assert retrieve_pam.retrieve_pam_answer(retrieve_pam.get_pam_retriever(), "pam garden") is None
+
+
+def test_reindex_embeds_only_changed_chunks(tmp_path, monkeypatch, fake_embed_client):
+    pam_txt = _point_at(tmp_path, monkeypatch)
+    ret = retrieve_pam.PamRetriever(pam_txt)
+    ret.client = fake_embed_client(keywords=PAM_TOPICS)
+    emb = ret.client.embeddings
+    ret.ensure_index()
+    assert len(ret.chunks) == 2
+
+    monkeypatch.setattr(retrieve_pam, "get_embeddings",
+                        lambda texts, model, client: [np.asarray(d.embedding, dtype=np.float32)
+                                                      for d in emb.create(model, list(texts)).data])
+    calls = len(emb.calls)
+    with pam_txt.open("a", encoding="utf-8") as f:
+        f.write("\nPam bakes peach cobbler for every birthday.\n")
+    ret.refresh()
+    assert len(ret.chunks) == 3 and len(emb.calls) == calls + 1
+
+    pam_txt.write_text("Pam sings at church every Sunday.\n\nPam bakes peach cobbler for every birthday.\n",
+                       encoding="utf-8")
+    ret.refresh()
+    assert len(emb.calls) == calls + 1  # removal re-embeds nothing
+    assert ret.vectors.shape[0] == 2 and "garden" not in " ".join(ret.chunks)
+    assert "church" in ret.answer("does pam go to church?")
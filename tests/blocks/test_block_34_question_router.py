@@ -0,0 +1,54 @@
+# tests/blocks/test_block_34_question_router.py
+import time
+
+from hybrid_retriever import HybridRetriever
+from question_router import Query, Router, compile_phrases
+
+
+def test_query_normalizes_once():
+    q = Query("  What’s Pam's HOMETOWN?  ", profile="ty")
+    assert q.lower == "what's pam's hometown?"
+    assert q.tokens == ["what's", "pam's", "hometown"]
+    assert q.ctx == {"profile": "ty"}
+
+
+def test_gates_skip_stages_and_timings_are_recorded():
+    seen = []
+    r = Router()
+    r.register("identity", lambda q: seen.append("identity") or {"source": "identity"},
+               gate=compile_phrases(["who are you", "your name"]))
+    r.register("fallback", lambda q: seen.append("fallback") or {"source": "fallback"})
+    r.register("teach", lambda q: seen.append("teach") or None, gate=lambda q: "is" in q.token_set,
+               before="fallback")
+    assert r.stages == ["identity", "teach", "fallback"]
+
+    res = r.route("what is for dinner")
+    assert res["source"] == "fallback" and seen == ["teach", "fallback"]
+    assert set(res["route"]["timings_ms"]) == {"teach", "fallback"}
+    assert r.route("Who are you?")["route"]["stage"] == "identity"
+    stats = r.stats()
+    assert stats["identity"] == {"calls": 1, "hits": 1, "skipped": 1, "avg_ms": stats["identity"]["avg_ms"]}
+
+
+def test_word_gate_respects_boundaries():
+    gate = compile_phrases(["ty", "pam"], words=True)
+    assert gate.search("is ty here")
+    assert not gate.search("pretty city")
+
+
+def test_decisive_source_ends_the_wait():
+    class Mem:
+        def lexical_search(self, q, k, match_any=False):
+            return []
+
+        def vector_search(self, q, k):
+            time.sleep(2)
+            return []
+
+    r = HybridRetriever(Mem(), budget_ms=1500)
+    r.add_source("exact", lambda q, k, ctx: [(1, "ty", "dream car", "escalade", 1.0)],
+                 confident=lambda q, row: True, decisive=True)
+    t0 = time.perf_counter()
+    res = r.retrieve("my dream car")
+    assert time.perf_counter() - t0 < 1.0
+    assert res["hits"][0]["value"] == "escalade" and "vector" in res["timed_out"]
@@ -0,0 +1,47 @@
+# tests/blocks/test_block_35_keyword_matcher.py
+import random
+
+from escalation_core import escalate
+from keyword_matcher import KeywordMatcher
+from logic import predict_tone
+from style_map import detect_style
+
+
+def test_overlapping_phrases_and_first_tag_order():
+    m = KeywordMatcher()
+    m.register("tone", {"Heart": ["heart", "from the heart"], "Chill": ["he"], "Beast": ["beast"]})
+    hits = m.scan("Straight FROM THE HEART")
+    assert set(hits.tags("tone")) == {"Heart", "Chill"}
+    assert sorted(hits.phrases("tone", "Heart")) == ["from the heart", "heart"]
+    assert hits.first_tag("tone", ["Beast", "Heart", "Chill"]) == "Heart"
+    assert not hits.has("tone", "Beast") and not hits.has("other")
+
+
+def test_same_answers_as_any_substring_scans():
+    rng = random.Random(7)
+    alphabet = "abcde "
+    table = {f"t{i}": ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(3)]
+             for i in range(40)}
+    m = KeywordMatcher().register("x", table)
+    for _ in range(300):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        expected = {tag for tag, ps in table.items() if any(p in text for p in ps)}
+        assert set(m.scan(text).tags("x")) == expected
+
+
+def test_register_replaces_namespace_and_clears_cache():
+    m = KeywordMatcher().register("x", {"a": ["alpha"]})
+    assert m.scan("alpha beta").has("x", "a")
+    m.register("x", {"b": ["beta"]})
+    hits = m.scan("alpha beta")
+    assert hits.tags("x") == ["b"]
+
+
+def test_consumers_keep_their_answers():
+    assert escalate("this is URGENT")["level"] == "high"
+    assert escalate("just chatting")["level"] != "high"
+    assert detect_style("go Beast Mode now") == "Beast Mode"
+    assert detect_style("nothing here") == "Tactical"
+    assert predict_tone("I'm tired but I love this")[0] == "Chill"
+    assert predict_tone("it has purpose")[0] == "Heart"
+    assert predict_tone("hello")[0] == "Beast"
@@ -0,0 +1,37 @@
+# tests/blocks/test_block_36_relation_resolver.py
+from relation_resolver import RelationResolver
+from sqlite_memory import SQLiteMemory
+
+CANON = {"full name", "hometown", "favorite color", "comfort snack", "phone"}
+ALIASES = {"home town": "hometown", "fav color": "favorite color", "cell": "phone", "name": "full name"}
+
+
+def test_alias_exact_and_fuzzy_resolution():
+    r = RelationResolver(CANON, ALIASES)
+    assert r.resolve("Home_Town") == "hometown"
+    assert r.resolve("cell") == "phone"
+    assert r.resolve("favorite colour") == "favorite color"
+    assert r.resolve("comfort snacks") == "comfort snack"
+    assert r.resolve("dream car") == "dream car"  # nothing close: input kept
+    assert r.resolve("favorite colour") == "favorite color"
+    assert r.stats()["memo_hits"] == 1
+
+
+def test_learned_relations_never_override_seeded_ones():
+    r = RelationResolver(CANON, ALIASES)
+    r.observe("dream car")
+    r.observe("favorite colors")
+    assert r.resolve("dream cars") == "dream car"
+    assert r.resolve("favorite colors") == "favorite color"
+
+
+def test_learn_from_facts_table_tracks_generation(tmp_path):
+    mem = SQLiteMemory(str(tmp_path / "rel.db"))
+    mem.remember("ty", "dream car", "black Tesla", defer=True)
+    r = RelationResolver(CANON, ALIASES)
+    assert r.learn_from(mem) >= 1
+    assert r.learn_from(mem) == 0  # generation unchanged
+    assert r.resolve("dream_cars") == "dream car"
+    assert mem.relations("ty") == ["dream car"]
+    assert r.match("dream car?", mem.relations("ty"), min_ratio=0.5)[0] == "dream car"
+    assert r.match("blah", mem.relations("ty"), min_ratio=0.5)[0] is None
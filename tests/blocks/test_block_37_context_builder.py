@@ -0,0 +1,44 @@
+# tests/blocks/test_block_37_context_builder.py
+from context_builder import ContextBuilder, count_tokens
+from sqlite_memory import SQLiteMemory
+
+
+class _Retriever:
+    def __init__(self, hits):
+        self.hits, self.calls = hits, []
+
+    def retrieve(self, query, k=5, budget_ms=None, **ctx):
+        self.calls.append((query, k, ctx))
+        return {"hits": self.hits}
+
+
+def _mem(tmp_path, n=0):
+    mem = SQLiteMemory(str(tmp_path / "ctx.db"))
+    for i in range(n):
+        mem._remember_deferred("pam", f"rel {i}", f"value number {i}")
+    return mem
+
+
+def test_digest_is_cached_until_a_write(tmp_path):
+    mem = _mem(tmp_path, 3)
+    cb = ContextBuilder(mem, subjects=("pam",))
+    first = cb.build("anything")
+    assert "pam: rel 2=value number 2;" in first["text"]
+    cb.build("anything else")
+    assert cb.counters["digest_builds"] == 1 and cb.counters["digest_hits"] == 1
+    mem._remember_deferred("pam", "hometown", "Gary")
+    assert "hometown=Gary" in cb.build("again")["text"]
+    assert cb.counters["digest_builds"] == 2
+
+
+def test_relevant_first_and_budget_stays_flat(tmp_path):
+    mem = _mem(tmp_path, 2000)
+    hits = [{"subject": "pam", "relation": "hometown", "value": "Gary", "confident": True},
+            {"subject": "pam", "relation": "rel 5", "value": "noise", "confident": False}]
+    r = _Retriever(hits)
+    cb = ContextBuilder(mem, r, subjects=("pam", "ty"), budget_tokens=120, digest_tokens=80)
+    out = cb.build("where is pam from", profile="ty")
+    assert out["facts"][0] == "pam: hometown=Gary"
+    assert "noise" not in out["text"]
+    assert out["tokens"] <= 120 and count_tokens(out["text"]) <= 120
+    assert r.calls[0][2] == {"profile": "ty"}
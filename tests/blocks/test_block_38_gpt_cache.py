@@ -0,0 +1,48 @@
+# tests/blocks/test_block_38_gpt_cache.py
+import numpy as np
+
+from gpt_cache import ResponseCache, normalize_question
+
+
+def test_normalized_repeats_hit_and_scope_isolates(tmp_path):
+    cache = ResponseCache(str(tmp_path / "g.db"))
+    calls = []
+    scope = cache.scope_key("gpt-4o-mini", "system", generation=3, scope="ty")
+    ask = lambda: calls.append(1) or "Hi there."
+    assert cache.cached("Tell me a joke!", scope, ask) == ("Hi there.", False)
+    assert cache.cached("  tell me a JOKE ", scope, ask) == ("Hi there.", True)
+    assert normalize_question("What’s up?") == "what's up"
+
+    # a write bumps the generation; a different system prompt is a different scope
+    assert cache.get("tell me a joke", cache.scope_key("gpt-4o-mini", "system", 4, "ty")) is None
+    assert cache.get("tell me a joke", cache.scope_key("gpt-4o-mini", "other", 3, "ty")) is None
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 3 and stats["stores"] == 1
+
+
+def test_disk_tier_ttl_and_lru(tmp_path):
+    path = str(tmp_path / "g.db")
+    scope = ResponseCache.scope_key("m", "s", 1)
+    ResponseCache(path).put("q1", "a1", scope, cost_ms=900)
+    fresh = ResponseCache(path)  # another worker: served from SQLite
+    assert fresh.get("q1", scope) == "a1" and fresh.stats()["disk_hits"] == 1
+    assert fresh.stats()["saved_ms"] == 900
+    assert ResponseCache(path, ttl=-1).get("q1", scope) is None
+
+    small = ResponseCache(str(tmp_path / "s.db"), mem_items=2, max_rows=2)
+    for i in range(3):
+        small.put(f"q{i}", f"a{i}", scope)
+    assert small.stats()["mem_items"] == 2
+    assert small.evict() == 1 and small.get("q0", scope) is None
+
+
+def test_semantic_near_duplicates(tmp_path):
+    vecs = {"how tall is pam": np.array([1.0, 0.0]), "how tall is pam really": np.array([0.99, 0.05]),
+            "what is the weather": np.array([0.0, 1.0])}
+    cache = ResponseCache(str(tmp_path / "g.db"), embedder=vecs.get, sim=0.95)
+    scope = cache.scope_key("m", "s", 1)
+    cache.put("how tall is pam", "5'6\"", scope)
+    assert cache.get("how tall is pam really", scope) == "5'6\""
+    assert cache.get("what is the weather", scope) is None
+    assert cache.stats()["semantic_hits"] == 1
@@ -0,0 +1,66 @@
+# tests/blocks/test_block_39_ask_stream.py
+import importlib.util
+import json
+import pathlib
+import types
+
+# Load the root-level app.py explicitly to avoid the app/ package name collision
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+SPEC = importlib.util.spec_from_file_location("root_app", ROOT / "app.py")
+root_app = importlib.util.module_from_spec(SPEC)
+SPEC.loader.exec_module(root_app)
+
+
+def _chunk(text):
+    return types.SimpleNamespace(choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=text))])
+
+
+class _StreamingCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, stream=False, **kw):
+        self.calls += 1
+        assert stream
+        return iter([_chunk("Hello"), _chunk(" there"), _chunk(None), _chunk(", Ty.")])
+
+
+def _events(body):
+    out = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.split("\n"))
+        out.append((lines["event"], json.loads(lines["data"])))
+    return out
+
+
+def test_gpt_tokens_stream_then_repeat_is_one_cached_event(monkeypatch):
+    completions = _StreamingCompletions()
+    monkeypatch.setattr(root_app, "_openai_client", types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions)))
+    root_app.GPT_RESPONSES.clear()
+    client = root_app.app.test_client()
+
+    r = client.post("/ask/stream", json={"text": "sing me something new"})
+    assert r.mimetype == "text/event-stream"
+    events = _events(r.get_data(as_text=True))
+    assert [e for e, _ in events] == ["token", "token", "token", "done"]
+    assert "".join(d["t"] for e, d in events if e == "token") == "Hello there, Ty."
+    assert events[-1][1]["answer"] == "Hello there, Ty." and events[-1][1]["cached"] is False
+
+    events = _events(client.post("/ask/stream", json={"text": "Sing me something new!"}).get_data(as_text=True))
+    assert [e for e, _ in events] == ["answer", "done"] and events[-1][1]["cached"] is True
+    assert completions.calls == 1
+
+
+def test_memory_answer_is_a_single_event():
+    client = root_app.app.test_client()
+    client.post("/ask", json={"text": "remember my lucky number is 23"})
+    events = _events(client.post("/ask/stream", json={"text": "lucky number"}).get_data(as_text=True))
+    assert events[0] == ("answer", {"answer": "23", "source": "memory", "ms": events[0][1]["ms"]})
+    assert client.post("/ask/stream", json={}).status_code == 400
+    assert client.get("/ask/stream?text=remember+my+lucky+number+is+7").status_code == 405  # no state-changing GET
+
+    # cross-site form POSTs (query string or urlencoded body) are refused and write nothing
+    assert client.post("/ask/stream?text=remember+my+csrf+word+is+pwned").status_code == 415
+    assert client.post("/ask/stream", data={"text": "remember my csrf word is pwned"}).status_code == 415
+    assert client.post("/ask/stream?text=remember+my+csrf+word+is+pwned", json={}).status_code == 400
+    assert client.post("/ask", json={"text": "csrf word"}).get_json().get("answer") != "pwned"
@@ -0,0 +1,28 @@
+# tests/blocks/test_block_40_asgi_app.py
+import pytest
+
+pytest.importorskip("starlette")
+pytest.importorskip("httpx")
+
+from starlette.testclient import TestClient  # noqa: E402
+
+import asgi_app  # noqa: E402
+
+
+def test_async_routes_and_mounted_flask_routes():
+    with TestClient(asgi_app.app) as client:
+        assert client.get("/").text == "SoulNode is active. Ready to receive your input."
+        assert client.post("/ask", json={}).status_code == 400
+        client.post("/ask", json={"text": "remember my asgi number is 42"})
+        assert client.post("/ask", json={"text": "asgi number"}).json() == {"ok": True, "answer": "42"}
+        body = client.post("/ask/stream", json={"text": "asgi number"}).text
+        assert body.startswith("event: answer\n") and '"answer": "42"' in body
+        assert client.get("/asgi/status").json()["mode"] == "asgi"
+
+
+def test_stream_takes_text_only_from_a_json_body():
+    with TestClient(asgi_app.app) as client:
+        assert client.post("/ask/stream?text=remember+my+csrf+word+is+pwned").status_code == 415
+        assert client.post("/ask/stream", data={"text": "remember my csrf word is pwned"}).status_code == 415
+        assert client.post("/ask?text=remember+my+csrf+word+is+pwned", json={}).status_code == 400
+        assert client.post("/ask", json={"text": "csrf word"}).json().get("answer") != "pwned"
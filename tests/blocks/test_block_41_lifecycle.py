@@ -0,0 +1,96 @@
+# tests/blocks/test_block_41_lifecycle.py
+import importlib.util
+import pathlib
+
+from lifecycle import Boot, lazy
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+
+
+def _load_app():
+    spec = importlib.util.spec_from_file_location("root_app_lifecycle", ROOT / "app.py")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def test_lazy_builds_once_and_forwards():
+    built = []
+
+    class Thing:
+        size = 3
+
+    proxy = lazy(lambda: built.append(1) or Thing(), "thing")
+    assert not proxy.loaded and built == []
+    assert proxy.size == 3 and proxy.size == 3
+    proxy.size = 5
+    assert proxy.size == 5 and built == [1]
+
+    none = lazy(lambda: None, "client")
+    assert not none  # "no client" stays falsy, like a plain None
+    proxy.reset()
+    assert proxy.size == 3 and built == [1, 1]
+
+
+def test_boot_runs_once_and_records_failures():
+    boot, calls = Boot(), []
+
+    @boot.step("a")
+    def _a():
+        calls.append("a-old")
+
+    @boot.step("b")
+    def _b():
+        raise RuntimeError("disk gone")
+
+    @boot.step("a")  # re-registration replaces, keeps one step per name
+    def _a2():
+        calls.append("a")
+
+    assert boot.run() is True
+    assert boot.run() is False
+    assert calls == ["a"]
+    st = boot.status()
+    assert st["booted"] and st["steps"] == ["b", "a"]
+    assert st["results"]["b"] == {"ok": False, "error": "disk gone", "ms": st["results"]["b"]["ms"]}
+    assert st["results"]["a"]["ok"]
+
+
+def test_app_import_defers_boot_until_create_app_or_first_request():
+    mod = _load_app()
+    assert not mod.BOOT.booted
+    assert not mod.memory.loaded and not mod.store.loaded
+
+    status = mod.app.test_client().get("/boot/status").get_json()  # first request boots
+    assert status["booted"] and "identity" in status["steps"]
+    assert all(r["ok"] for r in status["results"].values())
+    assert mod.memory.recall("soulnode", "creator")
+
+    assert mod.create_app() is mod.app and mod.BOOT.run() is False
+
+
+def test_per_process_steps_can_be_deferred_and_rerun_after_fork(monkeypatch):
+    import lifecycle
+
+    boot, calls = Boot(), []
+    boot.defer_process_steps = True  # gunicorn master: no threads before fork
+
+    @boot.step("shared")
+    def _shared():
+        calls.append("shared")
+
+    @boot.step("worker", per_process=True)
+    def _worker():
+        calls.append("worker")
+
+    assert boot.run() is True and calls == ["shared"]
+    assert boot.status()["steps"] == ["shared"] and boot.status()["process_steps"] == ["worker"]
+    assert boot.run_process() is True and boot.run_process() is False
+    monkeypatch.setattr(lifecycle.os, "getpid", lambda: -7)  # a forked child
+    assert boot.run() is False and boot.run_process() is True
+    assert calls == ["shared", "worker", "worker"]
+
+    eager, ran = Boot(), []
+    eager.defer_process_steps = False
+    eager.step("worker", per_process=True)(lambda: ran.append(1))
+    assert eager.run() is True and ran == [1]
@@ -0,0 +1,84 @@
+# tests/blocks/test_block_42_preload_fingerprints.py
+import importlib.util
+import json
+import os
+import pathlib
+
+import sqlite_memory
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+SPEC = importlib.util.spec_from_file_location("root_app", ROOT / "app.py")
+root_app = importlib.util.module_from_spec(SPEC)
+SPEC.loader.exec_module(root_app)
+
+
+def _parse(path):
+    return [(f["sub"], f["rel"], f["val"]) for f in json.loads(pathlib.Path(path).read_text())]
+
+
+def _write(path, facts, mtime):
+    path.write_text(json.dumps([{"sub": s, "rel": r, "val": v} for s, r, v in facts]))
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_sync_file_skips_unchanged_and_diffs_changed(tmp_path, monkeypatch, fake_embed_client):
+    client = fake_embed_client()
+    emb = client.embeddings
+    monkeypatch.setattr(sqlite_memory, "client", client)
+    mem = sqlite_memory.SQLiteMemory(db_path=str(tmp_path / "preload.db"))
+    src = tmp_path / "pam_facts_flat.json"
+    mem.remember_many([("pam", "hometown", "los angeles")])  # stored by a boot before fingerprints
+    emb.texts.clear()
+
+    _write(src, [("pam", "hometown", "los angeles"), ("pam", "church", "grace"), ("pam", "pets", "dog")], 10**18)
+    first = mem.sync_file(str(src), _parse)
+    assert first["status"] == "synced" and (first["added"], first["kept"]) == (2, 1)
+    assert emb.texts == ["pam church grace", "pam pets dog"]
+
+    gen = mem.generation()
+    assert mem.sync_file(str(src), _parse)["status"] == "unchanged"
+    os.utime(src, ns=(2 * 10**18, 2 * 10**18))
+    assert mem.sync_file(str(src), _parse)["status"] == "touched"
+    assert mem.generation() == gen and len(emb.texts) == 2
+
+    _write(src, [("pam", "hometown", "los angeles"), ("pam", "church", "new hope"), ("pam", "doctor", "dr. lee")],
+           3 * 10**18)
+    diff = mem.sync_file(str(src), _parse)
+    assert (diff["added"], diff["removed"]) == (2, 2)
+    assert emb.texts[2:] == ["pam church new hope", "pam doctor dr. lee"]
+    assert mem.recall("pam", "church") == "new hope"
+    assert mem.recall("pam", "pets") is None
+
+    os.remove(src)
+    assert mem.sync_file(str(src), _parse)["status"] == "missing"
+    assert mem.recall("pam", "doctor") == "dr. lee"
+
+
+def test_file_edits_never_delete_facts_taught_at_runtime(tmp_path, monkeypatch, fake_embed_client):
+    monkeypatch.setattr(sqlite_memory, "client", fake_embed_client())
+    mem = sqlite_memory.SQLiteMemory(db_path=str(tmp_path / "taught.db"))
+    mem.remember("ty", "dream car", "escalade")  # a user taught this
+    src = tmp_path / "memory_store.json"
+
+    _write(src, [("ty", "dream car", "escalade"), ("ty", "fav color", "blue")], 10**18)
+    assert mem.sync_file(str(src), _parse)["kept"] == 1
+    _write(src, [("ty", "fav color", "green")], 2 * 10**18)
+    mem.sync_file(str(src), _parse)
+
+    assert mem.recall("ty", "dream car") == "escalade"
+    assert mem.recall("ty", "fav color") == "green"
+
+
+def test_app_preload_is_idempotent_across_boots(tmp_path, monkeypatch):
+    src = tmp_path / "memory_store.json"
+    src.write_text(json.dumps({"ty": {"dream car": "Escalade", "fav color": "blue"}}))
+    monkeypatch.setattr(root_app, "PRELOAD_SOURCES", [(src, root_app._load_memory_store_json),
+                                                      (tmp_path / "absent.json", root_app._load_pam_flat)])
+
+    first = root_app.preload_sources()
+    assert [r["status"] for r in first] == ["synced", "missing"]
+    assert root_app.mem_recall("ty", "favorite color") == "blue"
+
+    again = root_app.preload_sources()
+    assert [r["status"] for r in again] == ["unchanged", "missing"]
+    assert root_app.PRELOAD_STATUS == again
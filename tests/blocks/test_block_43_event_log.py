@@ -0,0 +1,75 @@
+# tests/blocks/test_block_43_event_log.py
+import importlib.util
+import json
+import pathlib
+import threading
+
+from analytics_store import AnalyticsStore
+from event_log import EventLog
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+SPEC = importlib.util.spec_from_file_location("root_app", ROOT / "app.py")
+root_app = importlib.util.module_from_spec(SPEC)
+SPEC.loader.exec_module(root_app)
+
+
+def test_appends_never_rewrite_the_legacy_array(tmp_path):
+    legacy = tmp_path / "feedback_log.json"
+    legacy.write_text(json.dumps([{"n": 0}, {"n": 1}]))
+    before = legacy.read_text()
+
+    log = EventLog(str(legacy), fsync="never")
+    for n in range(2, 6):
+        log.append({"n": n})
+
+    assert legacy.read_text() == before
+    assert (tmp_path / "feedback_log.jsonl").read_text().count("\n") == 4
+    assert [e["n"] for e in log.iter()] == [0, 1, 2, 3, 4, 5]
+    assert [e["n"] for e in log.tail(3)] == [3, 4, 5]
+    assert [e["n"] for e in log.tail(10)] == [0, 1, 2, 3, 4, 5]
+
+
+def test_rotation_keeps_order_and_prunes(tmp_path):
+    log = EventLog(str(tmp_path / "activity.json"), segment_bytes=200, keep=3, fsync="never")
+    threads = [threading.Thread(target=lambda t=t: [log.append({"t": t, "i": i}) for i in range(25)])
+               for t in range(4)]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+
+    assert log.counters["rotations"] >= 4
+    assert len(log.rotated()) == 3  # older segments pruned
+    entries = log.read()
+    assert entries and all(set(e) == {"t", "i"} for e in entries)
+    for t in range(4):  # each writer's entries stay in order across segments
+        seen = [e["i"] for e in entries if e["t"] == t]
+        assert seen == sorted(seen)
+    assert log.tail(5) == entries[-5:]
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    log = EventLog(str(tmp_path / "session.json"), fsync="never")
+    log.append({"ok": 1})
+    with open(log.path, "a", encoding="utf-8") as f:
+        f.write('{"ok": 2, "cut')
+    assert log.read() == [{"ok": 1}]
+    assert log.tail(2) == [{"ok": 1}]
+
+
+def test_feedback_routes_append_and_dashboard_reads(tmp_path, monkeypatch):
+    root_app.create_app()
+    monkeypatch.setattr(root_app, "FEEDBACK_LOG_FILE", str(tmp_path / "feedback_log.json"))
+    monkeypatch.setattr(root_app, "ACTIVITY_LOG_FILE", str(tmp_path / "test_activity_log.json"))
+    monkeypatch.setattr(root_app, "ANALYTICS", AnalyticsStore(str(tmp_path / "analytics.db")))
+    client = root_app.app.test_client()
+
+    for i in range(3):
+        assert client.post("/feedback", json={"tester": "Ana", "message": f"m{i}", "rating": 5}).get_json()["ok"]
+
+    summary = client.get("/admin/test_status").get_json()["summary"]
+    assert summary["total_feedback"] == 3 and summary["latest_entry"]["message"] == "m2"
+    assert "m1" in client.get("/admin/dashboard").get_data(as_text=True)
+    assert root_app.get_sink().flush()  # activity entries are written by the log-sink thread
+    activity = (tmp_path / "test_activity_log.jsonl").read_text().splitlines()
+    assert len(activity) == 3 and json.loads(activity[0])["route"] == "feedback"
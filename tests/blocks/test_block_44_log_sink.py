@@ -0,0 +1,56 @@
+# tests/blocks/test_block_44_log_sink.py
+import threading
+
+from event_log import EventLog, LogSink
+
+
+class GatedLog(EventLog):
+    """EventLog whose writes wait until the test opens the gate."""
+
+    def __init__(self, path):
+        super().__init__(path, fsync="never")
+        self.gate = threading.Event()
+        self.calls = 0
+
+    def append_many(self, entries):
+        self.gate.wait(5)
+        self.calls += 1
+        super().append_many(entries)
+
+
+def test_submits_are_batched_and_flushed(tmp_path):
+    log = GatedLog(str(tmp_path / "activity.json"))
+    sink = LogSink(maxsize=1000, batch=100, flush_ms=50)
+    for i in range(250):
+        assert sink.submit(log, {"i": i})
+    log.gate.set()
+    assert sink.flush()
+
+    assert [e["i"] for e in log.read()] == list(range(250))
+    assert log.calls < 250 // 10  # batched, not one write per event
+    st = sink.stats()
+    assert st["written"] == 250 and st["dropped"] == 0 and st["depth"] == 0
+
+
+def test_full_queue_drops_or_applies_backpressure(tmp_path):
+    log = GatedLog(str(tmp_path / "busy.json"))
+    dropping = LogSink(maxsize=2, batch=1, flush_ms=1)
+    results = [dropping.submit(log, {"i": i}) for i in range(10)]
+    assert results.count(False) >= 5 and dropping.stats()["dropped"] == results.count(False)
+
+    waiting = LogSink(maxsize=2, batch=1, flush_ms=1, block_ms=2000)
+    threading.Timer(0.2, log.gate.set).start()
+    assert all(waiting.submit(log, {"j": j}) for j in range(10))  # callers waited for room
+    assert waiting.stats()["blocked"] > 0 and waiting.stats()["dropped"] == 0
+    dropping.close()
+    waiting.close()
+    assert sum(1 for e in log.read() if "j" in e) == 10
+
+
+def test_close_writes_everything_queued(tmp_path):
+    log = EventLog(str(tmp_path / "shutdown.json"), fsync="never")
+    sink = LogSink(batch=1000, flush_ms=10_000)  # would otherwise wait 10s for a full batch
+    for i in range(5):
+        sink.submit(log, {"i": i})
+    sink.close(timeout=2)
+    assert len(log.read()) == 5 and not sink.stats()["running"]
@@ -0,0 +1,92 @@
+# tests/blocks/test_block_45_analytics_store.py
+import importlib.util
+import pathlib
+import threading
+import time
+
+from analytics_store import AnalyticsStore
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+SPEC = importlib.util.spec_from_file_location("root_app", ROOT / "app.py")
+root_app = importlib.util.module_from_spec(SPEC)
+SPEC.loader.exec_module(root_app)
+
+
+def _fb(i, tester=None):
+    return {"tester": tester or f"t{i % 7}", "message": f"msg {i}", "rating": 1 + i % 5,
+            "timestamp": f"2026-10-{1 + i % 28:02d} 12:00:00"}
+
+
+def test_aggregates_are_maintained_on_insert(tmp_path):
+    store = AnalyticsStore(str(tmp_path / "a.db"))
+    store.record_feedback_many([_fb(i) for i in range(20_000)])
+    store.record_activity_many([{"tester": "t1", "route": "ask", "status": "success"}] * 3)
+
+    t0 = time.perf_counter()
+    s = store.summary()
+    assert (time.perf_counter() - t0) < 0.05  # reads aggregates, not the 20k rows
+    assert s["total_feedback"] == 20_000 and s["total_testers"] == 7
+    assert s["tester_activity"]["t0"] == sum(1 for i in range(20_000) if i % 7 == 0)
+    assert s["ratings"] == {str(r): 4000 for r in range(1, 6)}
+    assert s["latest_entry"]["message"] == "msg 19999"
+    assert s["tester_events"] == {"t1": 3}
+
+
+def test_pages_are_newest_first_and_filterable(tmp_path):
+    store = AnalyticsStore(str(tmp_path / "p.db"))
+    store.record_feedback_many([_fb(i) for i in range(120)])
+
+    first = store.feedback_page(1, 50)
+    assert first["total"] == 120 and first["pages"] == 3
+    assert [e["message"] for e in first["entries"][:2]] == ["msg 119", "msg 118"]
+    assert len(store.feedback_page(3, 50)["entries"]) == 20
+
+    mine = store.feedback_page(1, 5, tester="t3")
+    assert mine["total"] == sum(1 for i in range(120) if i % 7 == 3)
+    assert all(e["tester"] == "t3" for e in mine["entries"])
+
+
+def test_backfill_runs_once(tmp_path):
+    store = AnalyticsStore(str(tmp_path / "b.db"))
+    assert store.backfill("feedback", [_fb(i) for i in range(10)]) == 10
+    assert store.backfill("feedback", [_fb(i) for i in range(10)]) == 0
+    assert store.summary()["total_feedback"] == 10
+
+
+def test_dashboard_is_paginated_and_escaped(tmp_path, monkeypatch):
+    store = AnalyticsStore(str(tmp_path / "d.db"))
+    store.record_feedback_many([_fb(i) for i in range(75)])
+    store.record_feedback({"tester": "Eve", "message": "<script>x()</script>", "rating": 1, "timestamp": "t"})
+    root_app.create_app()  # boot (and its one-time backfill) before swapping the store in
+    monkeypatch.setattr(root_app, "ANALYTICS", store)
+    client = root_app.app.test_client()
+
+    page = client.get("/admin/dashboard?per_page=25").get_data(as_text=True)
+    assert "&lt;script&gt;" in page and "<script>" not in page
+    assert "page 1 of 4 (76 entries)" in page and "msg 51" in page and "msg 50" not in page
+    assert "msg 50" in client.get("/admin/dashboard?per_page=25&page=2").get_data(as_text=True)
+
+    status = client.get("/admin/test_status").get_json()["summary"]
+    assert status["total_feedback"] == 76 and status["latest_entry"]["tester"] == "Eve"
+
+
+def test_concurrent_backfills_import_the_log_once(tmp_path):
+    path = str(tmp_path / "race.db")
+    AnalyticsStore(path)
+    both_read = threading.Barrier(2)
+
+    def log():  # both workers get past the first meta check before either inserts
+        both_read.wait(5)
+        yield from (_fb(i) for i in range(500))
+
+    results = []
+    workers = [threading.Thread(target=lambda: results.append(AnalyticsStore(path).backfill("feedback", log())))
+               for _ in range(2)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join(10)
+
+    assert sorted(results) == [0, 500]
+    s = AnalyticsStore(path).summary()
+    assert s["total_feedback"] == 500 and sum(s["ratings"].values()) == 500
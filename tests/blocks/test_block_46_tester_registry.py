@@ -0,0 +1,102 @@
+# tests/blocks/test_block_46_tester_registry.py
+import builtins
+import importlib.util
+import json
+import os
+import pathlib
+import threading
+
+from analytics_store import AnalyticsStore
+from event_log import EventLog
+import tester_registry
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+SPEC = importlib.util.spec_from_file_location("root_app", ROOT / "app.py")
+root_app = importlib.util.module_from_spec(SPEC)
+SPEC.loader.exec_module(root_app)
+
+
+def test_lookups_hit_the_cache_until_the_file_changes(tmp_path, monkeypatch):
+    reg_path = tmp_path / "tester_registry.json"
+    reg_path.write_text(json.dumps({"ARCHIE01": "Archie Pate"}))
+    os.utime(reg_path, ns=(10**18, 10**18))
+    reg = tester_registry.TesterRegistry(str(reg_path), shape="flat", check_secs=0)
+    assert reg.name("ARCHIE01") == "Archie Pate" and reg.name("archie01") == "Archie Pate"
+
+    opened = []
+    real_open = builtins.open
+    monkeypatch.setattr(builtins, "open", lambda *a, **k: opened.append(a[0]) or real_open(*a, **k))
+    for _ in range(100):
+        assert reg.name("ARCHIE01") == "Archie Pate"
+    assert reg.name("NOPE") is None
+    assert opened == [] and reg.counters["loads"] == 1
+
+    reg_path.write_text(json.dumps([{"key": "JEFF01", "name": "Jeffrey White"}]))  # edited by hand
+    os.utime(reg_path, ns=(2 * 10**18, 2 * 10**18))
+    assert reg.name("jeff01") == "Jeffrey White" and reg.name("ARCHIE01") is None
+    assert reg.counters["loads"] == 2
+
+
+def test_register_is_atomic_and_moves_embedded_logs(tmp_path):
+    path = tmp_path / "tester_logs.json"
+    path.write_text(json.dumps({"testers": {"A1": {"name": "Ana"}}, "logs": [{"tester": "Ana", "message": "old"}]}))
+    events = EventLog(str(path), fsync="never")
+    reg = tester_registry.TesterRegistry(str(path), logs_to=events, check_secs=0)
+
+    assert reg.get("A1") == {"name": "Ana"}
+    assert json.loads(path.read_text()) == {"testers": {"A1": {"name": "Ana"}}}
+    assert [e["message"] for e in events.read()] == ["old"]
+
+    assert reg.register("B2", "Ben", limit=2, joined="today")
+    assert not reg.register("C3", "Cy", limit=2)
+    assert reg.register("A1", "Ana P.", limit=2)  # updating an existing key is not a new seat
+    assert json.loads(path.read_text())["testers"] == {"A1": {"name": "Ana P."}, "B2": {"name": "Ben", "joined": "today"}}
+    assert not [p for p in os.listdir(tmp_path) if p.startswith(".tmp_")]
+    assert reg.counters["writes"] == 2 and reg.counters["logs_moved"] == 1
+    fresh = tester_registry.TesterRegistry(str(path), logs_to=events)  # e.g. another worker: nothing left to move
+    assert fresh.name("B2") == "Ben" and fresh.counters["logs_moved"] == 0
+    assert len(events.read()) == 1
+
+
+def test_tester_routes_use_the_cached_registries(tmp_path, monkeypatch):
+    root_app.create_app()
+    (tmp_path / "tester_registry.json").write_text(json.dumps({"NATE01": "Nathaniel Hamilton"}))
+    log_path = str(tmp_path / "tester_logs.json")
+    events = EventLog(log_path, fsync="never")
+    monkeypatch.setattr(root_app, "TESTER_EVENTS", events)
+    monkeypatch.setattr(root_app, "TESTERS", tester_registry.TesterRegistry(log_path, logs_to=events))
+    monkeypatch.setattr(root_app, "TESTER_REGISTRY", tester_registry.TesterRegistry(str(tmp_path / "tester_registry.json"), shape="flat"))
+    monkeypatch.setattr(root_app, "FEEDBACK_LOG_FILE", str(tmp_path / "feedback_log.json"))
+    monkeypatch.setattr(root_app, "ACTIVITY_LOG_FILE", str(tmp_path / "test_activity_log.json"))
+    monkeypatch.setattr(root_app, "ANALYTICS", AnalyticsStore(str(tmp_path / "analytics.db")))
+    client = root_app.app.test_client()
+
+    ok = client.post("/tester/feedback", json={"key": "NATE01", "message": "hi", "rating": 4}).get_json()
+    assert ok["ok"] and "Nathaniel" in ok["message"]
+    assert client.post("/tester/feedback", json={"key": "BAD", "message": "x"}).status_code == 401
+
+    admin = root_app.ADMIN_KEY
+    assert client.post("/tester/register", json={"admin_key": admin, "name": "Ana", "key": "ANA1"}).get_json()["ok"]
+    assert client.post("/tester/submit", json={"key": "ANA1", "message": "works", "rating": 5}).get_json()["ok"]
+    assert client.post("/tester/submit", json={"key": "BAD", "message": "no"}).status_code == 403
+
+    logs = client.get(f"/tester/logs?admin_key={admin}").get_json()
+    assert [e["message"] for e in logs["logs"]] == ["works"] and logs["testers"]["ANA1"]["name"] == "Ana"
+    assert "logs" not in json.loads(pathlib.Path(log_path).read_text())
+
+
+def test_register_on_a_file_that_still_embeds_logs(tmp_path):
+    path = tmp_path / "tester_logs.json"
+    path.write_text(json.dumps({"testers": {"A1": {"name": "Ana"}}, "logs": [{"message": "old"}]}))
+    events = EventLog(str(path), fsync="never")
+    reg = tester_registry.TesterRegistry(str(path), logs_to=events)
+
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(ok=reg.register("B2", "Ben")), daemon=True)
+    worker.start()
+    worker.join(5)
+    assert not worker.is_alive(), "register() deadlocked on its own registry lock"
+
+    assert result["ok"] and reg.counters["logs_moved"] == 1
+    assert json.loads(path.read_text()) == {"testers": {"A1": {"name": "Ana"}, "B2": {"name": "Ben"}}}
+    assert [e["message"] for e in events.read()] == ["old"]
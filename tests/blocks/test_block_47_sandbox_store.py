@@ -0,0 +1,80 @@
+# tests/blocks/test_block_47_sandbox_store.py
+import importlib.util
+import json
+import pathlib
+
+import numpy as np
+import pytest
+
+from sandbox_store import SandboxStore
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+SPEC = importlib.util.spec_from_file_location("root_app", ROOT / "app.py")
+root_app = importlib.util.module_from_spec(SPEC)
+SPEC.loader.exec_module(root_app)
+
+
+def _vec(*xs):
+    return list(xs) + [0.0] * (4 - len(xs))
+
+
+def test_namespaces_are_isolated_cached_and_vectorized(tmp_path):
+    store = SandboxStore(str(tmp_path / "sandbox.db"))
+    store.remember("tester1", "car", "tesla", _vec(1, 0))
+    store.remember("tester1", "dog", "rex", _vec(0, 1))
+    store.remember("tester-42", "car", "civic", _vec(1, 0))
+
+    assert store.recall("tester1", "car") == "tesla" and store.recall("tester-42", "car") == "civic"
+    assert store.recall("tester1", "boat") is None
+    key, value, score = store.nearest("tester1", _vec(0.9, 0.1), min_score=0.78)
+    assert (key, value) == ("car", "tesla") and score == pytest.approx(0.9 / np.hypot(0.9, 0.1), rel=1e-5)
+    assert store.nearest("tester1", _vec(0, 0, 1), min_score=0.78) is None
+
+    store.remember("tester1", "car", "rivian", _vec(0, 0, 1))  # overwrite patches the cached row
+    assert store.nearest("tester1", _vec(0, 0, 1))[:2] == ("car", "rivian")
+    assert store.vectors("tester1") == 2 and store.counters["loads"] == 2  # one load per namespace
+
+    other = SandboxStore(str(tmp_path / "sandbox.db"))  # another worker writes...
+    other.remember("tester1", "cat", "tom", _vec(0, 0, 0, 1))
+    assert store.recall("tester1", "cat") == "tom" and store.counters["loads"] == 3  # ...seen via the generation
+    assert store.forget("tester1", "dog") == 1 and store.recall("tester1", "dog") is None
+
+    with pytest.raises(ValueError):
+        store.recall("../etc", "car")
+
+
+def test_legacy_file_is_imported_once_and_limit_applies(tmp_path):
+    legacy = tmp_path / "memory_tester_1.json"
+    legacy.write_text(json.dumps({"data": {"car": "tesla", "city": "la"}, "_index": {"car": {"embedding": _vec(1)}}}))
+    store = SandboxStore(str(tmp_path / "sandbox.db"), legacy_path={"tester1": str(legacy)}.get, max_namespaces=2)
+
+    assert store.items("tester1") == {"car": "tesla", "city": "la"} and store.vectors("tester1") == 1
+    store.remember("tester1", "car", "rivian")
+    legacy.write_text(json.dumps({"data": {"car": "stale"}}))
+    assert SandboxStore(str(tmp_path / "sandbox.db"), legacy_path={"tester1": str(legacy)}.get).recall("tester1", "car") == "rivian"
+
+    store.recall("tester2", "car")
+    with pytest.raises(ValueError):
+        store.recall("tester3", "car")
+
+
+def test_sandbox_ask_remembers_and_recalls(tmp_path, monkeypatch):
+    store = SandboxStore(str(tmp_path / "sandbox.db"), known=root_app._known_sandbox_tester)
+    monkeypatch.setattr(root_app, "SANDBOX", store)
+    vectors = {"car": _vec(1, 0), "ride": _vec(0.95, 0.05), "boat": _vec(0, 1)}
+    monkeypatch.setattr(root_app, "_embed", lambda text: vectors.get(text))
+    client = root_app.app.test_client()
+
+    def ask(tester, text):
+        return client.post(f"/sandbox/ask?tester={tester}", json={"text": text}).get_json()
+
+    assert "tesla" in ask("tester3", "Remember my car is Tesla")["answer"]
+    assert ask("tester3", "what is my car")["answer"] == "tesla"
+    assert ask("tester3", "what is my ride")["answer"] == "tesla"  # semantic hit
+    assert ask("tester3", "what is my boat")["answer"].startswith("I don’t know")
+    assert ask("tester4", "what is my car")["answer"].startswith("I don’t know")
+
+    # unregistered ids read as empty and can't write: no namespace is ever created for them
+    assert ask("stranger", "what is my car")["answer"].startswith("I don’t know")
+    assert ask("stranger", "Remember my car is Tesla")["ok"] is False
+    assert store.stats()["namespaces"] == 2
@@ -4,4 +4,53 @@ import sys, os, pathlib
 # Ensure project root is on sys.path so `import app` works in tests
 ROOT = pathlib.Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
-os.chdir(str(ROOT)) # make pytest run as if from project root
\ No newline at end of file
+os.chdir(str(ROOT)) # make pytest run as if from project root
+
+# Keep the pooled SQLite memory (WAL mode) + caches off the tracked data/ files
+import tempfile
+_TMP = tempfile.mkdtemp(prefix="sono_mem_")
+os.environ.setdefault("MEMORY_DB_PATH", os.path.join(_TMP, "memory_store.db"))
+os.environ.setdefault("EMBED_CACHE_PATH", os.path.join(_TMP, "embed_cache.db"))
+os.environ.setdefault("GPT_CACHE_PATH", os.path.join(_TMP, "gpt_cache.db"))
+os.environ.setdefault("ANALYTICS_DB_PATH", os.path.join(_TMP, "analytics.db"))
+os.environ.setdefault("SANDBOX_DB_PATH", os.path.join(_TMP, "sandbox.db"))
+
+
+# One stand-in for the OpenAI client's `.embeddings`, shared by the embedding tests
+from types import SimpleNamespace
+
+import pytest
+
+
+class FakeEmbeddings:
+    """Records every create() (calls = one input list per request, texts = all inputs).
+    keywords: vector is one-hot on the first group with a word in the text (else the last axis);
+    otherwise a deterministic length-based vector. reject(text) makes a request containing
+    that text raise, like the API refusing one input."""
+
+    def __init__(self, keywords=None, reject=None):
+        self.keywords = keywords
+        self.reject = reject
+        self.calls = []
+        self.texts = []
+
+    def vector(self, text):
+        if self.keywords is None:
+            return [1.0, float(len(text) % 7), 0.5]
+        t = text.lower()
+        hit = next((i for i, group in enumerate(self.keywords) if any(w in t for w in group)), len(self.keywords))
+        return [1.0 if i == hit else 0.0 for i in range(len(self.keywords) + 1)]
+
+    def create(self, model, input):
+        texts = input if isinstance(input, list) else [input]
+        if self.reject and any(self.reject(t) for t in texts):
+            raise ValueError("input rejected")
+        self.calls.append(list(texts))
+        self.texts += texts
+        return SimpleNamespace(data=[SimpleNamespace(embedding=self.vector(t)) for t in texts])
+
+
+@pytest.fixture
+def fake_embed_client():
+    """Factory: fake_embed_client(keywords=None, reject=None) → client; client.embeddings is the fake."""
+    return lambda keywords=None, reject=None: SimpleNamespace(embeddings=FakeEmbeddings(keywords, reject))
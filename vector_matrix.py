@@ -0,0 +1,168 @@
+# vector_matrix.py — resident, pre-normalized embedding matrix (numpy only)
+# -------------------------------------------------------------------------------------------
+# Rows are L2-normalized on insert, so cosine similarity for a query is one mat-vec product.
+# Top-k uses argpartition (O(n)) instead of a full sort. Row ids are stored next to the
+# matrix so hits map straight back to facts.id / chunk index.
+# Storage grows by doubling; removal swaps the last row into the hole (O(dim)).
+# MappedMatrix is the read-only variant for vectors memory-mapped from a .npy file.
+# -------------------------------------------------------------------------------------------
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+def normalize_rows(vecs: np.ndarray) -> np.ndarray:
+    vecs = np.asarray(vecs, dtype=np.float32)
+    norms = np.linalg.norm(vecs, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vecs / norms
+
+
+def _top_k(ids: np.ndarray, sims: np.ndarray, k: int) -> List[Tuple[int, float]]:
+    if not len(sims):
+        return []
+    k = min(k, len(sims))
+    idx = np.argpartition(-sims, k - 1)[:k]
+    idx = idx[np.argsort(-sims[idx])]
+    return [(int(ids[i]), float(sims[i])) for i in idx]
+
+
+class EmbeddingMatrix:
+    kind = "exact"
+
+    def __init__(self, dim: Optional[int] = None, capacity: int = 256):
+        self.dim = dim
+        self._cap = capacity
+        self._mat: Optional[np.ndarray] = None
+        self._ids = np.empty(capacity, dtype=np.int64)
+        self._pos: Dict[int, int] = {}
+        self.n = 0
+        self._lock = threading.RLock()
+
+    # ---- internals ------------------------------------------------------------
+    def _reserve(self, extra: int):
+        need = self.n + extra
+        if self._mat is not None and need <= self._cap:
+            return
+        cap = max(self._cap, 16)
+        while cap < need:
+            cap *= 2
+        mat = np.empty((cap, self.dim), dtype=np.float32)
+        ids = np.empty(cap, dtype=np.int64)
+        if self._mat is not None and self.n:
+            mat[: self.n] = self._mat[: self.n]
+            ids[: self.n] = self._ids[: self.n]
+        self._mat, self._ids, self._cap = mat, ids, cap
+
+    # ---- public API -----------------------------------------------------------
+    def load(self, ids: Iterable[int], vecs) -> "EmbeddingMatrix":
+        """Replace the whole matrix (bulk load from SQLite / .npy)."""
+        ids = np.asarray(list(ids), dtype=np.int64)
+        with self._lock:
+            self._mat, self._pos, self.n = None, {}, 0
+            if len(ids) == 0:
+                return self
+            vecs = normalize_rows(np.asarray(vecs, dtype=np.float32))
+            self.dim = vecs.shape[1]
+            self._cap = max(len(ids), 16)
+            self._reserve(len(ids))
+            self._mat[: len(ids)] = vecs
+            self._ids[: len(ids)] = ids
+            self.n = len(ids)
+            self._pos = {int(i): r for r, i in enumerate(ids)}
+        return self
+
+    def upsert(self, row_id: int, vec) -> bool:
+        vec = np.asarray(vec, dtype=np.float32).reshape(-1)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vec.shape[0]
+            if vec.shape[0] != self.dim:
+                return False  # embedded with a different model; ignore
+            vec = normalize_rows(vec)
+            r = self._pos.get(int(row_id))
+            if r is None:
+                self._reserve(1)
+                r = self.n
+                self.n += 1
+                self._ids[r] = row_id
+                self._pos[int(row_id)] = r
+            self._mat[r] = vec
+        return True
+
+    def remove(self, row_ids: Iterable[int]) -> int:
+        removed = 0
+        with self._lock:
+            for rid in row_ids:
+                r = self._pos.pop(int(rid), None)
+                if r is None:
+                    continue
+                last = self.n - 1
+                if r != last:
+                    self._mat[r] = self._mat[last]
+                    moved = int(self._ids[last])
+                    self._ids[r] = moved
+                    self._pos[moved] = r
+                self.n -= 1
+                removed += 1
+        return removed
+
+    def scores(self, query) -> Tuple[np.ndarray, np.ndarray]:
+        """Cosine score of every row against `query` → (ids, scores)."""
+        q = normalize_rows(np.asarray(query, dtype=np.float32).reshape(-1))
+        with self._lock:
+            if not self.n or q.shape[0] != self.dim:
+                return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+            return self._ids[: self.n].copy(), self._mat[: self.n] @ q
+
+    def top_k(self, query, k: int = 1) -> List[Tuple[int, float]]:
+        return _top_k(*self.scores(query), k)
+
+    def vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        with self._lock:
+            if not self.n:
+                return np.empty(0, dtype=np.int64), np.empty((0, self.dim or 0), dtype=np.float32)
+            return self._ids[: self.n].copy(), self._mat[: self.n].copy()
+
+    def stats(self) -> Dict:
+        return {"kind": self.kind, "rows": self.n, "dim": self.dim}
+
+    def __len__(self):
+        return self.n
+
+
+class MappedMatrix:
+    """Read-only exact index over vectors that stay where they are (typically an np.load
+    mmap_mode='r' array, so every worker process shares the same page-cache pages).
+    Row norms are passed in precomputed; a query is one mat-vec product plus a divide."""
+
+    kind = "mmap"
+
+    def __init__(self, vecs: np.ndarray, norms: np.ndarray, ids: Optional[Iterable[int]] = None):
+        self._mat = vecs
+        self._norms = np.where(norms == 0, 1.0, norms).astype(np.float32)
+        self.n, self.dim = vecs.shape
+        self._ids = np.arange(self.n, dtype=np.int64) if ids is None else np.asarray(list(ids), dtype=np.int64)
+
+    def scores(self, query) -> Tuple[np.ndarray, np.ndarray]:
+        q = normalize_rows(np.asarray(query, dtype=np.float32).reshape(-1))
+        if not self.n or q.shape[0] != self.dim:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        return self._ids, (self._mat @ q) / self._norms
+
+    def top_k(self, query, k: int = 1) -> List[Tuple[int, float]]:
+        return _top_k(*self.scores(query), k)
+
+    def warm(self):
+        """Fault every page in (one pass over the file) so the first real query doesn't."""
+        if self.n:
+            self._mat @ np.zeros(self.dim, dtype=np.float32)
+
+    def stats(self) -> Dict:
+        return {"kind": self.kind, "rows": self.n, "dim": self.dim,
+                "mmap": isinstance(self._mat, np.memmap)}
+
+    def __len__(self):
+        return self.n